@@ -0,0 +1,41 @@
+"""Compare startup cost of loading datafiles from json vs. their binary snapshots.
+
+Run with `python -m benchmarks.bench_cdn`. Files are downloaded first if needed.
+"""
+
+import sys
+
+from benchmarks.timing import best_of, print_table
+from gorgonwikibot import cdn
+
+LARGE_FILES = ["items", "abilities", "quests", "recipes", "npcs"]
+
+
+def bench_startup(files=LARGE_FILES, repeat=5):
+    load = cdn.load  # bypass the in-process cache of get_file
+    rows = []
+    for file in files:
+        load(file)  # make sure both the json and the snapshot exist
+        json_time = best_of(lambda: load(file, snapshot=False), repeat)
+        snapshot_time = best_of(lambda: load(file), repeat)
+        rows.append((file, json_time, snapshot_time))
+    return rows
+
+
+if __name__ == "__main__":
+    rows = bench_startup(sys.argv[1:] or LARGE_FILES)
+    print_table(
+        ("file", "json (ms)", "snapshot (ms)", "speedup"),
+        [
+            (file, f"{j * 1000:.1f}", f"{s * 1000:.1f}", f"{j / s:.1f}x")
+            for file, j, s in rows
+        ]
+        + [
+            (
+                "total",
+                f"{sum(r[1] for r in rows) * 1000:.1f}",
+                f"{sum(r[2] for r in rows) * 1000:.1f}",
+                f"{sum(r[1] for r in rows) / sum(r[2] for r in rows):.1f}x",
+            )
+        ],
+    )
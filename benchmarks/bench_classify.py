@@ -0,0 +1,55 @@
+"""Time classifying every ability the way the profile scripts' filters do.
+
+Run with `python -m benchmarks.bench_classify`.
+"""
+
+import sys
+import tracemalloc
+
+from benchmarks.timing import best_of, print_table
+from gorgonwikibot import cdn
+from gorgonwikibot.content import Ability
+
+
+def classify(abilities):
+    # create_ai_profiles, create_pet_profiles and generate_ability_templates
+    # each look at the same abilities again
+    for _ in range(3):
+        for a in abilities:
+            (a.is_enemy or a.is_pet) and a.is_player_minigolem
+
+
+def bench_classify(repeat=5):
+    data = cdn.get_file(Ability.datafile)
+
+    def build():
+        return [Ability(id, d) for id, d in data.items()]
+
+    tracemalloc.start()
+    abilities = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        "abilities": len(abilities),
+        "build": best_of(build, repeat),
+        "classify": best_of(lambda: classify(build()), repeat),
+        "bytes per object": size / len(abilities),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        cdn.configure(version=sys.argv[1], offline=True)
+    result = bench_classify()
+    print_table(
+        ("abilities", "build (ms)", "build + classify (ms)", "bytes per object"),
+        [
+            (
+                result["abilities"],
+                f"{result['build'] * 1000:.1f}",
+                f"{result['classify'] * 1000:.1f}",
+                f"{result['bytes per object']:.0f}",
+            )
+        ],
+    )
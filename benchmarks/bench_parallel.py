@@ -0,0 +1,51 @@
+"""Time generating pages with different numbers of worker processes.
+
+Run with `python -m benchmarks.bench_parallel [version] [workers...]`.
+"""
+
+import sys
+
+from benchmarks.timing import best_of, print_table
+from gorgonwikibot import cdn, parallel
+from gorgonwikibot.content import get_all_content
+from gorgonwikibot.quest import Quest
+from scripts.create_ability_pages import generate_pages
+from scripts.create_ai_profiles import generate_ai_profiles
+from scripts.create_quest_pages import render_quest
+
+
+def generate_quests(workers):
+    ids = [q.id for q in get_all_content(Quest) if q.data.get("FavorNpc")]
+    with parallel.Pool(workers) as pool:
+        return [result for result, _ in pool.map(render_quest, ids)]
+
+
+generators = {
+    "ability pages": generate_pages,
+    "ai profiles": generate_ai_profiles,
+    "quest pages": generate_quests,
+}
+
+
+def bench_parallel(workers=(1, 2, 4), repeat=3):
+    results = {}
+    for name, generate in generators.items():
+        serial = generate(1)
+        for n in workers:
+            assert generate(n) == serial, f"{name} differ with {n} workers"
+            results[name, n] = best_of(lambda: generate(n), repeat)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        cdn.configure(version=sys.argv[1], offline=True)
+    workers = [int(n) for n in sys.argv[2:]] or [1, 2, 4]
+    results = bench_parallel(workers)
+    print_table(
+        ("pages", *(f"{n} workers (ms)" for n in workers)),
+        [
+            (name, *(f"{results[name, n] * 1000:.0f}" for n in workers))
+            for name in generators
+        ],
+    )
@@ -0,0 +1,71 @@
+"""Time each script's generate, fetch, compare and save loop against a fake wiki.
+
+Every script runs twice on synthetic data: first creating all of its pages,
+then again with nothing to save.
+
+Run with `python -m benchmarks.bench_publish [scale] [latency] [jobs]`. Scale 1 is
+about the size of the real data files, the default 0.1 a tenth of it.
+"""
+
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import pywikibot
+from benchmarks.timing import print_table
+from gorgonwikibot import synthetic
+from gorgonwikibot.fakewiki import FakeWiki
+from scripts import (
+    create_ability_pages,
+    create_ai_profiles,
+    create_pet_profiles,
+    create_quest_pages,
+)
+
+scripts = {
+    "ability pages": create_ability_pages.main,
+    "ai profiles": create_ai_profiles.main,
+    "pet profiles": create_pet_profiles.main,
+    "quest pages": create_quest_pages.main,
+}
+
+
+def bench_publish(scale=0.1, latency=0.01, jobs=4):
+    pywikibot.config.put_throttle = 0
+    pywikibot.config.minthrottle = 0
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        synthetic.install(cache_dir, scale)
+        argv = ["bench", "--offline", "--cache-dir", cache_dir, "--jobs", str(jobs)]
+        for name, main in scripts.items():
+            with FakeWiki(latency=latency) as wiki:
+                wiki.site()
+                for run in ("create", "unchanged"):
+                    before = Counter(wiki.stats)
+                    start = time.perf_counter()
+                    main(argv)
+                    stats = wiki.stats - before
+                    results[name, run] = (time.perf_counter() - start, stats)
+    return results
+
+
+if __name__ == "__main__":
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 0.1
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    results = bench_publish(scale, latency, jobs)
+    print_table(
+        ("pages", "run", "time (s)", "requests", "saved", "pages/s"),
+        [
+            (
+                name,
+                run,
+                f"{seconds:.2f}",
+                stats["requests"],
+                stats["saved"],
+                f"{stats['saved'] / seconds:.0f}",
+            )
+            for (name, run), (seconds, stats) in results.items()
+        ],
+    )
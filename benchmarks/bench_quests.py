@@ -0,0 +1,59 @@
+"""Time rendering every quest page one quest at a time, against render_quests()
+looking up what all of them link to at once.
+
+Run with `python -m benchmarks.bench_quests [version]`.
+"""
+
+import sys
+
+from benchmarks.timing import best_of, print_table
+from gorgonwikibot import cdn, deps
+from gorgonwikibot.quest import Quest, render_quests
+
+
+def one_by_one(quests):
+    sources = []
+    for quest in quests:
+        # the reads of each quest are recorded, like render_quests does
+        with deps.recording():
+            try:
+                sources.append(quest.wiki_source())
+            except Exception:
+                sources.append(None)
+    return sources
+
+
+def batch(quests):
+    return [source for source, _, _ in render_quests(quests)]
+
+
+def bench_quests(repeat=5):
+    data = cdn.get_file(Quest.datafile)
+
+    def quests():
+        # fresh objects, so errors and notices don't pile up
+        return [Quest(id, d) for id, d in data.items() if d.get("FavorNpc")]
+
+    assert one_by_one(quests()) == batch(quests())
+    return {
+        "quests": len(quests()),
+        "one by one": best_of(lambda: one_by_one(quests()), repeat),
+        "batch": best_of(lambda: batch(quests()), repeat),
+        "construct": best_of(quests, repeat),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        cdn.configure(version=sys.argv[1], offline=True)
+    result = bench_quests()
+    print_table(
+        ("quests", "one by one (ms)", "render_quests (ms)"),
+        [
+            (
+                result["quests"],
+                f"{(result['one by one'] - result['construct']) * 1000:.1f}",
+                f"{(result['batch'] - result['construct']) * 1000:.1f}",
+            )
+        ],
+    )
@@ -0,0 +1,80 @@
+"""Time a balance-table query on the stats table against looping over records.
+
+Run with `python -m benchmarks.bench_stats`.
+"""
+
+import sys
+import tracemalloc
+
+from benchmarks.timing import best_of, print_table
+from gorgonwikibot import cdn, stats
+from gorgonwikibot.content import Ability
+
+
+def query_records(data, skill, damage):
+    return [
+        d["InternalName"]
+        for d in data.values()
+        if d.get("Skill") == skill and d.get("PvE", {}).get("Damage", 0) > damage
+    ]
+
+
+def query_table(t, skill, damage):
+    rows = t.where("skill", "==", skill) & t.where("damage", ">", damage)
+    return [iname for iname, in t.select(rows, "iname")]
+
+
+def traced_size(fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def bench_stats(repeat=5):
+    version = cdn.get_version()
+    data, records_size = traced_size(
+        lambda: cdn.load(Ability.datafile, version, snapshot=False)
+    )
+    t, table_size = traced_size(lambda: stats._ability_table.__wrapped__(version))
+    assert query_records(data, "Sword", 0) == query_table(t, "Sword", 0)
+    skill = max(t.aggregate("iname", len, by="skill").items(), key=lambda g: g[1])[0]
+    damage = stats.mean(t.values("damage"))
+    return {
+        "abilities": len(t),
+        "build": best_of(lambda: stats._ability_table.__wrapped__(version), 1),
+        "records MB": records_size / 1e6,
+        "table MB": table_size / 1e6,
+        "records": best_of(lambda: query_records(data, skill, damage), repeat),
+        "table": best_of(lambda: query_table(t, skill, damage), repeat),
+        "aggregate": best_of(lambda: t.aggregate("damage", max, by="skill"), repeat),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        cdn.configure(version=sys.argv[1], offline=True)
+    result = bench_stats()
+    print_table(
+        (
+            "abilities",
+            "build (ms)",
+            "records (MB)",
+            "table (MB)",
+            "loop (ms)",
+            "query (ms)",
+            "max by skill (ms)",
+        ),
+        [
+            (
+                result["abilities"],
+                f"{result['build'] * 1000:.1f}",
+                f"{result['records MB']:.1f}",
+                f"{result['table MB']:.1f}",
+                f"{result['records'] * 1000:.2f}",
+                f"{result['table'] * 1000:.2f}",
+                f"{result['aggregate'] * 1000:.2f}",
+            )
+        ],
+    )
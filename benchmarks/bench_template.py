@@ -0,0 +1,105 @@
+"""Time rendering every ability page with the compiled templates, against
+joining the same fields line by line the way the pages used to be built.
+
+Run with `python -m benchmarks.bench_template`.
+"""
+
+import sys
+import tracemalloc
+
+from benchmarks.timing import best_of, print_table
+from gorgonwikibot import cdn
+from scripts.create_ability_pages import (ability_chains, chain_template,
+                                          generate_page, infobox_fields,
+                                          infobox_template, maybe_join,
+                                          page_template)
+
+
+def join_infobox(f):
+    s = [
+        "{{Ability infobox",
+        f"| name = {f['name']}",
+        f"| description = {f['description']}",
+        f"| level = {f['level']}",
+        f"| power cost = {f['power_cost']}",
+        f"| reuse time = {f['reuse_time']}",
+        f"| range = {f['range']} meters",
+        f"| skill = {f['skill']}",
+        f"| keywords = {f['keywords']}" if f["keywords"] else "",
+        f"| ragemulti = {f['ragemulti']}" if f["ragemulti"] != "" else "",
+        f"| damage = {f['damage']}" if f["damage"] else "",
+        f"| special = {f['special']}" if f["special"] else "",
+        "}}",
+    ]
+    return maybe_join(s, "\n")
+
+
+def join_page(chain):
+    if len(chain) == 1:
+        infoboxes = join_infobox(chain[0])
+    else:
+        rows = "\n".join("\n".join(["|-", "|", join_infobox(f)]) for f in chain)
+        infoboxes = "\n".join(["{| width=100%", rows, "|}"])
+    return "\n".join(
+        ["__NOTOC__", infoboxes, "<noinclude>[[Category:Abilities]]</noinclude>"]
+    )
+
+
+def template_page(chain):
+    infoboxes = infobox_template.render_all(chain)
+    if len(infoboxes) > 1:
+        infoboxes = [chain_template.render(infoboxes=infoboxes)]
+    return page_template.render(infoboxes=infoboxes[0])
+
+
+def peak(fn):
+    tracemalloc.start()
+    fn()
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size
+
+
+def bench_template(repeat=5):
+    chains = list(ability_chains().values())
+    fields = [[infobox_fields(a) for a in chain] for chain in chains]
+    assert [template_page(c) for c in fields] == [join_page(c) for c in fields]
+    assert [template_page(c) for c in fields] == [generate_page(c) for c in chains]
+
+    def render(page):
+        return lambda: [page(c) for c in fields]
+
+    return {
+        "pages": len(chains),
+        "fields": best_of(lambda: [list(map(infobox_fields, c)) for c in chains]),
+        "join": best_of(render(join_page), repeat),
+        "template": best_of(render(template_page), repeat),
+        "join peak": peak(render(join_page)),
+        "template peak": peak(render(template_page)),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        cdn.configure(version=sys.argv[1], offline=True)
+    result = bench_template()
+    print_table(
+        (
+            "pages",
+            "fields (ms)",
+            "join (ms)",
+            "template (ms)",
+            "join peak (KB)",
+            "template peak (KB)",
+        ),
+        [
+            (
+                result["pages"],
+                f"{result['fields'] * 1000:.1f}",
+                f"{result['join'] * 1000:.2f}",
+                f"{result['template'] * 1000:.2f}",
+                f"{result['join peak'] / 1e3:.0f}",
+                f"{result['template peak'] / 1e3:.0f}",
+            )
+        ],
+    )
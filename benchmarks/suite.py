@@ -0,0 +1,303 @@
+"""Time every stage of the scripts on fixed offline data, and catch regressions.
+
+Stages cover loading data files, building content, generating pages and
+publishing them to a fake wiki. Each one reports its best time of --repeat
+runs, the items it handles per second and its peak memory. In-process caches
+are cleared before every run, so each stage starts from the files on disk.
+
+    python -m benchmarks.suite --output baseline.json
+    (change something)
+    python -m benchmarks.suite --baseline baseline.json
+
+The second run exits with status 1 if a stage got slower or bigger than the
+baseline by more than --tolerance. Stages can be picked by name, e.g.
+`python -m benchmarks.suite "generate_pages" "publish ai profiles"`.
+
+Data is synthetic (see gorgonwikibot.synthetic) unless --cache-dir points at
+downloaded data files. Either way the stages run on a temporary copy, since
+publishing records what it published next to the data.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pywikibot
+from benchmarks.timing import print_table
+from gorgonwikibot import cdn, classify, content, stats, synthetic
+from gorgonwikibot.content import Ability, Ai, Area, Item, Npc, Recipe, Skill
+from gorgonwikibot.fakewiki import FakeWiki
+from gorgonwikibot.quest import Quest, render_quests
+from scripts import (
+    create_ability_pages,
+    create_ai_profiles,
+    create_pet_profiles,
+    create_quest_pages,
+)
+
+classes = [Item, Recipe, Skill, Ability, Ai, Npc, Area, Quest]
+
+# name: (function returning the number of items it handled, files it uses)
+stages = {}
+
+
+def stage(name, files=()):
+    def register(fn):
+        stages[name] = (fn, files)
+        return fn
+
+    return register
+
+
+def clear_caches():
+    """Forget everything loaded or worked out, so that each stage starts cold."""
+    content.clear_caches()
+    for fn in (
+        classify._table,
+        classify._matching,
+        stats._ability_table,
+        stats._ai_table,
+        create_ai_profiles._profiled_abilities,
+    ):
+        fn.cache_clear()
+
+
+@stage("get_file cold")
+def load_json():
+    """Parse every file from json, like right after a download."""
+    return sum(len(cdn.load(file, snapshot=False)) for file in cdn.DATAFILES)
+
+
+@stage("get_file warm")
+def load_snapshots():
+    return sum(len(cdn.get_file(file)) for file in cdn.DATAFILES)
+
+
+def content_stage(cls):
+    @stage(f"get_all_content {cls.__name__}", [cls.datafile])
+    def build():
+        return len(content.get_all_content(cls))
+
+
+for cls in classes:
+    content_stage(cls)
+
+
+@stage("ability_chains", cdn.DATAFILES)
+def ability_chains():
+    return len(create_ability_pages.ability_chains())
+
+
+@stage("generate_pages", cdn.DATAFILES)
+def generate_pages():
+    return len(create_ability_pages.generate_pages())
+
+
+@stage("generate_ai_profiles", cdn.DATAFILES)
+def generate_ai_profiles():
+    return len(create_ai_profiles.generate_ai_profiles())
+
+
+@stage("generate_pet_profiles", cdn.DATAFILES)
+def generate_pet_profiles():
+    return len(create_pet_profiles.generate_pet_profiles())
+
+
+@stage("Quest.wiki_source", cdn.DATAFILES)
+def quest_pages():
+    # the quests create_quest_pages renders
+    quests = [q for q in content.get_all_content(Quest) if q.data.get("FavorNpc")]
+    for quest in quests:
+        quest.wiki_source()
+    return len(quests)
+
+
+@stage("render_quests", cdn.DATAFILES)
+def quest_pages_batch():
+    quests = [q for q in content.get_all_content(Quest) if q.data.get("FavorNpc")]
+    render_quests(quests)
+    return len(quests)
+
+
+def publish_stage(name, main):
+    @stage(f"publish {name}", cdn.DATAFILES)
+    def publish():
+        """Create every page of the script on an empty wiki."""
+        store = os.path.join(cdn.root, "published.sqlite3")
+        if os.path.exists(store):
+            os.remove(store)  # or pages published by the last run are skipped
+        argv = ["suite", "--offline", "--cache-dir", cdn.root, "--jobs", "4"]
+        with FakeWiki() as wiki:
+            wiki.site()
+            main(argv + ["--cdn-version", str(cdn.get_version())])
+        return wiki.stats["saved"]
+
+
+publish_stage("ability pages", create_ability_pages.main)
+publish_stage("ai profiles", create_ai_profiles.main)
+publish_stage("pet profiles", create_pet_profiles.main)
+publish_stage("quest pages", create_quest_pages.main)
+
+
+def setup(files):
+    clear_caches()
+    for file in files:
+        cdn.get_file(file)
+
+
+def measure(fn, files, repeat=3):
+    """Result dict of the best of repeat runs of fn, and of one traced run."""
+    times = []
+    for _ in range(repeat):
+        setup(files)
+        start = time.perf_counter()
+        items = fn()
+        times.append(time.perf_counter() - start)
+
+    # tracing slows everything down, so it gets a run of its own
+    setup(files)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    seconds = min(times)
+    return {
+        "items": items,
+        "seconds": seconds,
+        "per_second": items / seconds if seconds else None,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def run(names, repeat=3):
+    pywikibot.config.put_throttle = 0
+    pywikibot.config.minthrottle = 0
+    # the scripts reconfigure cdn from their arguments; restore it afterwards
+    version, root = cdn.get_version(), cdn.root
+    for file in cdn.DATAFILES:
+        cdn.load(file)  # writes the snapshot get_file loads from
+    results = {}
+    for name in names:
+        fn, files = stages[name]
+        results[name] = measure(fn, files, repeat)
+        cdn.configure(version, offline=True, cache_dir=root)
+    return results
+
+
+# differences smaller than this are noise, however large the fraction
+noise = {"seconds": 0.002, "peak_mb": 0.1}
+
+
+def compare(results, baseline, tolerance=0.25):
+    """List of (stage, measure, baseline value, value) that got worse than
+    the baseline by more than tolerance."""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for key, small in noise.items():
+            if result[key] > max(old[key] * (1 + tolerance), old[key] + small):
+                regressions.append((name, key, old[key], result[key]))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("stages", nargs="*", help="stages to run, by default all")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=0.1,
+        help="size of the synthetic data, where 1 is about the size of the real files",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--cache-dir", help="use the data files cached here instead of synthetic ones"
+    )
+    parser.add_argument("--cdn-version", help="version of the data files to use")
+    parser.add_argument("--output", help="save the results to this json file")
+    parser.add_argument("--baseline", help="compare to results saved with --output")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="fraction a stage may be slower or bigger than the baseline",
+    )
+    options = parser.parse_args(argv[1:])
+    unknown = set(options.stages) - set(stages)
+    if unknown:
+        parser.error(f"unknown stages {sorted(unknown)}, choose from {list(stages)}")
+    names = options.stages or list(stages)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if options.cache_dir:
+            # work on a copy, so that nothing the scripts record lands in the cache
+            cdn.configure(
+                options.cdn_version, offline=True, cache_dir=options.cache_dir
+            )
+            version = cdn.get_version()
+            shutil.copytree(cdn.get_path(version), os.path.join(tmp, f"v{version}"))
+            cdn.configure(version, offline=True, cache_dir=tmp)
+            data = {"cache_dir": options.cache_dir, "cdn_version": version}
+        else:
+            synthetic.install(tmp, options.scale, options.seed)
+            data = {"scale": options.scale, "seed": options.seed}
+        results = run(names, options.repeat)
+
+    baseline = {}
+    if options.baseline:
+        with open(options.baseline) as f:
+            saved = json.load(f)
+        baseline = saved["stages"]
+        if saved["data"] != data:
+            print(f"The baseline was measured on other data: {saved['data']}")
+
+    def from_baseline(name, key, scale=1):
+        return f"{baseline[name][key] * scale:.1f}" if name in baseline else ""
+
+    print_table(
+        ("stage", "items", "ms", "items/s", "peak MB", "baseline ms", "baseline MB"),
+        [
+            (
+                name,
+                r["items"],
+                f"{r['seconds'] * 1000:.1f}",
+                f"{r['per_second']:.0f}" if r["per_second"] else "-",
+                f"{r['peak_mb']:.1f}",
+                from_baseline(name, "seconds", 1000),
+                from_baseline(name, "peak_mb"),
+            )
+            for name, r in results.items()
+        ],
+    )
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(
+                {
+                    "data": data,
+                    "python": platform.python_version(),
+                    "repeat": options.repeat,
+                    "stages": results,
+                },
+                f,
+                indent=2,
+            )
+
+    regressions = compare(results, baseline, options.tolerance)
+    for name, key, old, new in regressions:
+        print(f"Regression in {name}: {key} went from {old:.3g} to {new:.3g}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
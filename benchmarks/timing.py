@@ -0,0 +1,19 @@
+"""Small helpers shared by the benchmark scripts."""
+
+import time
+
+
+def best_of(fn, repeat=5):
+    """Best wall time in seconds of repeat calls to fn."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def print_table(header, rows):
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *rows)]
+    for row in [header, *rows]:
+        print("  ".join(str(x).ljust(w) for x, w in zip(row, widths)))
@@ -0,0 +1,68 @@
+"""Run several scripts in one process, e.g.
+
+    python -m gorgonwikibot run abilities ai pets quests
+
+They log in once, load each data file once and publish through one Publisher,
+instead of paying for all of that in every script. A script that fails is
+reported and the others still run; the run then exits with status 1.
+"""
+
+import argparse
+import importlib
+import sys
+
+import pywikibot
+from gorgonwikibot import entrypoint
+from gorgonwikibot.publish import Publisher
+
+# name on the command line: module with a publish_pages(site, options, publisher)
+scripts = {
+    "abilities": "scripts.create_ability_pages",
+    "ai": "scripts.create_ai_profiles",
+    "pets": "scripts.create_pet_profiles",
+    "quests": "scripts.create_quest_pages",
+}
+
+
+def run_scripts(site, options):
+    names = list(dict.fromkeys(options.scripts))  # in order, without repeats
+    modules = [importlib.import_module(scripts[name]) for name in names]
+    failed = []
+    with Publisher.from_options(site, options) as publisher:
+        for name, module in zip(names, modules):
+            pywikibot.output(f"Publishing {name}...")
+            try:
+                module.publish_pages(site, options, publisher)
+            except Exception as e:
+                pywikibot.error(f"{name} failed: {type(e).__name__}: {e}")
+                failed.append(name)
+    if failed:
+        pywikibot.error(f"Scripts that failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="gorgonwikibot",
+        description="Bot scripts for the Project: Gorgon wiki.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser(
+        "run", help="run scripts in one process, sharing the login and data files"
+    )
+    run.add_argument(
+        "scripts",
+        nargs="+",
+        choices=list(scripts),
+        metavar="script",
+        help=f"scripts to run in this order, out of: {', '.join(scripts)}",
+    )
+    entrypoint.add_arguments(run)
+
+    local_args = pywikibot.handle_args(argv[1:])
+    entrypoint.start(run_scripts, parser.parse_args(local_args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,422 @@
-"""Automatic download of json files, latest version, with local cache."""
+"""Automatic download of json files, latest version, with local cache.
 
+Files are cached gzipped under .cache/v<version>/, each next to a file with its
+checksum that is verified whenever it's loaded.
+"""
+
+import gc
+import gzip
+import hashlib
 import json
+import marshal
 import os
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from functools import lru_cache
 
 import requests
+from gorgonwikibot import metrics
+
+VERSION_URL = "http://client.projectgorgon.com/fileversion.txt"
+VERSION_TTL = 60 * 60  # seconds before asking the server for a new version again
+VERSION_TIMEOUT = 10  # seconds to wait for the server's answer
+
+# every datafile that gorgonwikibot.content knows how to read
+DATAFILES = (
+    "abilities",
+    "ai",
+    "areas",
+    "items",
+    "npcs",
+    "quests",
+    "recipes",
+    "skills",
+)
 
-version = requests.get("http://client.projectgorgon.com/fileversion.txt").text
-path = os.path.abspath(
-    os.path.join(os.path.dirname(os.path.realpath(__file__)), ".cache", "v" + version)
+root = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), ".cache")
 )
 
-os.makedirs(path, exist_ok=True)
+# set by configure(); by default the latest version is looked up on first use
+_pinned_version = None
+_offline = False
 
 
-def _download(file):
-    return requests.get(
-        f"http://cdn.projectgorgon.com/v{version}/data/{file}.json"
-    ).json()
+def configure(version=None, offline=False, cache_dir=None):
+    """Pin the data version, or use the newest local version without going online.
 
+    cache_dir moves the cache, e.g. to a directory of synthetic data files.
+    """
+    global root, _pinned_version, _offline
+    if cache_dir is not None:
+        root = os.path.abspath(cache_dir)
+    _pinned_version = str(version) if version is not None else None
+    _offline = offline
+    clear_caches()
 
-@lru_cache  # files don't change at runtime, so skip repeated I/O
-def get_file(file):
-    filename = os.path.join(path, file + ".json")
+
+def clear_caches():
+    """Forget the version looked up and the files loaded so far, so that they're
+    read again on next use."""
+    get_version.cache_clear()
+    _get_file.cache_clear()
+    _loaded.clear()
+
+
+def cached_versions():
+    """Versions that have a local cache directory, oldest first."""
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (n[1:] for n in names if n[0] == "v" and n[1:].isdigit()),
+        key=int,
+    )
+
+
+def _fetch_version():
+    """Latest version from the server, remembered in the cache for VERSION_TTL."""
+    filename = os.path.join(root, "fileversion.txt")
+    try:
+        if time.time() - os.path.getmtime(filename) < VERSION_TTL:
+            with open(filename) as f:
+                version = f.read().strip()
+            if version.isdigit():
+                return version
+    except FileNotFoundError:
+        pass
+    response = requests.get(VERSION_URL, timeout=VERSION_TIMEOUT)
+    response.raise_for_status()
+    version = response.text.strip()
+    # e.g. the login page of a captive portal
+    if not version.isdigit():
+        raise requests.RequestException(
+            f"{VERSION_URL} isn't a version number: {version[:50]!r}"
+        )
+    os.makedirs(root, exist_ok=True)
+    write_atomic(filename, version.encode())
+    return version
+
+
+@lru_cache
+def get_version():
+    if _pinned_version:
+        return _pinned_version
+    if not _offline:
+        try:
+            return _fetch_version()
+        except requests.RequestException:
+            pass  # fall back to whatever is on disk
+    try:
+        return cached_versions()[-1]
+    except IndexError:
+        raise FileNotFoundError(f"No cached data versions in {root}") from None
+
+
+def get_path(version=None):
+    path = os.path.join(root, "v" + str(version or get_version()))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@lru_cache
+def _session(pool_size=10):
+    """Shared session, so consecutive downloads reuse their connections."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _download(file, session=None, version=None):
+    """Raw gzipped json of a datafile.
+
+    The body is requested gzipped and kept that way, ready to be cached.
+    """
+    version = version or get_version()
+    if _offline:
+        raise FileNotFoundError(f"{file}.json is not cached for v{version}")
+    response = (session or _session()).get(
+        f"http://cdn.projectgorgon.com/v{version}/data/{file}.json",
+        headers={"Accept-Encoding": "gzip"},
+        stream=True,
+    )
+    response.raise_for_status()
+    if response.headers.get("Content-Encoding") == "gzip":
+        return response.raw.read(decode_content=False)
+    return gzip.compress(response.content)
+
+
+def _filename(file, ext=".json.gz", version=None):
+    return os.path.join(get_path(version), file + ext)
+
+
+def write_atomic(filename, data):
+    """Write to a temporary file first, so a killed run can't leave a truncated one."""
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(filename), prefix=os.path.basename(filename) + "."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _read_checksum(file, version=None):
+    """Checksum of a cached datafile, or None if it has none."""
+    try:
+        with open(_filename(file, ".sha256", version), "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    # caches written before each file had its own checksum file
+    try:
+        with open(_filename("manifest", ".json", version), "r") as f:
+            return json.load(f).get(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _checksum(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write(file, compressed, version=None):
+    # one checksum file per datafile, so that processes writing different
+    # datafiles at once can't lose each other's checksums
+    write_atomic(_filename(file, version=version), compressed)
+    write_atomic(_filename(file, ".sha256", version), _checksum(compressed).encode())
+
+
+def store(file, contents, version=None):
+    """Cache contents as if they had been downloaded as this datafile."""
+    _write(file, gzip.compress(json.dumps(contents).encode()), version)
+
+
+def _read(file, version=None):
+    """Cached gzipped json of a datafile, if it matches its checksum.
+
+    Raises FileNotFoundError if it isn't cached and ValueError if it's corrupt.
+    """
+    with open(_filename(file, version=version), "rb") as f:
+        compressed = f.read()
+    if _read_checksum(file, version) != _checksum(compressed):
+        raise ValueError(f"Checksum mismatch for cached {file}")
+    return compressed
+
+
+def prefetch(files=DATAFILES, workers=4):
+    """Download all missing or corrupt datafiles concurrently into the local cache.
+
+    Each file is written to the cache as soon as it arrives.
+    Returns the names of the files that were downloaded.
+    """
+    missing = []
+    for file in files:
+        try:
+            _read(file)
+        except (FileNotFoundError, ValueError):
+            missing.append(file)
+    session = _session(workers)
+
+    def fetch(file):
+        _write(file, _download(file, session))
+        return file
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch, missing))
+
+
+@contextmanager
+def _gc_paused():
+    """Datafiles are big trees of fresh containers without cycles,
+    so collecting while they're built is wasted time."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load_json(file, version=None):
+    """Checksum and parsed contents of a datafile.
+
+    Files that are missing from the cache or fail verification are downloaded again.
+    """
     try:
         # look for file in local cache
-        with open(filename, "r") as f:
-            return json.load(f)
+        compressed = _read(file, version=version)
+        return _checksum(compressed), json.loads(gzip.decompress(compressed))
     except FileNotFoundError:
-        # file not downloaded, so retrieve from server and store locally
-        contents = _download(file)
-        with open(filename, "w") as f:
-            json.dump(contents, f)
-        return contents
+        pass  # file not downloaded
+    except (OSError, EOFError, ValueError, zlib.error):
+        pass  # file is corrupt
+    # retrieve from server and store locally
+    compressed = _download(file, version=version)
+    _write(file, compressed, version)
+    return _checksum(compressed), json.loads(gzip.decompress(compressed))
+
+
+def _load_snapshot(file, version=None):
+    """Load the snapshot of a cached json file, or None if it's missing or stale."""
+    try:
+        with open(_filename(file, ".marshal", version), "rb") as f:
+            checksum, contents = marshal.loads(f.read())
+    except Exception:
+        # missing, truncated or written by an incompatible python
+        return None
+    if checksum != _read_checksum(file, version):
+        return None  # json was replaced after the snapshot was taken
+    return contents
+
+
+def _save_snapshot(file, checksum, contents, version=None):
+    try:
+        write_atomic(
+            _filename(file, ".marshal", version), marshal.dumps((checksum, contents))
+        )
+    except OSError:
+        pass  # the snapshot is only an optimization
+
+
+def checksum(file, version=None):
+    """Checksum of a cached datafile, or None if it isn't cached."""
+    return _read_checksum(file, version)
+
+
+def load(file, version=None, snapshot=True):
+    """Contents of a datafile, parsed from json or from its binary snapshot.
+
+    Unmarshaling is a lot faster than parsing the json, so each cached
+    json file gets a marshal snapshot next to it the first time it's loaded.
+    The snapshot remembers the checksum of the file it was made from.
+    """
+    with _gc_paused():
+        if snapshot:
+            contents = _load_snapshot(file, version)
+            if contents is not None:
+                metrics.cache_event(file, "snapshot")
+                return contents
+        checksum, contents = _load_json(file, version)
+        metrics.cache_event(file, "json")
+    if snapshot:
+        _save_snapshot(file, checksum, contents, version)
+    return contents
+
+
+def _ensure_cached(file, version=None):
+    """Download a datafile unless its cached copy matches its checksum.
+
+    Hashes the file in chunks, so it never has to be in memory at once.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(_filename(file, version=version), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        pass
+    if _read_checksum(file, version) != digest.hexdigest():
+        _write(file, _download(file, version=version), version)
+
+
+def _iter_object(f, chunk_size=1 << 16):
+    """Yield the key, value pairs of a json object from a text stream as they're
+    parsed, without reading the whole stream."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def more():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            more()
+
+    def expect(chars):
+        nonlocal pos
+        skip_whitespace()
+        if pos == len(buf) or buf[pos] not in chars:
+            raise ValueError(f"Expected one of {chars!r} in json stream")
+        pos += 1
+        return buf[pos - 1]
+
+    def decode():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # a number cut off by the end of the buffer parses as a shorter one
+                if eof or end < len(buf) and buf[end] not in "0123456789.eE+-":
+                    pos = end
+                    return value
+            more()  # keeps the buffer from pos, where the value starts
+
+    expect("{")
+    skip_whitespace()
+    if buf[pos : pos + 1] == "}":
+        return
+    while True:
+        key = decode()
+        expect(":")
+        yield key, decode()
+        if expect(",}") == "}":
+            return
+
+
+def iter_file(file, keys=None, version=None):
+    """Yield (id, record) pairs of a datafile without loading all of it at once.
+
+    With keys, records only contain those of the keys that they have.
+    Unlike get_file, nothing is kept in memory between calls.
+    """
+    _ensure_cached(file, version)
+    with gzip.open(_filename(file, version=version), "rt", encoding="utf-8") as f:
+        for id, record in _iter_object(f):
+            if keys is not None:
+                record = {k: record[k] for k in keys if k in record}
+            yield id, record
+
+
+def get_file(file, snapshot=True):
+    """Contents of a datafile in the current version. See load()."""
+    metrics.cache_event(file, "hit" if (file, snapshot) in _loaded else "miss")
+    return _get_file(file, snapshot)
+
+
+@lru_cache  # files don't change at runtime, so skip repeated I/O
+def _get_file(file, snapshot):
+    with metrics.stage("load"):
+        contents = load(file, snapshot=snapshot)
+    _loaded.add((file, snapshot))
+    return contents
+
+
+_loaded = set()  # (file, snapshot) arguments of get_file that are in memory
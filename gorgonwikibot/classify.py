@@ -0,0 +1,116 @@
+"""Which kind of ability every ability is, worked out once per data version.
+
+The table is cached on disk next to the data files, and scripts can use the
+lookup sets from matching() instead of classifying abilities themselves.
+"""
+
+import json
+import os
+from enum import IntFlag
+from functools import lru_cache
+
+from gorgonwikibot import cdn
+from gorgonwikibot.content import Ability
+
+
+class Category(IntFlag):
+    PLAYER = 1
+    PET = 2
+    PLAYER_MINIGOLEM = 4
+    ENEMY = 8
+    DESCRIBED = 16  # has a non-empty Description
+
+
+# everything classification looks at
+keys = (
+    "InternalName",
+    "Description",
+    "Keywords",
+    "AttributesThatDeltaPowerCost",
+    "AttributesThatModPowerCost",
+)
+
+
+def classify(a):
+    """Category bitmask and pet command (0 if it isn't one) of an Ability."""
+    mask = Category(0)
+    for flag, test in (
+        (Category.PLAYER, a.is_player),
+        (Category.PET, a.is_pet),
+        (Category.PLAYER_MINIGOLEM, a.is_player_minigolem),
+        (Category.ENEMY, a.is_enemy),
+        (Category.DESCRIBED, a.data.get("Description")),
+    ):
+        if test:
+            mask |= flag
+    try:
+        command = a.which_pet_command.value
+    except ValueError:
+        command = 0
+    return int(mask), command
+
+
+def get_table():
+    """Dict of ability InternalName: (Category bitmask, pet command value or 0)."""
+    return _table(cdn.get_version())
+
+
+@lru_cache  # keyed by version, so that cdn.configure() is respected
+def _table(version):
+    filename = os.path.join(cdn.get_path(version), "classification.json")
+    checksum = cdn.checksum(Ability.datafile, version)
+    try:
+        with open(filename, "r") as f:
+            cached = json.load(f)
+        if checksum and cached["checksum"] == checksum:
+            return {iname: tuple(v) for iname, v in cached["abilities"].items()}
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    table = {}
+    for id, data in cdn.iter_file(Ability.datafile, keys, version):
+        a = Ability(id, data)
+        table[a.iname] = classify(a)
+    cdn.write_atomic(
+        filename,
+        json.dumps(
+            {"checksum": cdn.checksum(Ability.datafile, version), "abilities": table}
+        ).encode(),
+    )
+    return table
+
+
+def matching(any_of=0, all_of=0, none_of=0):
+    """Frozenset of InternalNames of abilities with any of the categories in
+    any_of, all of the categories in all_of and none of those in none_of."""
+    return _matching(cdn.get_version(), int(any_of), int(all_of), int(none_of))
+
+
+@lru_cache
+def _matching(version, any_of, all_of, none_of):
+    return frozenset(
+        iname
+        for iname, (mask, _) in _table(version).items()
+        if (not any_of or mask & any_of)
+        and mask & all_of == all_of
+        and not mask & none_of
+    )
+
+
+def pet_command(iname):
+    """The Ability.PetCommands member for an ability.
+
+    Raises ValueError if it isn't a pet command, like Ability.which_pet_command.
+    """
+    command = get_table()[iname][1]
+    if not command:
+        raise ValueError(f"{iname} is not a pet command")
+    return Ability.PetCommands(command)
+
+
+def pet_abilities():
+    return matching(Category.PET)
+
+
+def enemy_abilities(described=False):
+    return matching(Category.ENEMY, Category.DESCRIBED if described else 0)
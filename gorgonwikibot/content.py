@@ -1,10 +1,36 @@
 import re
 from functools import lru_cache
 
-from gorgonwikibot import cdn
+from gorgonwikibot import cdn, deps
+
+
+class cached_slot:
+    """Like functools.cached_property, for classes with __slots__.
+
+    The value is computed once per object and stored in the slot
+    named after the property with a leading underscore.
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.slot = "_" + fn.__name__
+        self.__doc__ = fn.__doc__
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            value = self.fn(obj)
+            setattr(obj, self.slot, value)
+            return value
 
 
 class Content:
+    # there are tens of thousands of these, so keep them small
+    __slots__ = ("id", "data", "errors", "notices")
+
     def __init__(self, id, data):
         self.id = id
         self.data = data
@@ -25,6 +51,7 @@ class Content:
 
 
 class Item(Content):
+    __slots__ = ()
     datafile = "items"
 
     def __init__(self, id, data):
@@ -36,6 +63,7 @@ class Item(Content):
 
 
 class Recipe(Content):
+    __slots__ = ()
     datafile = "recipes"
 
     def __init__(self, id, data):
@@ -43,6 +71,7 @@ class Recipe(Content):
 
 
 class Skill(Content):
+    __slots__ = ("_name",)
     datafile = "skills"
 
     def __init__(self, id, data):
@@ -62,6 +91,7 @@ class Skill(Content):
 class Ability(Content):
     from enum import Enum
 
+    __slots__ = ("_is_player", "_is_pet", "_is_player_minigolem", "_is_enemy")
     datafile = "abilities"
     PetCommands = Enum("Command", "BASIC SIC TRICK")
 
@@ -76,14 +106,14 @@ class Ability(Content):
         else:
             return f"[[{self.name}]]"
 
-    @property
+    @cached_slot
     def is_player(self):
         return any(
             s in self.data
             for s in ("AttributesThatDeltaPowerCost", "AttributesThatModPowerCost")
         )
 
-    @property
+    @cached_slot
     def is_pet(self):
         return (
             "Pet" in self.iname
@@ -104,7 +134,7 @@ class Ability(Content):
                 return Ability.PetCommands.TRICK
         raise ValueError(f"{self.name} is not a pet command")
 
-    @property
+    @cached_slot
     def is_player_minigolem(self):
         return (
             "Minigolem" in self.iname
@@ -117,12 +147,13 @@ class Ability(Content):
             )  # SecurityGolem
         )
 
-    @property
+    @cached_slot
     def is_enemy(self):
         return not any([self.is_player, self.is_pet, self.is_player_minigolem])
 
 
 class Ai(Content):
+    __slots__ = ("_is_pet", "_is_player_minigolem", "_is_enemy")
     datafile = "ai"
 
     def __init__(self, id, data):
@@ -136,15 +167,15 @@ class Ai(Content):
     def iname(self):
         return self.id
 
-    @property
+    @cached_slot
     def is_pet(self):
         return "_Pet" in self.iname
 
-    @property
+    @cached_slot
     def is_player_minigolem(self):
         return "Minigolem" in self.iname and "Enemy" not in self.iname
 
-    @property
+    @cached_slot
     def is_enemy(self):
         return not any([self.is_pet, self.is_player_minigolem])
 
@@ -165,6 +196,7 @@ class Ai(Content):
 
 
 class Npc(Content):
+    __slots__ = ("ref",)
     datafile = "npcs"
 
     def __init__(self, id, data):
@@ -175,6 +207,7 @@ class Npc(Content):
 class Area(Content):
     """Allows to alias an area if the wiki uses a different name than the data files"""
 
+    __slots__ = ("_name",)
     datafile = "areas"
 
     def __init__(self, id, data):
@@ -203,23 +236,103 @@ def separate_words(name):
     return re.sub(r"(.)([A-Z])", r"\1 \2", name)
 
 
-@lru_cache
 def get_all_content(cls):
-    return [cls(id, data) for id, data in cdn.get_file(cls.datafile).items()]
+    return _get_all_content(cls, cdn.get_version())
 
 
-@lru_cache
-def get_content_by_id(cls, id):
+@lru_cache  # keyed by version, so that cdn.configure() is respected
+def _get_all_content(cls, version):
+    with deps.recording():  # don't attribute lookups made by constructors to a page
+        return [cls(id, data) for id, data in cdn.get_file(cls.datafile).items()]
+
+
+@lru_cache  # keyed by version, like _get_all_content
+def _get_content_by_id(cls, id, version):
     data = cdn.get_file(cls.datafile)
-    return cls(id, data[id])
+    with deps.recording():  # like in get_all_content
+        return cls(id, data[id])
+
+
+def get_content_by_id(cls, id):
+    content = _get_content_by_id(cls, id, cdn.get_version())
+    deps.record(content)
+    return content
+
+
+@lru_cache  # keyed by version, like _get_all_content
+def _index(cls, matchkey, version):
+    """Map each value of matchkey to the first id that has it, plus any collisions.
+
+    Built once per (datafile, key) on first use, so lookups don't scan the file.
+    """
+    index, collisions = {}, {}
+    for k, v in cdn.get_file(cls.datafile).items():
+        try:
+            matchval = v[matchkey]
+            if matchval in index:
+                collisions.setdefault(matchval, [index[matchval]]).append(k)
+            else:
+                index[matchval] = k
+        except (KeyError, TypeError):
+            pass  # record doesn't have the key, or its value isn't hashable
+    return index, collisions
+
+
+def get_index_collisions(cls, matchkey):
+    """Values of matchkey shared by several records, mapped to all of their ids.
+
+    get_content_by_match returns the first of these, like a scan of the file would.
+    """
+    return _index(cls, matchkey, cdn.get_version())[1]
+
+
+@lru_cache  # keyed by version, like _get_all_content
+def _get_content_by_match(cls, matchkey, matchval, version):
+    try:
+        id = _index(cls, matchkey, version)[0][matchval]
+    except KeyError:
+        return None
+    with deps.recording():  # like in get_all_content
+        return cls(id, cdn.get_file(cls.datafile)[id])
 
 
-@lru_cache
 def get_content_by_match(cls, matchkey, matchval):
-    data = cdn.get_file(cls.datafile)
-    for k, v in data.items():
-        if v[matchkey] == matchval:
-            return cls(k, v)
+    content = _get_content_by_match(cls, matchkey, matchval, cdn.get_version())
+    if content is not None:
+        deps.record(content)
+    return content
+
+
+def clear_caches():
+    """Forget the content built so far, and the data files it was built from."""
+    cdn.clear_caches()
+    for fn in (_get_all_content, _get_content_by_id, _index, _get_content_by_match):
+        fn.cache_clear()
+
+
+def resolve(refs):
+    """Look up many (cls, matchkey, matchval) at once, without going through
+    the lookup caches, which only keep the most recent lookups.
+
+    matchkey None looks up matchval by id. Returns a dict of ref: content,
+    without the refs that have no content. Nothing is recorded in deps.
+    """
+    by_lookup = {}  # (cls, matchkey): matchvals
+    for cls, matchkey, matchval in refs:
+        by_lookup.setdefault((cls, matchkey), set()).add(matchval)
+
+    resolved = {}
+    with deps.recording():  # lookups made by constructors, like in get_all_content
+        for (cls, matchkey), matchvals in by_lookup.items():
+            data = cdn.get_file(cls.datafile)
+            index = None
+            if matchkey is not None:
+                index = _index(cls, matchkey, cdn.get_version())[0]
+            for matchval in matchvals:
+                id = matchval if index is None else index.get(matchval)
+                if id in data:
+                    resolved[cls, matchkey, matchval] = cls(id, data[id])
+    return resolved
 
 
 def get_content_by_iname(cls, iname):
@@ -0,0 +1,142 @@
+"""Records which content each generated page read, so that pages can be
+regenerated only when their data changes.
+
+Lookups through gorgonwikibot.content are recorded automatically
+while a page is being generated inside page(title).
+"""
+
+import json
+import os
+from contextlib import contextmanager
+
+from gorgonwikibot import cdn
+from gorgonwikibot.diff import diff_versions
+
+_recorders = []  # sets of (datafile, id) being filled, innermost last
+_graph = None  # graph that page() adds to, set by tracking()
+
+
+def record(content):
+    """Note that the page being generated reads this content."""
+    if _recorders:
+        _recorders[-1].add((content.datafile, content.id))
+
+
+def record_reads(reads):
+    """Like record(), for (datafile, id) pairs collected by recording(),
+    for example in another process."""
+    if _recorders:
+        _recorders[-1].update(reads)
+
+
+@contextmanager
+def recording():
+    """Collect the (datafile, id) of all content read inside the block."""
+    reads = set()
+    _recorders.append(reads)
+    try:
+        yield reads
+    finally:
+        _recorders.pop()
+
+
+@contextmanager
+def tracking(graph):
+    """Add the dependencies of all pages generated inside the block to graph."""
+    global _graph
+    previous, _graph = _graph, graph
+    try:
+        yield graph
+    finally:
+        _graph = previous
+
+
+@contextmanager
+def page(title):
+    """Attribute all content read inside the block to the page with this title."""
+    with recording() as reads:
+        yield
+    if _graph is not None:
+        _graph.add(title, reads)
+
+
+class DependencyGraph:
+    """Page titles and the content records each of them was generated from."""
+
+    def __init__(self, name, pages=None):
+        self.name = name
+        self.pages = pages or {}  # title: set of (datafile, id)
+
+    def add(self, title, reads):
+        self.pages.setdefault(title, set()).update(reads)
+
+    def dirty(self, changed):
+        """Titles of pages that read any of the changed (datafile, id) records."""
+        return {
+            title
+            for title, reads in self.pages.items()
+            if not reads.isdisjoint(changed)
+        }
+
+    @staticmethod
+    def filename(name, version=None):
+        return os.path.join(cdn.get_path(version), name + ".deps.json")
+
+    def save(self, version=None):
+        pages = {title: sorted(reads) for title, reads in sorted(self.pages.items())}
+        cdn.write_atomic(self.filename(self.name, version), json.dumps(pages).encode())
+
+    @classmethod
+    def load(cls, name, version=None):
+        """Graph saved for a version, or None if there isn't one."""
+        try:
+            with open(cls.filename(name, version), "r") as f:
+                pages = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(
+            name, {title: set(map(tuple, reads)) for title, reads in pages.items()}
+        )
+
+
+class Updates:
+    """Decides which pages need regenerating since an earlier data version.
+
+    A page needs it when the previous run's graph doesn't know it,
+    or when it read a record that changed since then.
+    """
+
+    def __init__(self, name, since_version=None):
+        self.previous = None
+        self.changed = None
+        if since_version is not None:
+            self.previous = DependencyGraph.load(name, since_version)
+            if self.previous is not None:
+                # only the datafiles that pages read from can make them change
+                files = sorted(
+                    {
+                        file
+                        for reads in self.previous.pages.values()
+                        for file, _ in reads
+                    }
+                )
+                self.changed = diff_versions(
+                    since_version, cdn.get_version(), files
+                ).changed_records()
+
+    def __contains__(self, title):
+        if self.changed is None:
+            return True  # nothing to compare with, so update everything
+        reads = self.previous.pages.get(title)
+        return reads is None or not reads.isdisjoint(self.changed)
+
+    def filter(self, pages, graph):
+        """Keep pages that may have changed, judging by both the old and new graph."""
+        if self.changed is None:
+            return pages
+        dirty = graph.dirty(self.changed)
+        return {
+            title: text
+            for title, text in pages.items()
+            if title in dirty or title in self
+        }
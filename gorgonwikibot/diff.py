@@ -0,0 +1,104 @@
+"""Record-level differences between two cached versions of the data files.
+
+Run as `python -m gorgonwikibot.diff OLD NEW` for a summary of what changed.
+"""
+
+import sys
+
+from gorgonwikibot import cdn
+
+
+class FileChanges:
+    """Ids added to, removed from and modified in one datafile."""
+
+    def __init__(self, file, added=(), removed=(), modified=None):
+        self.file = file
+        self.added = sorted(added)
+        self.removed = sorted(removed)
+        self.modified = modified or {}  # id: sorted list of changed keys
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def __repr__(self):
+        return (
+            f"<FileChanges {self.file}: {len(self.added)} added, "
+            f"{len(self.removed)} removed, {len(self.modified)} modified>"
+        )
+
+    @property
+    def ids(self):
+        return set(self.added) | set(self.removed) | set(self.modified)
+
+
+class Changeset:
+    """Everything that changed between two versions, by datafile."""
+
+    def __init__(self, old_version, new_version, files):
+        self.old_version = old_version
+        self.new_version = new_version
+        self.files = files  # datafile name: FileChanges
+
+    def __bool__(self):
+        return any(self.files.values())
+
+    def __getitem__(self, file):
+        return self.files[file]
+
+    def changed_records(self):
+        """Set of (datafile, id) for every added, removed or modified record."""
+        return {
+            (file, id) for file, changes in self.files.items() for id in changes.ids
+        }
+
+    def summary(self):
+        lines = [f"v{self.old_version} -> v{self.new_version}"]
+        for file, changes in self.files.items():
+            if changes:
+                lines.append(
+                    f"{file}: {len(changes.added)} added, "
+                    f"{len(changes.removed)} removed, "
+                    f"{len(changes.modified)} modified"
+                )
+        return "\n".join(lines)
+
+
+def changed_keys(old, new):
+    """Sorted keys whose values differ between two records, including added and
+    removed keys."""
+    return sorted(k for k in old.keys() | new.keys() if old.get(k) != new.get(k))
+
+
+def diff_file(file, old_version, new_version):
+    old_checksum = cdn.checksum(file, old_version)
+    if old_checksum and old_checksum == cdn.checksum(file, new_version):
+        return FileChanges(file)  # identical files, no need to parse them
+
+    old = cdn.load(file, old_version)
+    new = cdn.load(file, new_version)
+    # dict comparison happens in C, so only look closer at records that differ
+    modified = {
+        id: changed_keys(old[id], new[id])
+        for id in old.keys() & new.keys()
+        if old[id] != new[id]
+    }
+    return FileChanges(file, new.keys() - old.keys(), old.keys() - new.keys(), modified)
+
+
+def diff_versions(old_version, new_version, files=cdn.DATAFILES):
+    """Compare two versions of the data files record by record.
+
+    Files missing from the local cache are downloaded unless cdn is offline.
+    """
+    old_version, new_version = str(old_version), str(new_version)
+    return Changeset(
+        old_version,
+        new_version,
+        {file: diff_file(file, old_version, new_version) for file in files},
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python -m gorgonwikibot.diff OLD NEW [FILE ...]")
+    print(diff_versions(*sys.argv[1:3], sys.argv[3:] or cdn.DATAFILES).summary())
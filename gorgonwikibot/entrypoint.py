@@ -1,18 +1,29 @@
 import argparse
 
 import pywikibot
+from gorgonwikibot import cdn, metrics
 
 
-def entrypoint(main):
-    parser = argparse.ArgumentParser(
-        description="Entrypoint for scripts dealing with the Project: Gorgon wiki."
-    )
+def add_arguments(parser):
+    """Add the options that all scripts share to an argparse parser."""
     parser.add_argument(
         "--dry",
         action="store_true",
         help="dry-run mode prints page source instead of modifying the wiki",
     )
     parser.add_argument("--msg", help="custom edit message for the wiki")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of pages to save concurrently, within the wiki's edit throttle",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes to generate pages with",
+    )
     parser.add_argument(
         "--quest", help='run the script only for a specific quest (by "Name")'
     )
@@ -22,22 +33,85 @@ def entrypoint(main):
         default=0,
         help="skip the first n quests in the data file",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the last quest run where it stopped, instead of starting over",
+    )
+    parser.add_argument(
+        "--cdn-version",
+        help="use this version of the data files instead of the latest one",
+    )
+    parser.add_argument(
+        "--verify-revisions",
+        action="store_true",
+        help="check that pages the bot published before weren't edited since"
+        " before skipping them as unchanged",
+    )
+    parser.add_argument(
+        "--since-version",
+        help="only update pages whose data changed since this version of the data files",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="use the newest locally cached data files without checking the server",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory of cached data files to use instead of gorgonwikibot/.cache",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="save stage times, page latencies and counters to this json file,"
+        " and show pages per second while running",
+    )
+
+
+def entrypoint(main):
+    parser = argparse.ArgumentParser(
+        description="Entrypoint for scripts dealing with the Project: Gorgon wiki."
+    )
+    add_arguments(parser)
 
     def wrapper(argv):
         local_args = pywikibot.handle_args(argv[1:])
-        options = parser.parse_args(local_args)
+        start(main, parser.parse_args(local_args))
+
+    return wrapper
+
 
+def start(main, options):
+    """Use the data files that options ask for, and run main(site, options)
+    after logging in, collecting metrics with --metrics."""
+    cdn.configure(options.cdn_version, options.offline, options.cache_dir)
+
+    if not options.metrics:
+        run(main, options)
+        return
+    with metrics.collecting(metrics.Metrics(output=pywikibot.output)) as m:
+        try:
+            with metrics.stage("run"):
+                run(main, options)
+        finally:
+            m.write(options.metrics)
+            pywikibot.output(
+                f"Done: {m.progress()}. Metrics saved to {options.metrics}"
+            )
+
+
+def run(main, options):
+    with metrics.stage("login"):
         site = pywikibot.Site()
         site.login()
-        user = site.user()
-        if user:
-            pywikibot.output(f"Logged in on {site} as {user}.")
-        else:
-            pywikibot.output(f"Not logged in on {site}.")
+    user = site.user()
+    if user:
+        pywikibot.output(f"Logged in on {site} as {user}.")
+    else:
+        pywikibot.output(f"Not logged in on {site}.")
 
-        if options.dry:
-            pywikibot.output("Dry-run mode, not creating pages...\n")
+    if options.dry:
+        pywikibot.output("Dry-run mode, not creating pages...\n")
 
-        main(site, options)
-
-    return wrapper
+    main(site, options)
@@ -0,0 +1,588 @@
+"""A local stand-in for the MediaWiki API, to run and time the scripts' fetch,
+compare and save loop without the real wiki.
+
+It answers the requests pywikibot makes for that: site and user info, tokens,
+login, page info and text, and edits. Every client is logged in as `user`.
+Latency, edit rate limits and maxlag errors can be simulated:
+
+    python -m gorgonwikibot.fakewiki --latency 0.05 --maxlag-every 20 \\
+        scripts/create_ai_profiles.py --offline --jobs 4
+
+starts a fake wiki, runs the script against it and prints the time it took
+and the requests it made. pywikibot's edit throttle is off unless
+--put-throttle is given.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import runpy
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pywikibot
+
+rights = ["read", "edit", "createpage", "bot", "writeapi", "apihighlimits"]
+
+# the modules pywikibot uses, by group, with their parameter prefix
+modules = {
+    "action": {
+        "query": "",
+        "edit": "",
+        "login": "lg",
+        "logout": "",
+        "paraminfo": "",
+    },
+    "prop": {"info": "in", "revisions": "rv", "templates": "tl", "categoryinfo": "ci"},
+    "list": {},
+    "meta": {"siteinfo": "si", "userinfo": "ui", "tokens": ""},
+}
+token_types = ["csrf", "login", "patrol", "rollback", "userrights", "watch"]
+
+
+def now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def normalize(title):
+    title = title.replace("_", " ").strip()
+    return title[:1].upper() + title[1:]
+
+
+class Error(Exception):
+    """API error response."""
+
+    def __init__(self, code, info, **extra):
+        super().__init__(info)
+        self.data = {"code": code, "info": info, **extra}
+
+
+class FakeWiki:
+    """MediaWiki API at http://127.0.0.1:<port>/w/api.php, in a background thread.
+
+    latency: seconds every request takes, plus edit_latency for edits
+    rate_limit: (edits, seconds) allowed before edits fail with "ratelimited"
+    maxlag_every: every nth request that sends maxlag fails with "maxlag",
+        reporting a database lag of `lag` seconds
+    pages: dict of title: text the wiki starts with
+    """
+
+    def __init__(
+        self,
+        port=0,
+        latency=0,
+        edit_latency=0,
+        rate_limit=None,
+        maxlag_every=0,
+        lag=0.1,
+        pages=None,
+        user="FakeBot",
+    ):
+        self.latency = latency
+        self.edit_latency = edit_latency
+        self.rate_limit = rate_limit
+        self.maxlag_every = maxlag_every
+        self.lag = lag
+        self.user = user
+        self.pages = {}  # title: list of revisions, newest last
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._revids = itertools.count(1)
+        self._pageids = itertools.count(1)
+        self._edit_times = deque()
+        self._maxlag_requests = itertools.count(1)
+        for title, text in (pages or {}).items():
+            self._edit(normalize(title), text, "import")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%i/w/api.php" % self._server.server_address[1]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def text(self, title):
+        """Current text of a page, or None if it doesn't exist."""
+        revisions = self.pages.get(normalize(title))
+        return revisions[-1]["text"] if revisions else None
+
+    def site(self):
+        """A pywikibot Site for this wiki, logged in as its user.
+
+        It also becomes the default pywikibot.Site(), so scripts run against it.
+        """
+        name = "fakewiki%i" % self._server.server_address[1]
+        config = pywikibot.config
+        config.family_files[name] = self.url
+        config.family, config.mylang = name, name
+        config.usernames[name][name] = self.user
+        site = pywikibot.Site(name, name, user=self.user)
+        site.login()
+        return site
+
+    def _handler(self):
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.respond(parse_qs(urlparse(self.path).query))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode()
+                params = parse_qs(urlparse(self.path).query)
+                params.update(parse_qs(body, keep_blank_values=True))
+                self.respond(params)
+
+            def respond(self, params):
+                params = {k: v[-1] for k, v in params.items()}
+                headers = {}
+                try:
+                    result = wiki.handle(params)
+                except Error as e:
+                    result = {"error": e.data}
+                    if e.data["code"] == "maxlag":
+                        headers["X-Database-Lag"] = str(e.data["lag"])
+                        if e.data["lag"] >= 1:
+                            headers["Retry-After"] = str(math.ceil(e.data["lag"]))
+                body = json.dumps(result).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep the output of the scripts readable
+
+        return Handler
+
+    def handle(self, params):
+        """API result for a request, or raises Error."""
+        action = params.get("action", "query")
+        # requests come in on several threads, so count them under the lock
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[action] += 1
+        time.sleep(self.latency + (self.edit_latency if action == "edit" else 0))
+
+        if self.maxlag_every and "maxlag" in params:
+            with self._lock:
+                lagged = next(self._maxlag_requests) % self.maxlag_every == 0
+                if lagged:
+                    self.stats["maxlag"] += 1
+            if lagged:
+                raise Error(
+                    "maxlag",
+                    f"Waiting for 127.0.0.1: {self.lag} seconds lagged",
+                    host="127.0.0.1",
+                    lag=self.lag,
+                    type="db",
+                )
+
+        if action == "paraminfo":
+            return {"paraminfo": {"modules": self.paraminfo(params["modules"])}}
+        elif action == "query":
+            return self.query(params)
+        elif action == "edit":
+            return {"edit": self.edit(params)}
+        elif action == "login":
+            return {
+                "login": {"result": "Success", "lguserid": 1, "lgusername": self.user}
+            }
+        elif action == "logout":
+            return {}
+        raise Error("badvalue", f'Unrecognized value for parameter "action": {action}')
+
+    def paraminfo(self, paths):
+        """Module descriptions, with the parameters pywikibot looks at."""
+
+        def choice(name, choices, submodules=None):
+            param = {"name": name, "type": sorted(choices), "multi": True}
+            param.update(limit=50, highlimit=500, lowlimit=50)
+            if submodules is not None:
+                param["submodules"] = submodules
+            return param
+
+        result = []
+        for path in paths.split("|"):
+            name = path.rsplit("+", 1)[-1]
+            group = next(
+                (g for g, names in modules.items() if name in names),
+                "main" if path == "main" else None,
+            )
+            if group is None or ("+" in path) != (group in ("prop", "list", "meta")):
+                result.append({"name": name, "path": path, "missing": True})
+                continue
+            module = {
+                "name": name,
+                "classname": "Api" + name.capitalize(),
+                "path": path,
+                "group": group,
+                "prefix": modules[group][name] if group != "main" else "",
+                "source": "MediaWiki",
+                "parameters": [],
+            }
+            if path == "main":
+                module["parameters"] = [
+                    choice(
+                        "action", modules["action"], {a: a for a in modules["action"]}
+                    ),
+                    {"name": "format", "type": ["json"]},
+                    {"name": "maxlag", "type": "integer"},
+                ]
+            elif path == "query":
+                module["parameters"] = [
+                    choice(g, modules[g], {m: f"query+{m}" for m in modules[g]})
+                    for g in ("prop", "list", "meta")
+                ]
+                module["parameters"].append(choice("generator", ["templates"], {}))
+                module["parameters"].append(choice("titles", []))
+            elif path == "query+info":
+                module["parameters"] = [choice("prop", ["protection", "url"])]
+            elif path == "query+revisions":
+                props = [
+                    "content",
+                    "ids",
+                    "timestamp",
+                    "user",
+                    "comment",
+                    "sha1",
+                    "size",
+                ]
+                module["parameters"] = [
+                    choice("prop", props),
+                    choice("slots", ["main"]),
+                ]
+            elif path == "query+tokens":
+                module["parameters"] = [choice("type", token_types)]
+            elif path in ("edit", "login"):
+                module["mustbeposted"] = True
+            if path == "edit":
+                module["writerights"] = True
+            result.append(module)
+        return result
+
+    def query(self, params):
+        query = {}
+        meta = set(filter(None, params.get("meta", "").split("|")))
+        if "siteinfo" in meta:
+            query.update(self.siteinfo())
+        if "userinfo" in meta:
+            query["userinfo"] = {
+                "id": 1,
+                "name": self.user,
+                "groups": ["*", "user", "bot"],
+                "rights": rights,
+                "messages": False,
+                "ratelimits": self.ratelimits(),
+            }
+        if "tokens" in meta:
+            types = params.get("type", "csrf").split("|")
+            query["tokens"] = {f"{t}token": "fake+\\" for t in types}
+        if params.get("generator") == "templates":
+            # pages aren't parsed, so they transclude nothing
+            return {"batchcomplete": True}
+        if "titles" in params:
+            query.update(self.page_query(params))
+        return {"batchcomplete": True, "query": query}
+
+    def ratelimits(self):
+        if not self.rate_limit:
+            return {}
+        hits, seconds = self.rate_limit
+        return {"edit": {"user": {"hits": hits, "seconds": seconds}}}
+
+    def siteinfo(self):
+        return {
+            "general": {
+                "mainpage": "Main Page",
+                "base": self.url.replace("api.php", "index.php"),
+                "sitename": "Fake Wiki",
+                "generator": "MediaWiki 1.39.0",
+                "phpversion": "8.1.0",
+                "case": "first-letter",
+                "lang": "en",
+                "fallback8bitEncoding": "windows-1252",
+                "writeapi": True,
+                "timezone": "UTC",
+                "timeoffset": 0,
+                "articlepath": "/wiki/$1",
+                "scriptpath": "/w",
+                "script": "/w/index.php",
+                "server": "http://127.0.0.1:%i" % self._server.server_address[1],
+                "servername": "127.0.0.1",
+                "wikiid": "fakewiki",
+                "time": now(),
+                "maxarticlesize": 2097152,
+                "legaltitlechars": " %!\"$&'()*,\\-.\\/0-9:;=?@A-Z\\\\^_`a-z~\\x80-\\xFF+",
+                "invalidusernamechars": "@:",
+                "thumblimits": {"0": 120, "1": 150, "2": 180},
+                "imagelimits": {"0": {"width": 320, "height": 240}},
+                "magiclinks": {"ISBN": False, "PMID": False, "RFC": False},
+            },
+            "namespaces": {
+                str(id): {
+                    "id": id,
+                    "case": "first-letter",
+                    "name": name,
+                    "canonical": name,
+                    "content": id == 0,
+                    "subpages": id % 2 == 1,
+                    "nonincludable": False,
+                }
+                for id, name in [
+                    (-2, "Media"),
+                    (-1, "Special"),
+                    (0, ""),
+                    (1, "Talk"),
+                    (2, "User"),
+                    (3, "User talk"),
+                    (4, "Project"),
+                    (5, "Project talk"),
+                    (6, "File"),
+                    (7, "File talk"),
+                    (8, "MediaWiki"),
+                    (9, "MediaWiki talk"),
+                    (10, "Template"),
+                    (11, "Template talk"),
+                    (12, "Help"),
+                    (13, "Help talk"),
+                    (14, "Category"),
+                    (15, "Category talk"),
+                ]
+            },
+            "namespacealiases": [],
+            "extensions": [],
+            "restrictions": {
+                "types": ["create", "edit", "move", "upload"],
+                "levels": ["", "autoconfirmed", "sysop"],
+                "cascadinglevels": ["sysop"],
+                "semiprotectedlevels": ["autoconfirmed"],
+            },
+            "interwikimap": [],
+        }
+
+    def page_query(self, params):
+        props = set(params.get("prop", "").split("|"))
+        content = "revisions" in props and "content" in params.get("rvprop", "")
+        # pywikibot asks for formatversion 1 unless told otherwise
+        v2 = params.get("formatversion") == "2"
+        content_key = "content" if v2 else "*"
+        pages, normalized = [], []
+        with self._lock:
+            for title in params["titles"].split("|"):
+                name = normalize(title)
+                if name != title:
+                    normalized.append({"from": title, "to": name})
+                revisions = self.pages.get(name)
+                if not revisions:
+                    pages.append({"ns": 0, "title": name, "missing": True})
+                    continue
+                latest = revisions[-1]
+                page = {
+                    "pageid": latest["pageid"],
+                    "ns": 0,
+                    "title": name,
+                    "contentmodel": "wikitext",
+                    "pagelanguage": "en",
+                    "pagelanguagehtmlcode": "en",
+                    "pagelanguagedir": "ltr",
+                    "touched": latest["timestamp"],
+                    "lastrevid": latest["revid"],
+                    "length": len(latest["text"].encode()),
+                }
+                if "revisions" in props:
+                    revision = {
+                        "revid": latest["revid"],
+                        "parentid": latest["parentid"],
+                        "user": latest["user"],
+                        "timestamp": latest["timestamp"],
+                        "comment": latest["comment"],
+                        "sha1": "",
+                        "size": page["length"],
+                    }
+                    if content:
+                        revision["slots"] = {
+                            "main": {
+                                "contentmodel": "wikitext",
+                                "contentformat": "text/x-wiki",
+                                content_key: latest["text"],
+                            }
+                        }
+                    page["revisions"] = [revision]
+                pages.append(page)
+        if not v2:
+            missing = itertools.count(-1, -1)
+            pages = {str(p.get("pageid") or next(missing)): p for p in pages}
+        query = {"pages": pages}
+        if normalized:
+            query["normalized"] = normalized
+        return query
+
+    def edit(self, params):
+        title = normalize(params["title"])
+        if self.rate_limit:
+            hits, seconds = self.rate_limit
+            with self._lock:
+                start = time.monotonic()
+                while self._edit_times and start - self._edit_times[0] > seconds:
+                    self._edit_times.popleft()
+                if len(self._edit_times) >= hits:
+                    self.stats["ratelimited"] += 1
+                    raise Error(
+                        "ratelimited",
+                        "As an anti-abuse measure, you are limited from performing "
+                        "this action too many times in a short space of time.",
+                    )
+                self._edit_times.append(start)
+
+        text = params.get("text", "")
+        with self._lock:
+            revisions = self.pages.get(title)
+            if revisions and revisions[-1]["text"] == text:
+                self.stats["nochange"] += 1
+                latest = revisions[-1]
+                return {
+                    "result": "Success",
+                    "pageid": latest["pageid"],
+                    "title": title,
+                    "contentmodel": "wikitext",
+                    "nochange": True,
+                }
+            old = revisions[-1]["revid"] if revisions else 0
+            revision = self._edit(title, text, params.get("summary", ""))
+            self.stats["saved"] += 1
+        return {
+            "result": "Success",
+            "pageid": revision["pageid"],
+            "title": title,
+            "contentmodel": "wikitext",
+            "oldrevid": old,
+            "newrevid": revision["revid"],
+            "newtimestamp": revision["timestamp"],
+            **({} if old else {"new": True}),
+        }
+
+    def _edit(self, title, text, comment):
+        revisions = self.pages.setdefault(title, [])
+        revision = {
+            "pageid": revisions[0]["pageid"] if revisions else next(self._pageids),
+            "revid": next(self._revids),
+            "parentid": revisions[-1]["revid"] if revisions else 0,
+            "user": self.user,
+            "timestamp": now(),
+            "comment": comment,
+            "text": text,
+        }
+        revisions.append(revision)
+        return revision
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a fake wiki, and optionally a script against it."
+    )
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds every request takes"
+    )
+    parser.add_argument(
+        "--edit-latency", type=float, default=0, help="extra seconds edits take"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        nargs=2,
+        type=float,
+        metavar=("EDITS", "SECONDS"),
+        help="allow this many edits per this many seconds",
+    )
+    parser.add_argument(
+        "--maxlag-every",
+        type=int,
+        default=0,
+        help="fail every nth request with maxlag",
+    )
+    parser.add_argument(
+        "--lag", type=float, default=0.1, help="database lag maxlag errors report"
+    )
+    parser.add_argument(
+        "--put-throttle",
+        type=float,
+        default=0,
+        help="pywikibot's seconds between edits (its default is 10)",
+    )
+    parser.add_argument(
+        "--min-throttle",
+        type=float,
+        default=0,
+        help="pywikibot's minimum seconds between requests (its default is 0.1)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="run the script this many times, e.g. 2 to time a run with nothing to save",
+    )
+    parser.add_argument("script", nargs="?", help="script to run against the wiki")
+    parser.add_argument(
+        "args", nargs=argparse.REMAINDER, help="arguments of the script"
+    )
+    options = parser.parse_args()
+
+    pywikibot.config.put_throttle = options.put_throttle
+    pywikibot.config.minthrottle = options.min_throttle
+    wiki = FakeWiki(
+        port=options.port,
+        latency=options.latency,
+        edit_latency=options.edit_latency,
+        rate_limit=options.rate_limit,
+        maxlag_every=options.maxlag_every,
+        lag=options.lag,
+    )
+    if not options.script:
+        print(f"Serving a fake wiki at {wiki.url}")
+        wiki._server.serve_forever()
+        return
+
+    with wiki.start():
+        wiki.site()
+        for run in range(options.repeat):
+            sys.argv = [options.script, *options.args]
+            before = Counter(wiki.stats)
+            start = time.perf_counter()
+            runpy.run_path(options.script, run_name="__main__")
+            elapsed = time.perf_counter() - start
+            stats = wiki.stats - before
+            print(
+                f"Run {run + 1}: {elapsed:.2f} s, "
+                + ", ".join(f"{k} {v}" for k, v in sorted(stats.items()))
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Where a run spends its time: stage wall times, per-page latencies and counters.
+
+Nothing is recorded unless a Metrics is being collected into, which
+entrypoint does for scripts run with --metrics out.json:
+
+    with metrics.collecting(Metrics()) as m:
+        with metrics.stage("generate"):
+            ...
+        metrics.count("saved")
+    m.write("out.json")
+
+Stages add up every time they're entered. They can overlap: loading data
+happens inside generating it, and saves run on threads while pages are
+being compared. parallel.Pool workers don't record anything themselves, but
+the time of each page they generate is recorded as a "generate" latency.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+_current = None  # Metrics being collected into, set by collecting()
+
+# upper bounds in seconds of the latency histogram buckets
+buckets = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10)
+
+# what can happen to a page; "dry" is a changed page that a dry run printed
+page_outcomes = ("saved", "unchanged", "failed", "review", "dry")
+
+
+class Metrics:
+    """Stage times, latencies, counters and data file cache use of one run.
+
+    Safe to record into from several threads.
+    """
+
+    def __init__(self, progress_every=5, output=print):
+        self.stages = Counter()  # name: seconds
+        self.latencies = {}  # name: list of seconds
+        self.counters = Counter()
+        self.cache = {}  # datafile: Counter of hit, miss, snapshot and json
+        self.expected = None  # number of pages the run will go through
+        self.progress_every = progress_every  # seconds between progress lines
+        self.output = output  # function that shows the progress line
+        self._start = time.perf_counter()
+        self._last_progress = self._start
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] += seconds
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def cache_event(self, file, event):
+        with self._lock:
+            self.cache.setdefault(file, Counter())[event] += 1
+
+    def done(self):
+        """Number of pages that were saved, skipped, failed, put up for review
+        or printed by a dry run so far."""
+        return sum(self.counters[k] for k in page_outcomes)
+
+    def progress(self):
+        """Line with the pages done, pages per second and, if the number of
+        pages is known, the time left."""
+        done = self.done()
+        elapsed = time.perf_counter() - self._start
+        rate = done / elapsed if elapsed else 0
+        line = f"{done} pages"
+        if self.expected:
+            line = f"{done}/{self.expected} pages"
+        line += f", {rate:.1f} pages/s"
+        if self.expected and rate:
+            left = max(self.expected - done, 0) / rate
+            line += ", ETA %i:%02i" % divmod(round(left), 60)
+        return line
+
+    def maybe_show_progress(self):
+        now = time.perf_counter()
+        with self._lock:
+            if now - self._last_progress < self.progress_every:
+                return
+            self._last_progress = now
+        self.output(f"Progress: {self.progress()}")
+
+    def report(self):
+        """Everything recorded, as a dict that can be saved as json."""
+        with self._lock:
+            return {
+                "elapsed": time.perf_counter() - self._start,
+                "stages": dict(self.stages),
+                "latencies": {
+                    name: summarize(values) for name, values in self.latencies.items()
+                },
+                "counters": dict(self.counters),
+                "cache": {file: dict(c) for file, c in sorted(self.cache.items())},
+            }
+
+    def write(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of values sorted in ascending order."""
+    return sorted_values[max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)]
+
+
+def summarize(values):
+    """Count, mean, percentiles and histogram of latencies in seconds.
+
+    The histogram maps each bucket's upper bound to the number of values in
+    it, with "inf" for those above the last bound.
+    """
+    values = sorted(values)
+    histogram = Counter()
+    for v in values:
+        histogram[next((str(b) for b in buckets if v <= b), "inf")] += 1
+    return {
+        "count": len(values),
+        "total": math.fsum(values),
+        "mean": math.fsum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+        "histogram": {
+            bound: histogram[bound]
+            for bound in [*map(str, buckets), "inf"]
+            if bound in histogram
+        },
+    }
+
+
+@contextmanager
+def collecting(metrics):
+    """Record everything measured inside the block into metrics."""
+    global _current
+    previous, _current = _current, metrics
+    try:
+        yield metrics
+    finally:
+        _current = previous
+
+
+@contextmanager
+def stage(name):
+    """Add the wall time of the block to a stage."""
+    if _current is None:
+        yield
+        return
+    metrics, start = _current, time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def timed(name):
+    """Add the wall time of the block to the latencies of name, e.g. per page."""
+    if _current is None:
+        yield
+        return
+    metrics, start = _current, time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - start)
+
+
+def observe(name, seconds):
+    if _current is not None:
+        _current.observe(name, seconds)
+
+
+def count(name, n=1):
+    if _current is not None:
+        _current.count(name, n)
+
+
+def cache_event(file, event):
+    if _current is not None:
+        _current.cache_event(file, event)
+
+
+def expect(pages):
+    """Add to the number of pages the run goes through, for the time left."""
+    if _current is not None:
+        _current.expected = (_current.expected or 0) + pages
+
+
+def page_done(outcome):
+    """Count a page as one of page_outcomes, and show the progress line when
+    it's due."""
+    if _current is not None:
+        _current.count(outcome)
+        _current.maybe_show_progress()
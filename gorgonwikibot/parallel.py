@@ -0,0 +1,85 @@
+"""Generate pages on a pool of processes.
+
+Page text only depends on the cached data files, so it can be generated in any
+process. Workers use the parent's data version and load each data file once.
+They are spawned rather than forked: by the time a pool starts, the publishing
+threads are running, and a forked copy of a lock one of them holds would never
+be released.
+They send back the content each page read and the time it took along with its
+text, so dependency tracking and metrics work like in a serial run.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from gorgonwikibot import cdn, deps, metrics
+
+
+def _init(root, version, files):
+    # the parent already downloaded this version, so don't ask the server again
+    cdn.configure(version, offline=True, cache_dir=root)
+    for file in files:
+        cdn.get_file(file)
+
+
+def _call(fn, item):
+    start = time.perf_counter()
+    with deps.recording() as reads:
+        result = fn(item)
+    return result, reads, time.perf_counter() - start
+
+
+def _record(calls):
+    """(result, reads) of each call, after noting how long it took."""
+    results = []
+    for result, reads, seconds in calls:
+        metrics.observe("generate", seconds)
+        results.append((result, reads))
+    return results
+
+
+class Pool:
+    """Calls a function on many items, on `workers` processes.
+
+    With one worker, everything runs in this process without a pool.
+    files are data files that workers load as soon as they start.
+    """
+
+    def __init__(self, workers=1, files=()):
+        self.workers = workers
+        self._executor = None
+        if workers > 1:
+            self._executor = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init,
+                initargs=(cdn.root, cdn.get_version(), tuple(files)),
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def map(self, fn, items):
+        """List of (fn(item), set of the (datafile, id) fn read) for each item,
+        in the order of items.
+
+        fn must be a module-level function, and items must be picklable.
+        Pass the reads to deps.record_reads() inside deps.page().
+        """
+        items = list(items)
+        if self._executor is None:
+            return _record(_call(fn, item) for item in items)
+        # a few chunks per worker keeps them busy without too much pickling
+        chunksize = max(1, len(items) // (4 * self.workers))
+        return _record(
+            self._executor.map(partial(_call, fn), items, chunksize=chunksize)
+        )
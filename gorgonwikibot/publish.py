@@ -0,0 +1,329 @@
+"""Comparing generated pages with the wiki and saving them.
+
+Scripts hand their pages to a Publisher, which is built from the helpers below.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pywikibot
+from gorgonwikibot import metrics
+from gorgonwikibot.store import PublishedStore
+from pywikibot.data import api
+
+# errors on saving that may go away when trying again
+transient_errors = (
+    pywikibot.exceptions.ServerError,
+    pywikibot.exceptions.MaxlagTimeoutError,
+)
+
+
+def preload(site, titles, groupsize=50):
+    """Fetch the current text of many pages with one API request per batch.
+
+    Returns a dict of title: pywikibot.Page whose text and existence are
+    already loaded, so reading them doesn't make further requests.
+    """
+    pages = {title: pywikibot.Page(site, title) for title in titles}
+    with metrics.stage("fetch"), metrics.timed("fetch batch"):
+        # preloadpages fills in the Page objects it was given
+        for _ in site.preloadpages(list(pages.values()), groupsize=groupsize):
+            pass
+    return pages
+
+
+def batched(iterable, n):
+    """Split iterable into lists of at most n items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def latest_revisions(site, titles, groupsize=50):
+    """Latest revision id of each existing page, fetched in batches without text."""
+    revids = {}
+    for batch in batched(titles, groupsize):
+        normalized = {pywikibot.Page(site, title).title(): title for title in batch}
+        for pagedata in api.PropertyGenerator(
+            "info", site=site, parameters={"titles": list(normalized)}
+        ):
+            if "lastrevid" in pagedata:
+                revids[normalized[pagedata["title"]]] = pagedata["lastrevid"]
+    return revids
+
+
+def skip_published(site, store, pages, verify=False):
+    """Split off pages whose text is what the bot last published to the wiki.
+
+    pages is a dict of title: text. With verify, those pages are only skipped
+    if nobody edited them since, judging by their latest revision ids.
+    Returns the pages that still need comparing and the titles of skipped ones.
+    """
+    with metrics.stage("compare"):
+        unchanged = store.unchanged(site, pages)
+        if verify and unchanged:
+            stored = store.get(site, unchanged)
+            revids = latest_revisions(site, unchanged)
+            unchanged = {t for t in unchanged if revids.get(t) == stored[t][1]}
+    return {t: text for t, text in pages.items() if t not in unchanged}, unchanged
+
+
+class SaveQueue:
+    """Saves pages on worker threads, so the caller can go on generating and
+    comparing pages while edits are in flight.
+
+    Edits still go through pywikibot's shared put throttle and maxlag handling,
+    so more jobs don't mean edits faster than the wiki allows, only that slow
+    requests overlap. At most `maxsize` saves are queued at a time.
+    Saved pages are recorded in `store`, and what happened to each page in
+    `journal`, if given.
+    """
+
+    def __init__(self, jobs=1, maxsize=None, store=None, journal=None, retries=0):
+        self.store = store  # PublishedStore to record saved pages in
+        self.journal = journal  # Journal to record saved, failed and skipped pages in
+        self.retries = retries  # times to try again after a transient error
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+        self._slots = threading.BoundedSemaphore(maxsize or 2 * jobs)
+        self._lock = threading.Lock()
+        self._pending = set()  # futures of queued saves
+        self.saved, self.skipped, self.failed = [], [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def put(self, page, summary, journal=None, title=None):
+        """Queue a page to be saved, waiting while the queue is full.
+        journal replaces the queue's journal for this page. The page is
+        recorded under title, which defaults to page.title(); pass the title
+        the page was generated under, so that later lookups find it."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._save, page, summary, journal, title)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def skip(self, title, journal=None):
+        journal = journal or self.journal
+        with self._lock:
+            self.skipped.append(title)
+        if journal:
+            journal.put(title, "unchanged")
+        metrics.page_done("unchanged")
+
+    def wait(self):
+        """Wait for the saves queued so far, without closing the queue."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+
+    def _save(self, page, summary, journal=None, title=None):
+        journal = journal or self.journal
+        title = title or page.title()
+        try:
+            try:
+                with metrics.stage("save"), metrics.timed("save"):
+                    self._save_with_retries(page, summary)
+                if self.store:
+                    self.store.put(page.site, title, page.text, page.latest_revision_id)
+            # nobody reads the future of a save, so any error is reported here
+            except Exception as e:
+                pywikibot.error(f"Failed to save {title}: {e}")
+                outcome, detail, done = "failed", str(e), self.failed
+            else:
+                outcome, detail, done = "saved", None, self.saved
+            with self._lock:
+                done.append(title)
+            metrics.page_done(outcome)
+            if journal:
+                journal.put(title, outcome, detail)
+        except Exception as e:
+            pywikibot.error(f"Failed to record the outcome for {title}: {e}")
+        finally:
+            self._slots.release()
+
+    def _save_with_retries(self, page, summary):
+        for attempt in range(self.retries + 1):
+            try:
+                page.save(summary=summary)
+                return
+            except transient_errors as e:
+                if attempt == self.retries:
+                    raise
+                pywikibot.warning(f"Saving {page.title()} failed, trying again: {e}")
+                metrics.count("retries")
+                time.sleep(pywikibot.config.retry_wait)
+
+    def close(self):
+        """Wait for all queued saves and report how they went."""
+        self._executor.shutdown(wait=True)
+        pywikibot.output(self.summary())
+
+    def summary(self):
+        text = (
+            f"{len(self.saved)} saved, {len(self.skipped)} skipped, "
+            f"{len(self.failed)} failed"
+        )
+        if self.failed:
+            text += "\nFailed pages:\n" + "\n".join(f"* {t}" for t in self.failed)
+        return text
+
+
+class Publisher:
+    """Compares generated pages with the wiki and saves the changed ones.
+
+    publish() takes (title, text, summary) tuples, usually from a generator.
+    While the caller generates the next batch of pages, a thread fetches
+    the previous batch from the wiki and compares it. SaveQueue threads save
+    the changed pages. The queues between these stages are bounded, so
+    none of them runs far ahead.
+
+    Pages whose text is what the bot last published are skipped without
+    fetching them, see skip_published(). With dry, changed pages are
+    printed instead of saved. Transient errors on saving are retried.
+
+    One Publisher can publish the pages of several scripts in turn, so they
+    share its connection to the wiki and its save queue.
+    """
+
+    def __init__(
+        self,
+        site,
+        jobs=1,
+        dry=False,
+        verify=False,
+        journal=None,
+        batch_size=50,
+        retries=2,
+    ):
+        self.site = site
+        self.dry = dry
+        self.verify = verify  # check revision ids before skipping published pages
+        self.batch_size = batch_size
+        self.store = PublishedStore()
+        self.queue = SaveQueue(jobs, store=self.store, journal=journal, retries=retries)
+        self._batches = queue.Queue(maxsize=2)  # generated, waiting to be fetched
+        self._error = None  # raised by the fetching thread
+        self._stopped = False
+
+    @classmethod
+    def from_options(cls, site, options, **kwargs):
+        """Publisher with the --jobs, --dry and --verify-revisions of a script."""
+        return cls(
+            site,
+            jobs=options.jobs,
+            dry=options.dry,
+            verify=options.verify_revisions,
+            **kwargs,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Wait for the queued saves and report how they went."""
+        try:
+            self.queue.close()
+        finally:
+            self.store.close()
+
+    def wait(self):
+        """Wait for the saves queued so far, e.g. before closing a journal."""
+        self.queue.wait()
+
+    def publish(self, pages, journal=None):
+        """Compare each (title, text, summary) with the wiki, and save it if
+        its text changed. Returns once every page is compared, while the
+        last saves may still be in flight until wait() or close().
+        journal replaces the Publisher's journal for these pages."""
+        # forget how an earlier publish() stopped, if it did
+        self._stopped = False
+        self._error = None
+        while True:
+            try:
+                self._batches.get_nowait()
+            except queue.Empty:
+                break
+        fetcher = threading.Thread(target=self._fetch_batches, daemon=True)
+        fetcher.start()
+        try:
+            for batch in batched(pages, self.batch_size):
+                self._put((batch, journal))
+            self._put(None)
+        except BaseException:
+            self._stopped = True
+            raise
+        finally:
+            fetcher.join()
+        if self._error is not None:
+            raise self._error
+
+    def _put(self, batch):
+        # wait for room in the queue, unless the fetching thread stopped
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._batches.put(batch, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _fetch_batches(self):
+        while not self._stopped:
+            try:
+                batch = self._batches.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if batch is None:
+                return
+            try:
+                self._compare(*batch)
+            except BaseException as e:
+                self._error = e
+                return
+
+    def _compare(self, batch, journal=None):
+        texts = {title: text for title, text, _ in batch}
+        summaries = {title: summary for title, _, summary in batch}
+        texts, published = skip_published(self.site, self.store, texts, self.verify)
+        for title in published:
+            self.queue.skip(title, journal)
+
+        wiki = preload(self.site, texts)
+        for title, text in texts.items():
+            page = wiki[title]
+            if page.text == text:
+                pywikibot.output(f"No changes to {title}")
+                # an empty page that doesn't exist has no revision to remember
+                revid = page.latest_revision_id if page.exists() else None
+                self.store.put(self.site, title, text, revid)
+                self.queue.skip(title, journal)
+                continue
+            page.text = text
+            if self.dry:
+                pywikibot.output(f"\n{title}\n{text}\n")
+                metrics.page_done("dry")
+            else:
+                self.queue.put(page, summaries[title], journal, title)
@@ -1,9 +1,37 @@
+from functools import lru_cache
+
+from gorgonwikibot import deps, questgraph
 from gorgonwikibot.content import (Ability, Area, Content, Item, Npc, Recipe,
                                    Skill, get_content_by_id,
-                                   get_content_by_match, separate_words)
+                                   get_content_by_match, resolve,
+                                   separate_words)
+from gorgonwikibot.template import Template
+
+page_template = Template(
+    "__NOTOC__\n"
+    "$description\n\n"
+    "$[reuse_time:$reuse_time\n\n$]"
+    "===Prerequisites===\n"
+    "To start this quest, talk to '''$npc_link''' in $area_prefix'''$area_link'''. "
+    "$requirements\n\n"
+    "$[preface:$preface\n\n$]"
+    "$[midway:$midway\n\n$]"
+    "$[midway_items:$midway_items\n\n$]"
+    "===Requirements===\n"
+    "$[objectives:* $objectives\n$]"
+    "\n===Rewards===\n"
+    "{{Spoiler|Rewards|\n"
+    "$[success:$success\n$]"
+    "$[rewards:* $rewards\n$]"
+    "}}\n\n"
+    "[[Category:Quests]]"
+    "[[Category:Quests/$area_name Quests]]"
+    "[[Category:Quests/$npc_name]]\n"
+)
 
 
 class Quest(Content):
+    __slots__ = ("npc",)
     datafile = "quests"
 
     def __init__(self, id, data):
@@ -33,7 +61,8 @@ class Quest(Content):
         else:
             self.npc = None
 
-    def requirements_text(self):
+    def requirements_text(self, lookup=None):
+        lookup = lookup or _lookup
         events = {
             "LiveEvent_Crafting": "a Crafting Caravan event",
             "Event_Christmas": "Christmas",
@@ -67,13 +96,15 @@ class Quest(Content):
                 elif reqtype == "MinSkillLevel":
                     reqs.append(
                         "This quest is available at %s level %s."
-                        % (get_content_by_id(Skill, req["Skill"]).link, req["Level"])
+                        % (lookup(Skill, None, req["Skill"]).link, req["Level"])
                     )
 
-                elif reqtype in ("QuestCompleted", "GuildQuestCompleted"):
+                elif reqtype in questgraph.completed:
+                    graph = questgraph.get_graph()
+                    deps.record_reads([("quests", graph.ids[req["Quest"]])])
                     reqs.append(
                         "You must have previously completed %s in order to undertake this quest."
-                        % get_content_by_match(Quest, "InternalName", req["Quest"]).link
+                        % graph.link(req["Quest"])
                     )
 
                 elif reqtype == "HasEffectKeyword" and "Keyword" in req:
@@ -102,214 +133,362 @@ class Quest(Content):
 
         return " ".join(helper(requirements))
 
-    def wiki_source(self):
-        currencies = {"WardenPoints": "Warden Points", "Gold": "councils"}
-        source = {}
-        objectives = []
-        rewards = []
-
-        def reuse_time(num, timespan):
-            return "This quest can be repeated after %i %s%s." % (
-                num,
-                timespan,
-                "" if num == 1 else "s",
-            )
+    def references(self):
+        """(cls, matchkey, matchval) of the content the quest page links to,
+        with matchkey None for lookups by id. See content.resolve()."""
+        if self.npc is not None:
+            yield Area, None, self.npc.data["AreaName"]
+        for key, handler in _plan(tuple(self.data)):
+            if handler is not None and handler.references is not None:
+                yield from handler.references(self.data[key])
+
+    def wiki_source(self, lookup=None):
+        """The quest page. lookup(cls, matchkey, matchval) finds the content it
+        links to, see render_quests()."""
+        lookup = lookup or _lookup
+        # the quest itself and its npc don't go through a content lookup here
+        deps.record(self)
+        deps.record(self.npc)
+
+        page = QuestPage(self, lookup)
+        for key, handler in _plan(tuple(self.data)):
+            if handler is None:
+                self.errors.append(f"Unhandled key: {key}")
+            else:
+                handler(page, self.data[key])
+        source = page.source
 
-        def bullet_list(items):
-            return "".join(map(lambda s: f"* {s}\n", items))
-
-        def linebreak_source(key, suffix="\n\n"):
-            return source[key] + suffix if key in source else ""
-
-        for k, v in self.data.items():
-
-            if k in ("InternalName", "IsCancellable", "Name", "Version"):
-                pass  # Tech stuff
-            elif k in ("FavorNpc", "DisplayedLocation"):
-                pass  # NPC is handled above
-            elif k == "TSysLevel":
-                pass  # Not sure what that is. I don't think we should display it.
-            elif k == "GroupingName":
-                pass  # Tech value to group quests so you can only have one of the group. Like casino daily.
-            elif k in (
-                "IsGuildQuest",
-                "NumExpectedParticipants",
-                "IsAutoWrapUp",
-                "IsAutoPreface",
-                "ReuseTime_Minutes",
-            ):
-                pass  # Guild quest stuff
-            elif k == "Keywords":
-                pass  # This might be interesting, but only used for guild quests atm?
-            elif k == "RequirementsToSustain":
-                pass  # Probably used to auto-cancel quests after events like halloween
-            elif k in ("PreGiveItems", "PreGiveRecipes", "PreGiveEffects"):
-                pass
-
-            elif k == "Description":
-                source[k] = f"==Summary==\n{v.strip()}"
-
-            elif k == "MidwayText":
-                if v:  # Fiery Secrets has empty MidwayText
-                    source[k] = f"===Midway===\n{v.strip()}"
-
-            elif k == "MidwayGiveItems":
-                source[k] = "[%s]" % " ".join(
-                    "You receive %s."
-                    % get_content_by_match(Item, "InternalName", item["Item"]).link
-                    for item in v
-                )
+        source["Requirements"] = " ".join(
+            (source.get("PrerequisiteFavorLevel", ""), source.get("Requirements", ""))
+        ).strip()
 
-            elif k == "ReuseTime_Days":
-                source["ReuseTime"] = reuse_time(v, "day")
+        area = lookup(Area, None, self.npc.data["AreaName"])
+        areaname = area.name
+        arealink = area.link
+        areaprefix = area.prefix
+        if "DisplayedLocation" in self.data:
+            # Some areas have a good display location, some don't. Overwrite when we know it is nice.
+            if self.data["DisplayedLocation"] == "Sacred Grotto":
+                areaname = self.data["DisplayedLocation"]
+                arealink = f"[[{areaname}]]"
+                areaprefix = "the "
 
-            elif k == "ReuseTime_Hours":
-                source["ReuseTime"] = reuse_time(v, "hour")
+        return page_template.render(
+            description=source["Description"],
+            reuse_time=source.get("ReuseTime"),
+            npc_link=self.npc.link,
+            area_prefix=areaprefix,
+            area_link=arealink,
+            requirements=source["Requirements"],
+            preface=source.get("PrefaceText"),
+            midway=source.get("MidwayText"),
+            midway_items=source.get("MidwayGiveItems"),
+            objectives=page.objectives,
+            success=source.get("SuccessText"),
+            rewards=page.rewards,
+            area_name=areaname,
+            npc_name=self.npc.name,
+        )
 
-            elif k == "Requirements":
-                source[k] = self.requirements_text()
 
-            elif k == "PrerequisiteFavorLevel":
-                # Only the Fiery Secrets quests have this
-                # keep line lengths short
-                text = "This quest is available at {{Favor|%s}} favor."
-                source[k] = text % separate_words(v)
+def _lookup(cls, matchkey, matchval):
+    """Content lookup for a quest rendered on its own."""
+    if matchkey is None:
+        return get_content_by_id(cls, matchval)
+    return get_content_by_match(cls, matchkey, matchval)
 
-            elif k == "PrefaceText":
-                source[k] = f"===Preface===\n{v.strip()}"
 
-            elif k == "Objectives":
-                for obj in self.data["Objectives"]:
-                    desc = obj["Description"]
+def render_quests(quests):
+    """wiki_source() of many quests, after looking up all the content they link
+    to at once.
 
-                    if obj["Type"] == "Collect" and "ItemName" in obj:
-                        item = get_content_by_match(
-                            Item, "InternalName", obj["ItemName"]
-                        )
-                        desc = desc.replace(item.name, item.link)
+    Returns a list of (source, exception, reads) per quest. exception is None
+    if rendering worked, and source is None if it didn't. Like with
+    parallel.Pool, pass the reads to deps.record_reads() inside deps.page().
+    """
+    resolved = resolve(_references(quests))
 
-                    try:
-                        n = obj["Number"]
-                    except KeyError:
-                        pass
-                    else:
-                        if n > 1 and desc.find(str(n)) == -1:
-                            desc += f" x{n}"
+    def lookup(cls, matchkey, matchval):
+        try:
+            content = resolved[cls, matchkey, matchval]
+        except KeyError:  # content that doesn't exist fails like a lookup would
+            return _lookup(cls, matchkey, matchval)
+        deps.record(content)
+        return content
 
-                    objectives.append(desc)
+    results = []
+    for quest in quests:
+        with deps.recording() as reads:
+            try:
+                results.append((quest.wiki_source(lookup), None, reads))
+            except Exception as e:
+                results.append((None, e, reads))
+    return results
+
+
+def _references(quests):
+    for quest in quests:
+        try:
+            yield from quest.references()
+        except Exception:
+            pass  # the quest fails to render too, and records why then
+
+
+class QuestPage:
+    """The parts of a quest page that key handlers fill in."""
+
+    __slots__ = ("quest", "lookup", "source", "objectives", "rewards")
+
+    def __init__(self, quest, lookup):
+        self.quest = quest
+        self.lookup = lookup
+        self.source = {}  # sections of the page by key
+        self.objectives = []
+        self.rewards = []
+
+
+# quest keys that the page doesn't show
+ignored_keys = frozenset(
+    (
+        # Tech stuff
+        "InternalName",
+        "IsCancellable",
+        "Name",
+        "Version",
+        # NPC is handled in Quest
+        "FavorNpc",
+        "DisplayedLocation",
+        # Not sure what that is. I don't think we should display it.
+        "TSysLevel",
+        # Tech value to group quests so you can only have one of the group. Like casino daily.
+        "GroupingName",
+        # Guild quest stuff
+        "IsGuildQuest",
+        "NumExpectedParticipants",
+        "IsAutoWrapUp",
+        "IsAutoPreface",
+        "ReuseTime_Minutes",
+        # This might be interesting, but only used for guild quests atm?
+        "Keywords",
+        # Probably used to auto-cancel quests after events like halloween
+        "RequirementsToSustain",
+        "PreGiveItems",
+        "PreGiveRecipes",
+        "PreGiveEffects",
+    )
+)
 
-            elif k == "SuccessText":
-                source[k] = "{{Quote|%s}}" % v
+# quest key: handler(page, value) that adds the key's value to the page
+key_handlers = {}
 
-            elif k in ("Reward_Favor", "Rewards_Favor"):
-                rewards.append(f"{v} [[Favor]]")
 
-            elif k == "Reward_Gold":
-                rewards.append(f"{v} councils")
+def handles(*keys, references=None):
+    """Register the decorated function as the handler of these quest keys.
 
-            elif k == "Rewards_Currency":
-                for curr, amt in v.items():
-                    try:
-                        rewards.append(f"{amt} {currencies[curr]}")
-                    except KeyError as e:
-                        self.errors.append(f"Unknown reward currency: {e}")
-
-            elif k == "Rewards_Items":
-                for item in v:
-                    reward = get_content_by_match(
-                        Item, "InternalName", item["Item"]
-                    ).link
-                    if item["StackSize"] > 1:
-                        reward += f" x{item['StackSize']}"
-                    rewards.append(reward)
-
-            elif k == "Rewards_XP":
-                for name, xp in v.items():
-                    rewards.append(
-                        "%i XP in %s" % (xp, get_content_by_id(Skill, name).link)
-                    )
+    references(value) yields the (cls, matchkey, matchval) that the handler
+    looks up for a value, so that render_quests() can look them up at once.
+    """
 
-            elif k == "Rewards_Ability":
-                rewards.append(
-                    "Ability: %s"
-                    % get_content_by_match(Ability, "InternalName", v).link
-                )
+    def register(handler):
+        handler.references = references
+        for key in keys:
+            key_handlers[key] = handler
+        return handler
 
-            elif k == "Rewards":
-                for reward in v:
-                    if reward["T"] in ("SkillXP", "SkillXp"):  # Inconsistent uppercase
-                        rewards.append(
-                            "%i XP in %s"
-                            % (
-                                reward["Xp"],
-                                get_content_by_id(Skill, reward["Skill"]).link,
-                            )
-                        )
-                    elif reward["T"] == "CombatXp":
-                        rewards.append(f"{reward['Xp']} XP in active combat skills")
-                    elif reward["T"] == "Recipe":
-                        rewards.append(
-                            "Recipe: %s"
-                            % get_content_by_match(
-                                Recipe, "InternalName", reward["Recipe"]
-                            ).link
-                        )
-                    elif reward["T"] == "GuildXp":
-                        rewards.append(f"{reward['Xp']} Guild XP")
-                    elif reward["T"] == "GuildCredits":
-                        rewards.append(f"{reward['Credits']} Guild Credits")
-                    else:
-                        self.errors.append(f"Unexpected reward type: {reward['T']}")
-
-            elif k == "Rewards_Effects":
-                self.notices.append(
-                    f"Special reward effects must be handled manually: {v}"
-                )
+    return register
 
-            elif k == "Rewards_NamedLootProfile":
-                rewards.append("random items")  # Special loot table for rewards
 
-            else:
-                self.errors.append(f"Unhandled key: {k}")
+@lru_cache(maxsize=None)  # there are only a few dozen orders of keys
+def _plan(keys):
+    """(key, handler) for each of a quest's keys that the page shows, with
+    handler None for unknown keys. Worked out once per order of keys, not once
+    per quest."""
+    return tuple(
+        (key, key_handlers.get(key)) for key in keys if key not in ignored_keys
+    )
 
-        source["Requirements"] = " ".join(
-            (source.get("PrerequisiteFavorLevel", ""), source.get("Requirements", ""))
-        ).strip()
 
-        area = get_content_by_id(Area, self.npc.data["AreaName"])
-        areaname = area.name
-        arealink = area.link
-        areaprefix = area.prefix
-        if "DisplayedLocation" in self.data:
-            # Some areas have a good display location, some don't. Overwrite when we know it is nice.
-            if self.data["DisplayedLocation"] == "Sacred Grotto":
-                areaname = self.data["DisplayedLocation"]
-                arealink = f"[[{areaname}]]"
-                areaprefix = "the "
+def _items(value):
+    return ((Item, "InternalName", item["Item"]) for item in value)
+
+
+@handles("Description")
+def _description(page, value):
+    page.source["Description"] = f"==Summary==\n{value.strip()}"
+
+
+@handles("MidwayText")
+def _midway_text(page, value):
+    if value:  # Fiery Secrets has empty MidwayText
+        page.source["MidwayText"] = f"===Midway===\n{value.strip()}"
+
+
+@handles("MidwayGiveItems", references=_items)
+def _midway_give_items(page, value):
+    page.source["MidwayGiveItems"] = "[%s]" % " ".join(
+        "You receive %s." % page.lookup(Item, "InternalName", item["Item"]).link
+        for item in value
+    )
 
-        return "".join(
-            (
-                "__NOTOC__\n",
-                source["Description"],
-                "\n\n",
-                linebreak_source("ReuseTime"),
-                "===Prerequisites===\n",
-                "To start this quest, talk to '''%s''' in %s'''%s'''. "
-                % (self.npc.link, areaprefix, arealink),
-                linebreak_source("Requirements"),
-                linebreak_source("PrefaceText"),
-                linebreak_source("MidwayText"),
-                linebreak_source("MidwayGiveItems"),
-                "===Requirements===\n",
-                bullet_list(objectives),
-                "\n===Rewards===\n",
-                "{{Spoiler|Rewards|\n",
-                linebreak_source("SuccessText", "\n"),
-                bullet_list(rewards),
-                "}}\n\n",
-                "[[Category:Quests]]",
-                "[[Category:Quests/%s Quests]]" % areaname,
-                "[[Category:Quests/%s]]" % self.npc.name,
-                "\n",
+
+def _reuse_time(num, timespan):
+    return "This quest can be repeated after %i %s%s." % (
+        num,
+        timespan,
+        "" if num == 1 else "s",
+    )
+
+
+@handles("ReuseTime_Days")
+def _reuse_time_days(page, value):
+    page.source["ReuseTime"] = _reuse_time(value, "day")
+
+
+@handles("ReuseTime_Hours")
+def _reuse_time_hours(page, value):
+    page.source["ReuseTime"] = _reuse_time(value, "hour")
+
+
+def _requirement_references(value):
+    for req in value:
+        if isinstance(req, list):
+            yield from _requirement_references(req)
+        elif req.get("T") == "Or":
+            yield from _requirement_references(req["List"])
+        elif req.get("T") == "MinSkillLevel":
+            yield Skill, None, req["Skill"]
+
+
+@handles("Requirements", references=_requirement_references)
+def _requirements(page, value):
+    page.source["Requirements"] = page.quest.requirements_text(page.lookup)
+
+
+@handles("PrerequisiteFavorLevel")
+def _prerequisite_favor_level(page, value):
+    # Only the Fiery Secrets quests have this
+    text = "This quest is available at {{Favor|%s}} favor."
+    page.source["PrerequisiteFavorLevel"] = text % separate_words(value)
+
+
+@handles("PrefaceText")
+def _preface_text(page, value):
+    page.source["PrefaceText"] = f"===Preface===\n{value.strip()}"
+
+
+def _objective_references(value):
+    for obj in value:
+        if obj["Type"] == "Collect" and "ItemName" in obj:
+            yield Item, "InternalName", obj["ItemName"]
+
+
+@handles("Objectives", references=_objective_references)
+def _objectives(page, value):
+    for obj in value:
+        desc = obj["Description"]
+
+        if obj["Type"] == "Collect" and "ItemName" in obj:
+            item = page.lookup(Item, "InternalName", obj["ItemName"])
+            desc = desc.replace(item.name, item.link)
+
+        try:
+            n = obj["Number"]
+        except KeyError:
+            pass
+        else:
+            if n > 1 and desc.find(str(n)) == -1:
+                desc += f" x{n}"
+
+        page.objectives.append(desc)
+
+
+@handles("SuccessText")
+def _success_text(page, value):
+    page.source["SuccessText"] = "{{Quote|%s}}" % value
+
+
+@handles("Reward_Favor", "Rewards_Favor")
+def _reward_favor(page, value):
+    page.rewards.append(f"{value} [[Favor]]")
+
+
+@handles("Reward_Gold")
+def _reward_gold(page, value):
+    page.rewards.append(f"{value} councils")
+
+
+currencies = {"WardenPoints": "Warden Points", "Gold": "councils"}
+
+
+@handles("Rewards_Currency")
+def _rewards_currency(page, value):
+    for curr, amt in value.items():
+        try:
+            page.rewards.append(f"{amt} {currencies[curr]}")
+        except KeyError as e:
+            page.quest.errors.append(f"Unknown reward currency: {e}")
+
+
+@handles("Rewards_Items", references=_items)
+def _rewards_items(page, value):
+    for item in value:
+        reward = page.lookup(Item, "InternalName", item["Item"]).link
+        if item["StackSize"] > 1:
+            reward += f" x{item['StackSize']}"
+        page.rewards.append(reward)
+
+
+@handles("Rewards_XP", references=lambda v: ((Skill, None, name) for name in v))
+def _rewards_xp(page, value):
+    for name, xp in value.items():
+        page.rewards.append("%i XP in %s" % (xp, page.lookup(Skill, None, name).link))
+
+
+@handles("Rewards_Ability", references=lambda v: [(Ability, "InternalName", v)])
+def _rewards_ability(page, value):
+    page.rewards.append(
+        "Ability: %s" % page.lookup(Ability, "InternalName", value).link
+    )
+
+
+def _reward_references(value):
+    for reward in value:
+        if reward["T"] in ("SkillXP", "SkillXp"):
+            yield Skill, None, reward["Skill"]
+        elif reward["T"] == "Recipe":
+            yield Recipe, "InternalName", reward["Recipe"]
+
+
+@handles("Rewards", references=_reward_references)
+def _rewards(page, value):
+    for reward in value:
+        if reward["T"] in ("SkillXP", "SkillXp"):  # Inconsistent uppercase
+            page.rewards.append(
+                "%i XP in %s"
+                % (reward["Xp"], page.lookup(Skill, None, reward["Skill"]).link)
             )
-        )
+        elif reward["T"] == "CombatXp":
+            page.rewards.append(f"{reward['Xp']} XP in active combat skills")
+        elif reward["T"] == "Recipe":
+            page.rewards.append(
+                "Recipe: %s"
+                % page.lookup(Recipe, "InternalName", reward["Recipe"]).link
+            )
+        elif reward["T"] == "GuildXp":
+            page.rewards.append(f"{reward['Xp']} Guild XP")
+        elif reward["T"] == "GuildCredits":
+            page.rewards.append(f"{reward['Credits']} Guild Credits")
+        else:
+            page.quest.errors.append(f"Unexpected reward type: {reward['T']}")
+
+
+@handles("Rewards_Effects")
+def _rewards_effects(page, value):
+    page.quest.notices.append(
+        f"Special reward effects must be handled manually: {value}"
+    )
+
+
+@handles("Rewards_NamedLootProfile")
+def _rewards_named_loot_profile(page, value):
+    page.rewards.append("random items")  # Special loot table for rewards
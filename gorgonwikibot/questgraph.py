@@ -0,0 +1,147 @@
+"""Which quests unlock which, worked out once per data version.
+
+The graph has an edge from each quest to the quests that require having
+completed it, and notes the favor and skill levels each quest asks for, so
+that pages can link to prerequisites and list quest chains without looking
+quests up.
+"""
+
+from collections import deque
+from functools import lru_cache
+
+from gorgonwikibot import cdn
+
+# requirements that are met by completing another quest
+completed = ("QuestCompleted", "GuildQuestCompleted")
+
+
+def requirements(data):
+    """The requirements of a quest's data, flattened: without the extra lists
+    some quests have, and with the alternatives of "Or" in place of it."""
+    stack = [data.get("Requirements", [])]
+    while stack:
+        req = stack.pop()
+        if isinstance(req, list):
+            stack.extend(reversed(req))
+        elif req.get("T") == "Or":
+            stack.extend(reversed(req["List"]))
+        else:
+            yield req
+
+
+class QuestGraph:
+    """Prerequisites of quests, by InternalName.
+
+    Direct prerequisites, unlocks, gates and depth are looked up in constant
+    time. ancestors(), descendants() and chain() take time linear in the
+    number of quests they return.
+    """
+
+    def __init__(self, data):
+        self.ids = {}  # InternalName: id, of the first quest with it
+        self.names = {}  # InternalName: Name
+        self.prerequisites = {}  # InternalName: InternalNames of direct prerequisites
+        self.favor = {}  # InternalName: favor level it asks for, if any
+        self.skills = {}  # InternalName: (skill id, level) it asks for
+        self.depth = {}  # InternalName: length of its longest chain of prerequisites
+
+        for id, quest in data.items():
+            iname = quest.get("InternalName")
+            if iname is None or iname in self.ids:
+                continue
+            self.ids[iname] = id
+            self.names[iname] = quest.get("Name")
+            prerequisites, skills = [], []
+            if "PrerequisiteFavorLevel" in quest:
+                self.favor[iname] = quest["PrerequisiteFavorLevel"]
+            for req in requirements(quest):
+                reqtype = req.get("T")
+                if reqtype in completed:
+                    prerequisites.append(req["Quest"])
+                elif reqtype == "MinFavorLevel":
+                    self.favor[iname] = req["Level"]
+                elif reqtype == "MinSkillLevel":
+                    skills.append((req["Skill"], req["Level"]))
+            self.prerequisites[iname] = tuple(dict.fromkeys(prerequisites))
+            self.skills[iname] = tuple(skills)
+
+        # prerequisites that aren't quests can't be linked to or followed;
+        # unlocks are the quests each quest is a prerequisite of
+        unlocks = {iname: [] for iname in self.ids}
+        for iname, prerequisites in self.prerequisites.items():
+            self.prerequisites[iname] = tuple(p for p in prerequisites if p in unlocks)
+            for p in self.prerequisites[iname]:
+                unlocks[p].append(iname)
+        self.unlocks = {iname: tuple(u) for iname, u in unlocks.items()}
+
+        self._depths()
+
+    def _depths(self):
+        # quests in topological order, starting from those without prerequisites
+        waiting = {iname: len(p) for iname, p in self.prerequisites.items()}
+        ready = deque(iname for iname, n in waiting.items() if n == 0)
+        while ready:
+            iname = ready.popleft()
+            self.depth[iname] = max(
+                (self.depth[p] + 1 for p in self.prerequisites[iname]), default=0
+            )
+            for u in self.unlocks[iname]:
+                waiting[u] -= 1
+                if waiting[u] == 0:
+                    ready.append(u)
+        # quests in a cycle of prerequisites: count only the prerequisites
+        # outside it, so that the depth is still finite
+        for iname in self.ids:
+            if iname not in self.depth:
+                self.depth[iname] = max(
+                    (
+                        self.depth[p] + 1
+                        for p in self.prerequisites[iname]
+                        if p in self.depth
+                    ),
+                    default=0,
+                )
+
+    @staticmethod
+    def _walk(start, neighbours):
+        seen = set(start)
+        queue = deque(start)
+        while queue:
+            for n in neighbours(queue.popleft()):
+                if n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        return seen
+
+    def ancestors(self, iname):
+        """Set of all quests that must be completed before this one, if every
+        alternative of an "Or" counts."""
+        found = self._walk(self.prerequisites[iname], self.prerequisites.__getitem__)
+        found.discard(iname)
+        return found
+
+    def descendants(self, iname):
+        """Set of all quests that completing this one leads to."""
+        found = self._walk(self.unlocks[iname], self.unlocks.__getitem__)
+        found.discard(iname)
+        return found
+
+    def chain(self, iname):
+        """Tuple of this quest, its ancestors and its descendants, ordered by
+        depth and then InternalName. Quests that only share a prerequisite
+        with this one aren't in its chain."""
+        chain = self.ancestors(iname) | self.descendants(iname) | {iname}
+        return tuple(sorted(chain, key=lambda q: (self.depth[q], q)))
+
+    def link(self, iname):
+        return f"[[{self.names[iname]}]]"
+
+
+def get_graph():
+    """QuestGraph of the quests in the current data version."""
+    return _graph(cdn.get_version())
+
+
+@lru_cache  # keyed by version, so that cdn.configure() is respected
+def _graph(version):
+    return QuestGraph(cdn.get_file("quests"))
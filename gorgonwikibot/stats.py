@@ -0,0 +1,266 @@
+"""Combat numbers of abilities and ai abilities as columns of arrays.
+
+The tables are built once per data version from abilities.json and ai.json.
+Queries work on whole columns instead of looping over records:
+
+    t = ability_table()
+    rows = t.where("damage", ">", 100) & t.where("skill", "==", "Sword")
+    t.select(rows, "iname", "damage")
+    t.aggregate("damage", max, by="skill")
+
+Missing numbers are NaN, which fails every comparison and is left out of
+aggregates.
+"""
+
+import math
+import operator
+from array import array
+from functools import lru_cache
+from itertools import compress, repeat
+
+from gorgonwikibot import cdn
+from gorgonwikibot.content import Ability, Ai
+
+nan = float("nan")
+
+operators = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class Mask:
+    """Which rows of a Table a query matched, one byte of 0 or 1 per row.
+
+    Combine masks with &, | and ~.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits):
+        self.bits = bytes(bits)
+
+    def __len__(self):
+        return len(self.bits)
+
+    def __iter__(self):
+        return iter(self.bits)
+
+    def _combine(self, other, op):
+        if len(self) != len(other):
+            raise ValueError("masks are for tables of different sizes")
+        # each byte is 0 or 1, so the bitwise op on the whole mask works bytewise
+        n = op(
+            int.from_bytes(self.bits, "little"), int.from_bytes(other.bits, "little")
+        )
+        return Mask(n.to_bytes(len(self), "little"))
+
+    def __and__(self, other):
+        return self._combine(other, operator.and_)
+
+    def __or__(self, other):
+        return self._combine(other, operator.or_)
+
+    def __invert__(self):
+        return Mask(self.bits.translate(bytes([1, 0]) + bytes(254)))
+
+    def count(self):
+        return self.bits.count(1)
+
+    def rows(self):
+        return list(compress(range(len(self)), self.bits))
+
+
+class Table:
+    """Named columns of equal length. Numeric columns are arrays of doubles,
+    text columns are lists."""
+
+    def __init__(self, columns, key=None):
+        self.columns = columns
+        self.key = key  # column with a unique value per row, if there is one
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {lengths}")
+        self._length = lengths.pop() if lengths else 0
+        self._index = {}
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def index(self, name=None):
+        """Dict of value: first row number, for the key column by default."""
+        name = name or self.key
+        if name not in self._index:
+            index = {}
+            for i, value in enumerate(self.columns[name]):
+                index.setdefault(value, i)
+            self._index[name] = index
+        return self._index[name]
+
+    def row(self, value):
+        """Dict of column: value for the row whose key is value."""
+        i = self.index()[value]
+        return {name: column[i] for name, column in self.columns.items()}
+
+    def all(self):
+        return Mask(bytes([1]) * len(self))
+
+    def where(self, name, op, value=None):
+        """Mask of the rows whose value in column name compares true to value.
+
+        op is one of operators, "in" for membership in a collection of values,
+        or a function of one argument.
+        """
+        column = self.columns[name]
+        if callable(op):
+            return Mask(map(bool, map(op, column)))
+        if op == "in":
+            return Mask(map(set(value).__contains__, column))
+        # map with a builtin operator stays in C, unlike a lambda per row
+        return Mask(map(operators[op], column, repeat(value)))
+
+    def select(self, mask, *names):
+        """List of tuples of the values in the named columns of the masked rows."""
+        columns = [compress(self.columns[name], mask) for name in names or self.columns]
+        return list(zip(*columns))
+
+    def values(self, name, mask=None):
+        """Values of a column in the masked rows, without NaNs."""
+        values = (
+            self.columns[name] if mask is None else compress(self.columns[name], mask)
+        )
+        return [v for v in values if v == v]  # NaN != NaN
+
+    def aggregate(self, name, fn, mask=None, by=None):
+        """fn (like sum, max or mean) of the values of a column in the masked rows.
+
+        With by, returns a dict of each value of the by column: aggregate of
+        the rows with that value. Groups without any values are left out.
+        """
+        if by is None:
+            values = self.values(name, mask)
+            return fn(values) if values else nan
+        mask = mask if mask is not None else self.all()
+        groups = {}
+        for group, value in compress(zip(self.columns[by], self.columns[name]), mask):
+            if value == value:
+                groups.setdefault(group, []).append(value)
+        return {group: fn(values) for group, values in groups.items()}
+
+
+def mean(values):
+    return math.fsum(values) / len(values)
+
+
+def _number(value):
+    return nan if value is None else float(value)
+
+
+# abilities.json keys the ability table is built from
+ability_keys = (
+    "InternalName",
+    "Name",
+    "Skill",
+    "Level",
+    "DamageType",
+    "ResetTime",
+    "PvE",
+)
+
+
+def _damaging_dot(pve):
+    """The DoT create_ability_pages.process_dots shows as damage, if any."""
+    for dot in pve.get("DoTs", []):
+        if "SpecialRules" in dot and "BuffActivated" in dot["SpecialRules"]:
+            continue
+        if "Preface" not in dot and dot["DamagePerTick"] > 0:
+            return dot
+    return {}
+
+
+def ability_table():
+    """Table of one row per ability, keyed by iname.
+
+    Numeric columns: level, damage, power_cost, range, reset_time,
+    rage_multiplier, dot_damage (per tick), dot_ticks and dot_duration.
+    """
+    return _ability_table(cdn.get_version())
+
+
+@lru_cache  # keyed by version, so that cdn.configure() is respected
+def _ability_table(version):
+    text = ("id", "iname", "name", "skill", "damage_type")
+    numbers = (
+        "level",
+        "damage",
+        "power_cost",
+        "range",
+        "reset_time",
+        "rage_multiplier",
+        "dot_damage",
+        "dot_ticks",
+        "dot_duration",
+    )
+    columns = {name: [] for name in text}
+    columns.update((name, array("d")) for name in numbers)
+
+    for id, data in cdn.iter_file(Ability.datafile, ability_keys, version):
+        pve = data.get("PvE", {})
+        dot = _damaging_dot(pve)
+        # whichever damage is there, like process_damage; only one is present
+        damage = pve.get(
+            "Damage", pve.get("HealthSpecificDamage", pve.get("ArmorSpecificDamage"))
+        )
+        row = (
+            id,
+            data.get("InternalName"),
+            data.get("Name"),
+            data.get("Skill"),
+            data.get("DamageType"),
+            _number(data.get("Level")),
+            _number(damage),
+            _number(pve.get("PowerCost")),
+            _number(pve.get("Range")),
+            _number(data.get("ResetTime")),
+            _number(pve.get("RageMultiplier")),
+            _number(dot.get("DamagePerTick")),
+            _number(dot.get("NumTicks")),
+            _number(dot.get("Duration")),
+        )
+        for column, value in zip(columns.values(), row):
+            column.append(value)
+    return Table(columns, key="iname")
+
+
+def ai_table():
+    """Table of one row per ability of each ai, with columns ai, ability,
+    min_level and max_level.
+
+    min_level defaults to 1 and max_level to NaN, like create_pet_profiles
+    shows them.
+    """
+    return _ai_table(cdn.get_version())
+
+
+@lru_cache
+def _ai_table(version):
+    columns = {
+        "ai": [],
+        "ability": [],
+        "min_level": array("d"),
+        "max_level": array("d"),
+    }
+    for id, data in cdn.iter_file(Ai.datafile, ("Abilities",), version):
+        for ability, params in data.get("Abilities", {}).items():
+            columns["ai"].append(id)
+            columns["ability"].append(ability)
+            columns["min_level"].append(_number(params.get("minLevel", 1)))
+            columns["max_level"].append(_number(params.get("maxLevel")))
+    return Table(columns)
@@ -0,0 +1,151 @@
+"""Local records of what the bot last published, to skip unchanged pages without
+asking the wiki, and of what a run did so far, to resume it."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+from gorgonwikibot import cdn
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class PublishedStore:
+    """SQLite table of page title: hash of the text the bot last published,
+    and the revision id of that text on the wiki.
+
+    Safe to share between the threads of a SaveQueue.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or os.path.join(cdn.root, "published.sqlite3")
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.filename, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "site TEXT, title TEXT, hash TEXT, revid INTEGER, "
+                "PRIMARY KEY (site, title))"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get(self, site, titles):
+        """Stored (hash, revid) for those of the titles the store knows."""
+        titles = list(titles)
+        found = {}
+        with self._lock:
+            # stay well below sqlite's limit on the number of parameters
+            for i in range(0, len(titles), 500):
+                batch = titles[i : i + 500]
+                found.update(
+                    (title, (h, revid))
+                    for title, h, revid in self._db.execute(
+                        "SELECT title, hash, revid FROM pages "
+                        f"WHERE site = ? AND title IN ({', '.join('?' * len(batch))})",
+                        [str(site), *batch],
+                    )
+                )
+        return found
+
+    def put(self, site, title, text, revid):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                (str(site), title, text_hash(text), revid),
+            )
+
+    def unchanged(self, site, pages):
+        """Titles of pages whose text is the same as when it was last published.
+
+        pages is a dict of title: text.
+        """
+        return {
+            title
+            for title, (h, _) in self.get(site, pages).items()
+            if h == text_hash(pages[title])
+        }
+
+
+class Journal:
+    """SQLite table of what a run did with each page, so that an interrupted
+    run can be resumed where it stopped.
+
+    Outcomes are "saved", "unchanged", "failed" and "review" (not saved
+    because its generated text has errors). detail holds the errors.
+    Safe to share between the threads of a SaveQueue.
+    """
+
+    # pages with these outcomes aren't processed again when resuming
+    finished_outcomes = ("saved", "unchanged", "review")
+
+    def __init__(self, name, site, filename=None):
+        self.name = name
+        self.site = str(site)
+        self.filename = filename or os.path.join(cdn.root, "journal.sqlite3")
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.filename, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS outcomes ("
+                "name TEXT, site TEXT, title TEXT, outcome TEXT, detail TEXT, "
+                "PRIMARY KEY (name, site, title))"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def clear(self):
+        """Forget the previous run, to start a new one."""
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM outcomes WHERE name = ? AND site = ?",
+                (self.name, self.site),
+            )
+
+    def put(self, title, outcome, detail=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?)",
+                (self.name, self.site, title, outcome, detail),
+            )
+
+    def outcomes(self):
+        """Dict of title: (outcome, detail) of the pages of the run so far."""
+        with self._lock:
+            return {
+                title: (outcome, detail)
+                for title, outcome, detail in self._db.execute(
+                    "SELECT title, outcome, detail FROM outcomes "
+                    "WHERE name = ? AND site = ?",
+                    (self.name, self.site),
+                )
+            }
+
+    def finished(self):
+        """Titles of the pages that resuming the run skips."""
+        return {
+            title
+            for title, (outcome, _) in self.outcomes().items()
+            if outcome in self.finished_outcomes
+        }
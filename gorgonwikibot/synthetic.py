@@ -0,0 +1,515 @@
+"""Synthetic data files shaped like the real ones, to run the tests, scripts and
+benchmarks without the CDN.
+
+Besides random records, every dataset has the odd cases that the scripts handle
+specially: abilities in two skills, abilities that need a disambiguation page,
+quests with dict-valued or nested Requirements, scripted event NPCs missing
+from npcs.json, and so on.
+
+At scale 1 there are about as many records as in the real files, so scale 0.1
+is a tenth of their size and scale 10 ten times it.
+"""
+
+import itertools
+import random
+
+from gorgonwikibot import cdn
+
+VERSION = 999  # unlikely to be mistaken for real data
+
+syllables = ("ka", "lo", "mi", "ru", "ze", "ta", "vo", "ne", "shi", "gu", "pa", "do")
+
+
+def word(n):
+    """A made-up capitalized word for each number, without digits, so generated
+    names work as ability chain base names."""
+    s = ""
+    while True:
+        n, i = divmod(n, len(syllables))
+        s += syllables[i]
+        if not n:
+            return s.capitalize()
+        n -= 1
+
+
+def camel(name):
+    """InternalName-style version of a name."""
+    return "".join(w[:1].upper() + w[1:] for w in name.replace("'", "").split())
+
+
+class Generator:
+    """Builds the contents of all data files for one dataset."""
+
+    damage_types = ("Crushing", "Slashing", "Piercing", "Fire", "Cold", "Poison")
+
+    def __init__(self, scale=1, seed=0):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.files = {file: {} for file in cdn.DATAFILES}
+        self.words = itertools.count()  # numbers of unused words
+
+    def name(self, words=1):
+        return " ".join(word(next(self.words)) for _ in range(words))
+
+    def add(self, file, id, data):
+        self.files[file][id] = data
+        return id
+
+    def count(self, n):
+        return max(1, round(n * self.scale))
+
+    def generate(self):
+        self.areas()
+        self.skills()
+        self.player_abilities()
+        self.ais()
+        self.items()
+        self.recipes()
+        self.npcs()
+        self.quests()
+        return self.files
+
+    def areas(self):
+        for id, name, short in [
+            ("AreaSerbule", "Serbule", None),
+            ("AreaEltibule", "Eltibule", None),
+            ("AreaRahuCaves", "Rahu Caves", None),
+            ("AreaCasino", "Red Wing Casino", "Casino"),
+            ("AreaKurCaves", "Kur Tower", "Tower"),
+            ("AreaKurMountains", "Kur Mountains", None),
+            ("AreaDesert1", "Ilmari Desert", "Ilmari"),
+        ]:
+            data = {"FriendlyName": name}
+            if short:
+                data["ShortFriendlyName"] = short
+            self.add("areas", id, data)
+        for _ in range(self.count(40)):
+            name = self.name()
+            self.add("areas", "Area" + name, {"FriendlyName": name})
+
+    def skills(self):
+        names = {
+            "Sword": "Sword",
+            "Unarmed": "Unarmed",
+            "Cow": "Cow",
+            "FireMagic": "Fire Magic",
+            "IceMagic": "Ice Magic",
+            "FirstAid": "First Aid",
+            "Mycology": "Mycology",
+            "AnimalHandling": "Animal Handling",
+            "BattleChemistry": "Battle Chemistry",
+            "Necromancy": "Necromancy",
+        }
+        for _ in range(self.count(100)):
+            name = self.name()
+            names[name] = name
+        for i, (id, name) in enumerate(names.items()):
+            data = {
+                "Id": i + 1,
+                "Description": f"Skill in {name}.",
+                "XpTable": "Typical",
+            }
+            if i % 7:  # some skills have no Name, which defaults to their id
+                data["Name"] = name
+            self.add("skills", id, data)
+
+    def ability(self, name, iname, skill="Unknown", player=False, **custom):
+        """Add an ability with typical data; custom replaces top-level keys."""
+        rng = self.rng
+        pve = {
+            "PowerCost": rng.randint(0, 60),
+            "Range": rng.choice((5, 10, 20, 30)),
+            "Damage": rng.randint(1, 500),
+        }
+        data = {
+            "Name": name,
+            "InternalName": iname,
+            "Description": f"{name} hits the target.",
+            "IconID": 1000 + len(self.files["abilities"]),
+            "Level": rng.randint(1, 100),
+            "Skill": skill,
+            "DamageType": rng.choice(self.damage_types),
+            "ResetTime": rng.choice((1, 2, 5, 10, 30)),
+            "Keywords": ["Attack", skill],
+            "PvE": pve,
+        }
+        if player:
+            data["AttributesThatDeltaPowerCost"] = [f"MOD_{skill.upper()}_COST"]
+            data["AttributesThatModPowerCost"] = ["MOD_ABILITY_COST"]
+            self.vary(data)
+        data.update(custom)
+        return self.add(
+            "abilities", f"ability_{len(self.files['abilities']) + 1}", data
+        )
+
+    def vary(self, data):
+        """Give some player abilities the less common kinds of PvE data."""
+        rng, pve = self.rng, data["PvE"]
+        roll = rng.random()
+        if roll < 0.1:
+            pve["HealthSpecificDamage"] = pve.pop("Damage")
+        elif roll < 0.15:
+            pve["ArmorSpecificDamage"] = pve.pop("Damage")
+        elif roll < 0.2:
+            del pve["Damage"]
+        if rng.random() < 0.3:
+            pve["RageMultiplier"] = rng.choice((0.5, 1, 1.5, 2))
+        if rng.random() < 0.1:
+            pve["ExtraDamageIfTargetVulnerable"] = rng.randint(5, 50)
+        if rng.random() < 0.15:
+            pve["SpecialValues"] = [
+                {"Label": "Heals", "Value": rng.randint(5, 80), "Suffix": "Health"}
+            ]
+        if rng.random() < 0.1:
+            data["SpecialInfo"] = "Stuns the target"
+        dots = []
+        if rng.random() < 0.2:
+            ticks = rng.randint(1, 6)
+            dots.append(
+                {
+                    "DamagePerTick": rng.randint(1, 40),
+                    "DamageType": rng.choice(self.damage_types),
+                    "NumTicks": ticks,
+                    "Duration": ticks * 2,
+                }
+            )
+        if rng.random() < 0.05:
+            dots.append(
+                {
+                    "DamagePerTick": rng.randint(10, 90),
+                    "DamageType": "Trauma",
+                    "NumTicks": 1,
+                    "Duration": 1,
+                    "Preface": "Deals",
+                }
+            )
+        if rng.random() < 0.05:
+            dots.append(
+                {
+                    "DamagePerTick": 5,
+                    "DamageType": "Nature",
+                    "NumTicks": 2,
+                    "Duration": 4,
+                    "SpecialRules": ["BuffActivated"],
+                }
+            )
+        if dots:
+            pve["DoTs"] = dots
+
+    def chain(self, name, skill, length, iname=None):
+        """Abilities "name", "name 2" and so on, each the upgrade of the first."""
+        base = iname or camel(name)
+        level = self.rng.randint(1, 20)
+        for i in range(1, length + 1):
+            self.ability(
+                name if i == 1 else f"{name} {i}",
+                base if i == 1 else f"{base}{i}",
+                skill,
+                player=True,
+                Level=level,
+                **({} if i == 1 else {"UpgradeOf": base}),
+            )
+            level += self.rng.randint(5, 15)
+
+    def player_abilities(self):
+        # what create_ability_pages handles specially
+        self.ability("Punch", "Punch", "Unarmed")  # starting abilities
+        self.ability("Sword Slash", "SwordSlash", "Sword")
+        self.ability(
+            "Sword Slash 2", "SwordSlash2", "Sword", player=True, UpgradeOf="SwordSlash"
+        )
+        self.chain("Front Kick", "Unarmed", 3)  # in two skills
+        self.chain("Front Kick", "Cow", 2, "CowFrontKick")
+        self.chain("Cold Protection", "FireMagic", 2, "FireColdProtection")
+        self.chain("Cold Protection", "IceMagic", 2, "IceColdProtection")
+        # same names as other pages
+        self.chain("First Aid", "FirstAid", 4)
+        self.chain("Rabbit's Foot", "AnimalHandling", 1)
+        self.chain("Lycanspore Bomb", "Mycology", 2)
+        self.chain("Cold Sphere", "IceMagic", 3)
+        self.chain("Acid Sigil", "BattleChemistry", 2)
+        self.chain("Electricity Sigil", "BattleChemistry", 2)
+        # not learnable
+        self.ability("(Self Bomb)", "FaeBombSporeTrigger", "Mycology", player=True)
+        self.ability(
+            "Self Bomb",
+            "SelfBomb",
+            "Mycology",
+            player=True,
+            Keywords=["Attack", "Lint_NotLearnable"],
+        )
+        self.ability("Charm Rat", "CharmRat", "AnimalHandling", player=True)
+        # base name with "#", only upgrades
+        for i in range(1, 4):
+            self.ability(
+                f"Call Stabled Pet #{i}",
+                f"CallStabledPet{i}",
+                "AnimalHandling",
+                player=True,
+            )
+        self.ability("Flare Fireball 3", "FlareFireball3", "FireMagic", player=True)
+
+        skills = list(self.files["skills"])
+        for _ in range(self.count(1300)):
+            self.chain(
+                self.name(2), self.rng.choice(skills), self.rng.choice((1, 1, 2, 3, 6))
+            )
+
+    def ais(self):
+        rng = self.rng
+
+        def enemy(species, abilities=None):
+            if abilities is None:
+                bite, rage = f"{species}Bite", f"{species}Rage"
+                self.ability(f"{species} Bite", bite)
+                self.ability(f"{species} Rage", rage, Keywords=["RageAttack"])
+                abilities = {bite: {}, rage: {}}
+                if rng.random() < 0.3:  # duplicate scaled to higher levels
+                    scaled = f"{species}BiteB"
+                    self.ability(f"{species} Bite", scaled)
+                    abilities[scaled] = {"minLevel": rng.randint(20, 60)}
+                if rng.random() < 0.2:  # not described, so not profiled
+                    spit = f"{species}Spit"
+                    self.ability(f"{species} Spit", spit, Description="")
+                    abilities[spit] = {}
+            self.add("ai", species, {"Abilities": abilities, "Comment": species})
+
+        def pet(species, basic=None):
+            abilities = {}
+            if basic is None:
+                basic = [f"PetBasicAttack{species}"]
+                self.ability("Bite", basic[0], Keywords=["PetBasicAttack"])
+            abilities.update((a, {}) for a in basic)
+            level = 1
+            for i in range(1, rng.randint(2, 4)):
+                sic = f"PetSic{species}{i}"
+                self.ability(f"Pounce {i}", sic, Keywords=["PetA"])
+                abilities[sic] = {"minLevel": level, "maxLevel": level + 19}
+                level += 20
+            del abilities[sic]["maxLevel"]  # the last one is used from then on
+            trick = f"PetTrick{species}"
+            self.ability("Trick", trick, Keywords=["PetB"], Description="")
+            abilities[trick] = {}
+            self.add("ai", f"{species}_Pet", {"Abilities": abilities})
+
+        enemy("Rat")
+        # Grimalkin pets use enemy abilities for their basic attack
+        self.ability("Bite", "GrimalkinBite")
+        self.ability("Claw", "GrimalkinClaw")
+        pet("Grimalkin", ["GrimalkinBite", "GrimalkinClaw"])
+        self.add("ai", "Grimalkin_PetHissy", self.files["ai"]["Grimalkin_Pet"].copy())
+        # enemies with abilities that look like pet or player minigolem ones
+        self.ability("Undead Arrow", "PetUndeadArrow1")
+        self.ability("Undead Omega Arrow", "PetUndeadOmegaArrow")
+        enemy(
+            "SkeletonDistanceArcher", {"PetUndeadArrow1": {}, "PetUndeadOmegaArrow": {}}
+        )
+        self.ability("Punch", "MinigolemPunch4")
+        enemy("SecurityGolem", {"MinigolemPunch4": {}})
+        self.ability("Punch", "EnemyMinigolemPunch")
+        enemy("EnemyMinigolem_Puncher", {"EnemyMinigolemPunch": {}})
+        self.ability("Punch", "MinigolemPunch1")
+        self.ability("Rage Punch", "MinigolemRagePunch1", Keywords=["RageAttack"])
+        self.add(
+            "ai",
+            "Minigolem_Beginner",
+            {"Abilities": {"MinigolemPunch1": {}, "MinigolemRagePunch1": {}}},
+        )
+
+        for _ in range(self.count(900)):
+            enemy(self.name())
+        for _ in range(self.count(100)):
+            pet(self.name())
+
+    def items(self):
+        rng = self.rng
+        for i in range(1, self.count(10000) + 1):
+            name = self.name() + rng.choice(("", " Ingot", " Potion", " Sword", " Hat"))
+            self.add(
+                "items",
+                f"item_{i}",
+                {
+                    "Name": name,
+                    "InternalName": camel(name),
+                    "Description": f"A {name.lower()}.",
+                    "IconId": 5000 + i,
+                    "MaxStackSize": rng.choice((1, 10, 100)),
+                    "Value": rng.randint(1, 1000),
+                    "Keywords": ["Loot"],
+                },
+            )
+
+    def recipes(self):
+        rng = self.rng
+        items = list(self.files["items"])
+        skills = list(self.files["skills"])
+        for i in range(1, self.count(4000) + 1):
+            name = self.name()
+            self.add(
+                "recipes",
+                f"recipe_{i}",
+                {
+                    "Name": name,
+                    "InternalName": camel(name),
+                    "Description": f"Makes {name}.",
+                    "IconId": 7000 + i,
+                    "Skill": rng.choice(skills),
+                    "SkillLevelReq": rng.randint(0, 100),
+                    "Ingredients": [
+                        {"ItemCode": int(rng.choice(items)[5:]), "StackSize": 2}
+                    ],
+                    "ResultItems": [
+                        {"ItemCode": int(rng.choice(items)[5:]), "StackSize": 1}
+                    ],
+                },
+            )
+
+    def npcs(self):
+        areas = list(self.files["areas"])
+        self.add("npcs", "NPC_Joe", {"Name": "Joe", "AreaName": "AreaSerbule"})
+        for _ in range(self.count(600)):
+            name = self.name()
+            self.add(
+                "npcs",
+                f"NPC_{name}",
+                {"Name": name, "AreaName": self.rng.choice(areas)},
+            )
+
+    def quest(self, **custom):
+        """Add a quest with typical data; custom replaces top-level keys."""
+        rng = self.rng
+        name = self.name(2)
+        npc = rng.choice(list(self.files["npcs"].items()))
+        item = self.files["items"][rng.choice(list(self.files["items"]))]
+        n = rng.randint(1, 10)
+        data = {
+            "Name": name,
+            "InternalName": camel(name),
+            "Description": f"  Help with {name}.  ",
+            "Version": 1,
+            "IsCancellable": True,
+            "FavorNpc": f"{npc[1]['AreaName']}/{npc[0]}",
+            "Objectives": [
+                {
+                    "Type": "Collect",
+                    "ItemName": item["InternalName"],
+                    "Description": f"Collect {item['Name']}",
+                    "Number": n,
+                },
+                {"Type": "Kill", "Description": f"Kill {n} Rats", "Number": n},
+            ],
+            "Rewards_Favor": rng.randint(10, 200),
+            "SuccessText": "Thanks!",
+        }
+        if rng.random() < 0.5:
+            data["Rewards_Items"] = [
+                {
+                    "Item": self.files["items"][rng.choice(list(self.files["items"]))][
+                        "InternalName"
+                    ],
+                    "StackSize": rng.randint(1, 3),
+                }
+            ]
+        if rng.random() < 0.5:
+            data["Rewards_XP"] = {rng.choice(list(self.files["skills"])): 100}
+        if rng.random() < 0.3:
+            data["PrefaceText"] = "I have a job for you."
+        if rng.random() < 0.2:
+            data["MidwayText"] = "How is it going?"
+        if rng.random() < 0.2:
+            data["ReuseTime_Days"] = rng.randint(1, 7)
+        elif rng.random() < 0.2:
+            data["ReuseTime_Hours"] = 1
+        if rng.random() < 0.3:
+            data["Requirements"] = self.requirement()
+        data.update(custom)
+        id = f"quest_{len(self.files['quests']) + 1}"
+        self.add("quests", id, data)
+        return data
+
+    def requirement(self):
+        rng = self.rng
+        quests = self.files["quests"]
+        roll = rng.random()
+        if roll < 0.3 or not quests:
+            return {"T": "MinFavorLevel", "Level": "CloseFriends"}  # not in a list
+        elif roll < 0.6:
+            return [
+                {
+                    "T": "MinSkillLevel",
+                    "Skill": rng.choice(list(self.files["skills"])),
+                    "Level": rng.randint(1, 50),
+                }
+            ]
+        elif roll < 0.8:
+            quest = quests[rng.choice(list(quests))]
+            return [{"T": "QuestCompleted", "Quest": quest["InternalName"]}]
+        elif roll < 0.9:
+            return [{"T": "Or", "List": [{"T": "IsWarden"}, {"T": "IsLongtimeAnimal"}]}]
+        else:
+            return [{"T": "HasEffectKeyword", "Keyword": "LiveEvent_BunFu"}]
+
+    def quests(self):
+        rng = self.rng
+        skills = list(self.files["skills"])
+        recipe = next(iter(self.files["recipes"].values()))["InternalName"]
+        ability = self.files["abilities"]["ability_1"]["InternalName"]
+
+        first = self.quest()
+        # skipped by create_quest_pages
+        self.quest(InternalName="KillSkeletons")
+        self.quest(Keywords=["WorkOrder"])
+        del self.quest()["FavorNpc"]
+        self.quest(FavorNpc="")
+        # scripted event NPCs aren't in npcs.json
+        self.quest(FavorNpc="AreaSerbule/LiveNpc_Kalaba")
+        self.quest(FavorNpc="AreaEltibule/NPC_Halloween_Ghost")
+        # Requirements that aren't a list of requirements
+        self.quest(Requirements={"T": "MinFavorLevel", "Level": "Friends"})
+        self.quest(
+            Requirements=[[{"T": "HasEffectKeyword", "Keyword": "Event_Christmas"}]]
+        )
+        self.quest(
+            Requirements=[{"T": "GuildQuestCompleted", "Quest": first["InternalName"]}],
+            IsGuildQuest=True,
+            NumExpectedParticipants=5,
+        )
+        self.quest(
+            PrerequisiteFavorLevel="Comfortable",
+            MidwayText="",
+            DisplayedLocation="Sacred Grotto",
+        )
+        self.quest(
+            Rewards=[
+                {"T": "SkillXp", "Skill": rng.choice(skills), "Xp": 50},
+                {"T": "SkillXP", "Skill": rng.choice(skills), "Xp": 50},
+                {"T": "CombatXp", "Xp": 100},
+                {"T": "Recipe", "Recipe": recipe},
+                {"T": "GuildXp", "Xp": 10},
+                {"T": "GuildCredits", "Credits": 3},
+            ],
+            Rewards_Currency={"WardenPoints": 5, "Gold": 20},
+            Reward_Gold=10,
+            Rewards_Ability=ability,
+            Rewards_NamedLootProfile="Chest",
+            Rewards_Effects=["SomeEffect"],
+            MidwayGiveItems=[{"Item": first["Objectives"][0]["ItemName"]}],
+            PreGiveItems=[],
+        )
+        for _ in range(self.count(2400)):
+            self.quest()
+
+
+def generate(scale=1, seed=0):
+    """Contents of every data file, as a dict of file name: records.
+
+    The same scale and seed always give the same data.
+    """
+    return Generator(scale, seed).generate()
+
+
+def install(cache_dir, scale=1, seed=0, version=VERSION):
+    """Write a synthetic dataset into cache_dir and point cdn at it, offline."""
+    cdn.configure(version, offline=True, cache_dir=cache_dir)
+    for file, contents in generate(scale, seed).items():
+        cdn.store(file, contents)
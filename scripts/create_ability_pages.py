@@ -2,7 +2,7 @@ import re
 import sys
 from operator import attrgetter
 
-import pywikibot
+from gorgonwikibot import deps, metrics, parallel
 from gorgonwikibot.content import (
     Ability,
     Skill,
@@ -13,6 +13,8 @@ from gorgonwikibot.content import (
     separate_words,
 )
 from gorgonwikibot.entrypoint import entrypoint
+from gorgonwikibot.publish import Publisher
+from gorgonwikibot.template import Template
 
 # Front Kick is in Unarmed and Cow
 # Cold Protection is in Fire Magic and Ice Magic
@@ -73,18 +75,38 @@ def ability_chains():
     return {k: sorted(v, key=attrgetter("name")) for k, v in chains.items()}
 
 
+infobox_template = Template(
+    """{{Ability infobox
+| name = $name
+| description = $description
+| level = $level
+| power cost = $power_cost
+| reuse time = $reuse_time
+| range = $range meters
+| skill = $skill$[keywords:
+| keywords = $keywords$]$[ragemulti:
+| ragemulti = $ragemulti$]$[damage:
+| damage = $damage$]$[special:
+| special = $special$]
+}}"""
+)
+keywords_template = Template("$[keywords:{{KWAB|$keywords}}$]")
+chain_template = Template("{| width=100%$[infoboxes:\n|-\n|\n$infoboxes$]\n|}")
+page_template = Template(
+    "__NOTOC__\n$infoboxes\n<noinclude>[[Category:Abilities]]</noinclude>"
+)
+disambiguation_template = Template(
+    "{{ambox\n| type = $type\n| border = yellow\n}}\n$page"
+)
+redirect_template = Template("#redirect [[$target]]")
+
+
 def process_keywords(a):
-    keywords = a.data.get("Keywords", "")
-    return (
-        "| keywords = " + "".join("{{KWAB|%s}}" % s for s in keywords)
-        if keywords
-        else ""
-    )
+    return keywords_template.render(keywords=a.data.get("Keywords"))
 
 
 def process_ragemulti(a):
-    multi = a.data["PvE"].get("RageMultiplier", "")
-    return f"| ragemulti = {multi}" if multi != "" else ""
+    return a.data["PvE"].get("RageMultiplier", "")
 
 
 def process_specialvalues(a):
@@ -164,68 +186,50 @@ def process_damage(a):
     return damage, special
 
 
-def generate_infobox(a):
-    s = [
-        "{{Ability infobox",
-        f"| name = {a.name}",
-        f"| description = {a.data['Description']}",
-        f"| level = {a.data['Level']}",
-        f"| power cost = {a.data['PvE']['PowerCost']}",
-        f"| reuse time = {a.data['ResetTime']}",
-        f"| range = {a.data['PvE']['Range']} meters",
-    ]
-    specials = []
-
+def infobox_fields(a):
+    """The fields of infobox_template for an ability."""
     try:
         skill = get_content_by_id(Skill, a.data["Skill"]).name
     except KeyError:
         skill = "Unknown"
-    s.append(f"| skill = {skill}")
-
-    s.append(process_keywords(a))
-    s.append(process_ragemulti(a))
-
-    specials.append(process_specialvalues(a))
-    specials.append(process_specialinfo(a))
-
     damage, dmg_special = process_damage(a)
-    if damage:
-        s.append(f"| damage = {damage}")
-    specials.append(dmg_special)
-
-    special = maybe_join(specials)
-    if special:
-        s.append(f"| special = {special}")
+    specials = [process_specialvalues(a), process_specialinfo(a), dmg_special]
+    return {
+        "name": a.name,
+        "description": a.data["Description"],
+        "level": a.data["Level"],
+        "power_cost": a.data["PvE"]["PowerCost"],
+        "reuse_time": a.data["ResetTime"],
+        "range": a.data["PvE"]["Range"],
+        "skill": skill,
+        "keywords": process_keywords(a),
+        "ragemulti": process_ragemulti(a),
+        "damage": damage,
+        "special": maybe_join(specials),
+    }
 
-    s.append("}}")
 
-    return maybe_join(s, "\n")
+def generate_infobox(a):
+    return infobox_template.render(infobox_fields(a))
 
 
 def generate_infoboxes(chain):
-    if len(chain) == 1:
-        return generate_infobox(chain[0])
-    else:
-        return "\n".join(
-            [
-                "{| width=100%",
-                "\n".join("\n".join(["|-", "|", generate_infobox(a)]) for a in chain),
-                "|}",
-            ]
-        )
+    infoboxes = infobox_template.render_all(map(infobox_fields, chain))
+    if len(infoboxes) == 1:
+        return infoboxes[0]
+    return chain_template.render(infoboxes=infoboxes)
 
 
 def generate_page(chain):
-    return "\n".join(
-        [
-            "__NOTOC__",
-            generate_infoboxes(chain),
-            "<noinclude>[[Category:Abilities]]</noinclude>",
-        ]
-    )
+    return page_template.render(infoboxes=generate_infoboxes(chain))
+
+
+def render_chain(ids):
+    """Page of the chain of abilities with these ids, for parallel.Pool."""
+    return generate_page([get_content_by_id(Ability, id) for id in ids])
 
 
-def generate_pages():
+def generate_pages(workers=1):
     pages = {}
     disambiguation = {
         "First Aid (ability)": "You may be looking for the Skill '''[[First Aid]]'''.",
@@ -236,18 +240,22 @@ def generate_pages():
     )
 
     def add_disambiguation_box(title):
-        return "\n".join(
-            [
-                "{{ambox",
-                f"| type = {disambiguation[title]}",
-                "| border = yellow",
-                "}}",
-                pages[title],
-            ]
+        return disambiguation_template.render(
+            type=disambiguation[title], page=pages[title]
         )
 
-    for basename, chain in ability_chains().items():
-        pages[basename] = generate_page(chain)
+    def sanitize(title):
+        # looking at you Call Stabled Pet #1-6
+        return title.replace("#", "")
+
+    chains = ability_chains()
+    with parallel.Pool(workers, (Ability.datafile, Skill.datafile)) as pool:
+        rendered = pool.map(render_chain, ([a.id for a in c] for c in chains.values()))
+
+    for (basename, chain), (page, reads) in zip(chains.items(), rendered):
+        with deps.page(sanitize(basename)):
+            deps.record_reads(reads)
+        pages[basename] = page
         for a in chain:
             # redirect duplicates to disambiguation page
             # for duplicates, firstname should equal pre-modification basename
@@ -259,14 +267,16 @@ def generate_pages():
             if (
                 disambiguate.get(a.name, a.name) != realbasename
             ):  # already created base page
-                pages[a.name] = f"#redirect [[{realbasename}]]"
+                with deps.page(sanitize(a.name)):
+                    deps.record(a)
+                    deps.record(chain[0])
+                pages[a.name] = redirect_template.render(target=realbasename)
 
     for title in disambiguation:
         pages[title] = add_disambiguation_box(title)
 
     # sanitize page titles
-    # looking at you Call Stabled Pet #1-6
-    pages = {title.replace("#", ""): page for title, page in pages.items()}
+    pages = {sanitize(title): page for title, page in pages.items()}
 
     return pages
 
@@ -287,18 +297,23 @@ def generate_pages():
 }}"""
 
 
+def publish_pages(site, options, publisher):
+    graph = deps.DependencyGraph("ability_pages")
+    with deps.tracking(graph), metrics.stage("generate"):
+        pages = generate_pages(options.workers)
+    metrics.count("generated", len(pages))
+    graph.save()
+    pages = deps.Updates(graph.name, options.since_version).filter(pages, graph)
+    metrics.expect(len(pages))
+
+    summary = options.msg or "Create ability page"
+    publisher.publish((title, text, summary) for title, text in pages.items())
+
+
 @entrypoint
 def main(site, options):
-    for title, text in generate_pages().items():
-        page = pywikibot.Page(site, title)
-        if page.text == text:
-            pywikibot.output(f"No changes to {title}")
-            continue
-        page.text = text
-        if options.dry:
-            pywikibot.output(f"\n{title}\n{page.text}\n")
-        else:
-            page.save(summary=options.msg or "Create ability page")
+    with Publisher.from_options(site, options) as publisher:
+        publish_pages(site, options, publisher)
 
 
 if __name__ == "__main__":
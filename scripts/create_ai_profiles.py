@@ -1,28 +1,83 @@
 import sys
+from functools import lru_cache
 
-import pywikibot
+from gorgonwikibot import cdn, classify, deps, metrics, parallel
 from gorgonwikibot.content import (Ability, Ai, get_all_content,
-                                   get_content_by_iname)
+                                   get_content_by_id, get_content_by_iname)
 from gorgonwikibot.entrypoint import entrypoint
+from gorgonwikibot.publish import Publisher
+from gorgonwikibot.template import Template
+
+profile_template = Template(
+    "$[abilities:: {{Combat Ability|$abilities}}\n$]"
+    "$[rages:: {{Combat Ability Rage|$rages}}\n$]"
+    "<noinclude>[[Category:AI Profile]]</noinclude>"
+)
 
 
 def get_abilities(validator=lambda _: True, include=[]):
-    return {
-        a.iname: {
-            "Description": a.data["Description"],
-            "IconID": a.data["IconID"],
-            "Keywords": a.data.get("Keywords", []),
-        }
-        for a in get_all_content(Ability)
-        if a.iname in include or validator(a)
-    }
+    """Dict of InternalName: Description, IconID and Keywords of the abilities
+    that validator accepts or that are in include.
+
+    Reads abilities.json through cdn.get_file(), so scripts run together
+    parse it only once."""
+    abilities = {}
+    for id, data in cdn.get_file(Ability.datafile).items():
+        a = Ability(id, data)
+        if a.iname in include or validator(a):
+            abilities[a.iname] = {
+                "Description": data["Description"],
+                "IconID": data["IconID"],
+                "Keywords": data.get("Keywords", []),
+            }
+    return abilities
 
 
 def get_ais(validator=lambda _: True):
     return filter(validator, get_all_content(Ai))
 
 
-def generate_ai_profiles():
+def record_ai(ai, include_scaled=False):
+    """An ai's profile depends on all of its abilities, even ones filtered out."""
+    deps.record(ai)
+    for a in ai.abilities(include_scaled):
+        get_content_by_iname(Ability, a)  # recorded by the lookup
+
+
+def profiled_abilities():
+    """The abilities that AI profiles show, as returned by get_abilities."""
+    return _profiled_abilities(cdn.get_version())
+
+
+@lru_cache  # once per process, including parallel.Pool workers
+def _profiled_abilities(version):
+    profiled = classify.matching(
+        any_of=classify.Category.ENEMY | classify.Category.PET,
+        all_of=classify.Category.DESCRIBED,
+    )
+    return get_abilities(lambda a: a.iname in profiled)
+
+
+def ai_profile(id):
+    """Profile of the ai with this id, or None if it has no profiled abilities."""
+    ai = get_content_by_id(Ai, id)
+    abilities = profiled_abilities()
+    record_ai(ai)
+    # ignore abilities that have already been filtered out
+    alist = list(filter(lambda a: a in abilities, ai.abilities()))
+    if not alist:
+        return None
+    rages, nonrages = [], []
+    for a in alist:
+        if "RageAttack" in abilities[a]["Keywords"]:
+            rages.append(a)
+        else:
+            nonrages.append(a)
+    # we want all nonrages before all rages
+    return profile_template.render(abilities=nonrages, rages=rages)
+
+
+def generate_ai_profiles(workers=1):
     """'''AIP:Kraken'''
     : {{Combat Ability|KrakenBeak}}
     : {{Combat Ability|KrakenSlam}}
@@ -30,46 +85,38 @@ def generate_ai_profiles():
     <noinclude>[[Category:AI Profile]]</noinclude>
     """
 
-    abilities = get_abilities(
-        lambda a: (a.is_enemy or a.is_pet) and a.data["Description"]
-    )
-    ais = get_ais(lambda ai: ai.is_enemy)
-    profiles = {}
+    ais = list(get_ais(lambda ai: ai.is_enemy))
+    with parallel.Pool(workers, (Ai.datafile, Ability.datafile)) as pool:
+        rendered = pool.map(ai_profile, [ai.id for ai in ais])
 
-    for ai in ais:
-        # ignore abilities that have already been filtered out
-        alist = list(filter(lambda a: a in abilities, ai.abilities()))
-        if alist:  # ai has at least one valid ability
-            profile = ""
-            rages, nonrages = [], []
-            for a in alist:
-                if "RageAttack" in abilities[a]["Keywords"]:
-                    rages.append(a)
-                else:
-                    nonrages.append(a)
-            # we want all nonrages before all rages
-            for a in nonrages:
-                profile += ": {{Combat Ability|%s}}\n" % a
-            for a in rages:
-                profile += ": {{Combat Ability Rage|%s}}\n" % a
-            profile += "<noinclude>[[Category:AI Profile]]</noinclude>"
+    profiles = {}
+    for ai, (profile, reads) in zip(ais, rendered):
+        with deps.page(ai.name):
+            deps.record_reads(reads)
+        if profile:  # ai has at least one valid ability
             profiles[ai.name] = profile
     return profiles
 
 
+def publish_pages(site, options, publisher):
+    graph = deps.DependencyGraph("ai_profiles")
+    with deps.tracking(graph), metrics.stage("generate"):
+        profiles = generate_ai_profiles(options.workers)
+    metrics.count("generated", len(profiles))
+    graph.save()
+    profiles = deps.Updates(graph.name, options.since_version).filter(profiles, graph)
+    metrics.expect(len(profiles))
+
+    summary = options.msg or "Create AI Profile page"
+    publisher.publish(
+        (f"AIP:{name}", profile, summary) for name, profile in profiles.items()
+    )
+
+
 @entrypoint
 def main(site, options):
-    for name, profile in generate_ai_profiles().items():
-        title = f"AIP:{name}"
-        page = pywikibot.Page(site, title)
-        if page.text == profile:
-            pywikibot.output(f"No changes to {title}")
-            continue
-        page.text = profile
-        if options.dry:
-            pywikibot.output(f"\n{title}\n{page.text}\n")
-        else:
-            page.save(summary=options.msg or "Create AI Profile page")
+    with Publisher.from_options(site, options) as publisher:
+        publish_pages(site, options, publisher)
 
 
 if __name__ == "__main__":
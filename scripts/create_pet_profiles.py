@@ -1,9 +1,32 @@
 import sys
 
 import pywikibot
+from gorgonwikibot import classify, deps, metrics
 from gorgonwikibot.content import Ability, get_content_by_iname
 from gorgonwikibot.entrypoint import entrypoint
-from scripts.create_ai_profiles import get_abilities, get_ais
+from gorgonwikibot.publish import Publisher
+from gorgonwikibot.template import Template
+from scripts.create_ai_profiles import get_abilities, get_ais, record_ai
+
+level_table_template = Template(
+    '{| class="mw-collapsible mw-collapsed"\n'
+    # css for toggle link
+    '$first || style="width:100%; text-align:right;" |'
+    "$[rows:\n|-\n$rows$]\n|}"
+)
+level_row_template = Template("| Level $levels: || $ability")
+profile_template = Template(
+    '{| class="wikitable extimage32px" style="white-space:nowrap;"\n'
+    "| Basic Attack: || $basic\n"
+    "|-\n"
+    "| Sic 'Em Attack: || \n"
+    "$sic\n"
+    "|-\n"
+    "| Special Trick: || \n"
+    "$trick\n"
+    "|}\n"
+    "<noinclude>[[Category:Pet Profile]]</noinclude>"
+)
 
 
 def basic_ability(a):
@@ -25,60 +48,51 @@ def split_ability(a):
     )
 
 
+def level_row(ai, a):
+    ability_data = ai.data["Abilities"][a.iname]
+    min = ability_data.get("minLevel", 1)
+    max = ability_data.get("maxLevel")
+    levels = f"{min}-{max}" if max else f"{min}+"
+    return {"levels": levels, "ability": split_ability(a)}
+
+
 def level_table(ai, abilities):
-    rows = []
-
-    for a in abilities:
-        ability_data = ai.data["Abilities"][a.iname]
-        min = ability_data.get("minLevel", 1)
-        max = ability_data.get("maxLevel")
-
-        rows.append(
-            "".join(
-                [
-                    f"| Level {min}",
-                    f"-{max}" if max else "+",
-                    f": || {split_ability(a)}",
-                ]
-            )
-        )
+    rows = level_row_template.render_all(level_row(ai, a) for a in abilities)
+    return level_table_template.render(first=rows[0], rows=rows[1:])
 
-    # css for toggle link
-    rows[0] += ' || style="width:100%; text-align:right;" |'
 
-    return "\n".join(
-        [
-            '{| class="mw-collapsible mw-collapsed"',
-            "\n|-\n".join(rows),
-            "|}",
-        ]
-    )
+# Grimalkin_Pet and Grimalkin_PetHissy use these for their basic attack.
+# they are the only pets that use non-pet abilities.
+basic_attack_overrides = ["GrimalkinBite", "GrimalkinClaw"]
+
+
+def which_pet_command(a):
+    if a.iname in basic_attack_overrides:
+        return Ability.PetCommands.BASIC
+    return classify.pet_command(a.iname)
 
 
 def generate_pet_profiles():
-    abilities = get_abilities(lambda a: a.is_pet, ["GrimalkinBite", "GrimalkinClaw"])
+    pets = classify.pet_abilities()
+    abilities = get_abilities(lambda a: a.iname in pets, basic_attack_overrides)
     ais = get_ais(lambda ai: ai.is_pet)
     profiles = {}
 
-    # Grimalkin_Pet and Grimalkin_PetHissy use these for their basic attack.
-    # they are the only pets that use non-pet abilities.
-    # just monkey-patch these because they're a special case.
-    for name in ["GrimalkinBite", "GrimalkinClaw"]:
-        abilities[name]["Keywords"].append("PetBasicAttack")
-
     for ai in ais:
-        # ignore abilities that have already been filtered out
-        # and get Ability instances from the ai ability list
-        alist = [
-            get_content_by_iname(Ability, a)
-            for a in ai.abilities(include_scaled=True)
-            if a in abilities
-        ]
+        with deps.page(ai.name):
+            record_ai(ai, include_scaled=True)
+            # ignore abilities that have already been filtered out
+            # and get Ability instances from the ai ability list
+            alist = [
+                get_content_by_iname(Ability, a)
+                for a in ai.abilities(include_scaled=True)
+                if a in abilities
+            ]
         if alist:  # ai has at least one valid ability
             cmds = {cmd: [] for cmd in Ability.PetCommands}
             for a in alist:
                 try:
-                    cmds[a.which_pet_command].append(a)
+                    cmds[which_pet_command(a)].append(a)
                 except ValueError:
                     pywikibot.output(
                         f"WARNING: Skipped ability {a.name} for AI {ai.name} because it is not a pet command\n"
@@ -88,37 +102,34 @@ def generate_pet_profiles():
                 [basic_ability(a) for a in cmds[Ability.PetCommands.BASIC]]
             )
 
-            profiles[ai.name] = "\n".join(
-                [
-                    '{| class="wikitable extimage32px" style="white-space:nowrap;"',
-                    f"| Basic Attack: || {basic_text}",
-                    "|-",
-                    "| Sic 'Em Attack: || ",
-                    level_table(ai, cmds[Ability.PetCommands.SIC]),
-                    "|-",
-                    "| Special Trick: || ",
-                    level_table(ai, cmds[Ability.PetCommands.TRICK]),
-                    "|}",
-                    "<noinclude>[[Category:Pet Profile]]</noinclude>",
-                ]
+            profiles[ai.name] = profile_template.render(
+                basic=basic_text,
+                sic=level_table(ai, cmds[Ability.PetCommands.SIC]),
+                trick=level_table(ai, cmds[Ability.PetCommands.TRICK]),
             )
 
     return profiles
 
 
+def publish_pages(site, options, publisher):
+    graph = deps.DependencyGraph("pet_profiles")
+    with deps.tracking(graph), metrics.stage("generate"):
+        profiles = generate_pet_profiles()
+    metrics.count("generated", len(profiles))
+    graph.save()
+    profiles = deps.Updates(graph.name, options.since_version).filter(profiles, graph)
+    metrics.expect(len(profiles))
+
+    summary = options.msg or "Create Pet Profile page"
+    publisher.publish(
+        (f"AIP:{name}", profile, summary) for name, profile in profiles.items()
+    )
+
+
 @entrypoint
 def main(site, options):
-    for name, profile in generate_pet_profiles().items():
-        title = f"AIP:{name}"
-        page = pywikibot.Page(site, title)
-        if page.text == profile:
-            pywikibot.output(f"No changes to {title}\n")
-            continue
-        page.text = profile
-        if options.dry:
-            pywikibot.output(f"{title}\n{page.text}\n")
-        else:
-            page.save(summary=options.msg or "Create Pet Profile page")
+    with Publisher.from_options(site, options) as publisher:
+        publish_pages(site, options, publisher)
 
 
 if __name__ == "__main__":
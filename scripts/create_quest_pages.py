@@ -1,13 +1,58 @@
 import sys
 
 import pywikibot
+from gorgonwikibot import cdn, deps, metrics, parallel
 from gorgonwikibot.content import get_all_content, get_content_by_match
 from gorgonwikibot.entrypoint import entrypoint
-from gorgonwikibot.quest import Quest
-
-
-@entrypoint
-def main(site, options):
+from gorgonwikibot.publish import Publisher, batched
+from gorgonwikibot.store import Journal
+from gorgonwikibot.quest import Quest, render_quests
+
+
+def render_batch(ids):
+    """(source, notices, errors) and reads of each quest with these ids, for
+    parallel.Pool. What the quests link to is looked up for all of them at once.
+
+    If rendering fails, the source is None and the exception is the error.
+    """
+    # fresh objects, so that errors and notices of earlier renders don't pile up
+    data = cdn.get_file(Quest.datafile)
+    quests = [Quest(id, data[id]) for id in ids]
+    results = []
+    for quest, (source, e, reads) in zip(quests, render_quests(quests)):
+        errors = quest.errors
+        if e is not None:
+            errors = [*errors, f"{type(e).__name__}: {e}"]
+        results.append(((source, quest.notices, errors), reads))
+    return results
+
+
+def render_quest(id):
+    """Source, notices and errors of the quest with this id, for parallel.Pool."""
+    [(result, _)] = render_batch([id])
+    return result
+
+
+def error_report(review):
+    """Text listing the quests to review by type of error.
+
+    review is a dict of quest name: list of errors. The type of an error is
+    the part of its message before the first colon, like "Unknown requirement".
+    """
+    groups = {}
+    for name, errors in sorted(review.items()):
+        for error in errors:
+            kind, _, detail = error.partition(":")
+            entry = f"* {name}: {detail.strip()}" if detail else f"* {name}"
+            groups.setdefault(kind, []).append(entry)
+    lines = [f"{len(review)} quests with errors were not saved and need review."]
+    for kind, entries in sorted(groups.items(), key=lambda g: (-len(g[1]), g[0])):
+        lines.append(f"\n{kind} ({len(entries)}):")
+        lines.extend(entries)
+    return "\n".join(lines)
+
+
+def publish_pages(site, options, publisher):
     # Get quest list
     if options.quest:
         quests = [get_content_by_match(Quest, "Name", options.quest)]
@@ -17,51 +62,108 @@ def main(site, options):
     quest_blacklist = ["KillSkeletons", "VisitGravestones"]
     offset = options.offset
 
-    for quest in quests[offset:]:
-        offset += 1
-
-        if quest.data["InternalName"] in quest_blacklist:
-            continue
-
-        if "Keywords" in quest.data and "WorkOrder" in quest.data["Keywords"]:
-            # Skip work orders
-            # pywikibot.output("Skipping work order quest")
-            continue
-        if "FavorNpc" not in quest.data:
-            pywikibot.output(f"Skipping quest without FavorNpc: {quest.name}")
-            continue
-        if quest.data["FavorNpc"] == "":
-            pywikibot.output(f"Skipping quest with empty FavorNpc: {quest.name}")
-            continue
-
-        pywikibot.output(f"Loading {quest.name}...")
-        page = pywikibot.Page(site, quest.name)
-        source = quest.wiki_source()
-
-        if page.text == source:
-            pywikibot.output(f"No changes to {quest.name}\n")
-            continue
-
-        if not page.exists():
-            pywikibot.output(f"Missing page for quest {quest.name}")
-
-        pywikibot.output(f"Current offset is {offset}")
-
-        page.text = source
-
-        if quest.notices:
-            pywikibot.output(
-                "##################### NOTICE:\n" + "\n".join(quest.notices)
-            )
-        if quest.errors:
-            pywikibot.output("\n\nERRORS:\n" + "\n".join(quest.errors))
-            raise RuntimeError("Something is not right, see console output")
-
-        if options.dry:
-            pywikibot.output(page.text + "\n\n")
-        else:
-            page.save(summary=options.msg or "Create quest page")
-            pywikibot.output(f"Page saved for quest {quest.name}")
+    # quests that aren't regenerated keep their dependencies from the previous run
+    graph = deps.DependencyGraph("quest_pages")
+    updates = deps.Updates(graph.name, options.since_version)
+    if updates.previous:
+        graph.pages.update(updates.previous.pages)
+
+    # what happened to each quest, so that --resume can skip those already done
+    journal = Journal(graph.name, site)
+    review = {}  # quest name: errors
+    finished = set()
+    if options.resume:
+        finished = journal.finished()
+        for name, (outcome, detail) in journal.outcomes().items():
+            if outcome == "review":
+                review[name] = detail.split("\n")
+        pywikibot.output(f"Resuming after {len(finished)} finished quests")
+    elif not options.dry:
+        journal.clear()
+
+    def generate():
+        nonlocal offset
+        for quest in quests[offset:]:
+            offset += 1
+
+            if quest.data["InternalName"] in quest_blacklist:
+                continue
+
+            if "Keywords" in quest.data and "WorkOrder" in quest.data["Keywords"]:
+                # Skip work orders
+                # pywikibot.output("Skipping work order quest")
+                continue
+            if "FavorNpc" not in quest.data:
+                pywikibot.output(f"Skipping quest without FavorNpc: {quest.name}")
+                continue
+            if quest.data["FavorNpc"] == "":
+                pywikibot.output(f"Skipping quest with empty FavorNpc: {quest.name}")
+                continue
+
+            if quest.name not in updates or quest.name in finished:
+                continue
+
+            yield quest
+
+    def render(pool, batch):
+        ids = [quest.id for quest in batch]
+        size = -(-len(ids) // pool.workers)  # a part of the batch for each worker
+        with metrics.stage("generate"):
+            parts = pool.map(render_batch, list(batched(ids, size)))
+        rendered = [r for results, _ in parts for r in results]
+        metrics.count("generated", len(batch))
+        for quest, (result, reads) in zip(batch, rendered):
+            source, notices, errors = result
+            graph.pages.pop(quest.name, None)
+            with deps.tracking(graph), deps.page(quest.name):
+                deps.record_reads(reads)
+            quest.notices[:], quest.errors[:] = notices, errors
+            metrics.count("errors", len(errors))
+            yield quest, source
+
+    def pages(pool):
+        summary = options.msg or "Create quest page"
+        for batch in batched(todo, 50):
+            for quest, source in render(pool, batch):
+                if quest.notices:
+                    pywikibot.output(
+                        f"NOTICE for {quest.name}:\n" + "\n".join(quest.notices)
+                    )
+                # quests with errors go to review instead of stopping the run
+                if quest.errors:
+                    pywikibot.output(
+                        f"ERRORS in {quest.name}:\n" + "\n".join(quest.errors)
+                    )
+                    review[quest.name] = quest.errors
+                    metrics.page_done("review")
+                    if not options.dry:
+                        journal.put(quest.name, "review", "\n".join(quest.errors))
+                    continue
+                yield quest.name, source, summary
+
+    todo = list(generate())
+    metrics.expect(len(todo))
+
+    # quests are rendered in batches while earlier ones are fetched and saved
+    try:
+        with journal, parallel.Pool(options.workers) as pool:
+            try:
+                publisher.publish(pages(pool), journal=None if options.dry else journal)
+            finally:
+                # the last saves go into the journal too, even if the run stopped
+                publisher.wait()
+    finally:
+        # --resume skips the quests done so far, so keep their dependencies
+        graph.save()
+
+    if review:
+        pywikibot.output(error_report(review))
+
+
+@entrypoint
+def main(site, options):
+    with Publisher.from_options(site, options) as publisher:
+        publish_pages(site, options, publisher)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import sys
 
+from gorgonwikibot import classify
 from scripts.create_ai_profiles import get_abilities
 
 
@@ -10,11 +11,10 @@ def write_template(abilities, key, filename):
 
 if __name__ == "__main__":
 
-    def validator(a):
-        return not a.is_player
+    nonplayer = classify.matching(none_of=classify.Category.PLAYER)
 
     abilities = {}
-    for k, v in get_abilities(validator).items():
+    for k, v in get_abilities(lambda a: a.iname in nonplayer).items():
         if not v["Description"]:
             v["Description"] = "(No Description)"
         abilities[k] = v
@@ -0,0 +1,34 @@
+import argparse
+import sys
+
+from gorgonwikibot import cdn, synthetic
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Write synthetic data files shaped like the real ones, "
+        "to use without the CDN."
+    )
+    parser.add_argument("cache_dir", help="directory to write the data files into")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1,
+        help="number of records relative to the real files",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "--cdn-version",
+        default=synthetic.VERSION,
+        help=f"version number to write the files as (default: {synthetic.VERSION})",
+    )
+    options = parser.parse_args(argv[1:])
+
+    synthetic.install(
+        options.cache_dir, options.scale, options.seed, options.cdn_version
+    )
+    print(f"Wrote synthetic data files for v{cdn.get_version()} to {cdn.get_path()}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
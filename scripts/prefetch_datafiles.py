@@ -0,0 +1,38 @@
+import argparse
+import sys
+
+from gorgonwikibot import cdn
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Download all data files for a version into the local cache."
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        default=cdn.DATAFILES,
+        help=f"data files to download (default: {' '.join(cdn.DATAFILES)})",
+    )
+    parser.add_argument(
+        "--cdn-version",
+        help="download this version of the data files instead of the latest one",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="maximum number of concurrent downloads",
+    )
+    options = parser.parse_args(argv[1:])
+    cdn.configure(options.cdn_version)
+
+    downloaded = cdn.prefetch(options.files, options.workers)
+    print(
+        f"Downloaded {len(downloaded)} of {len(options.files)} files "
+        f"for v{cdn.get_version()} to {cdn.get_path()}"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
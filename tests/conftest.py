@@ -1,7 +1,33 @@
 import pytest
+import pywikibot
+from gorgonwikibot import cdn, synthetic
 from gorgonwikibot.content import Ability, Ai
 
 
+@pytest.fixture(scope="session")
+def synthetic_cache(tmp_path_factory):
+    cache_dir = tmp_path_factory.mktemp("cdn")
+    synthetic.install(cache_dir, scale=0.1)
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def offline_data(synthetic_cache):
+    """Tests use synthetic data files instead of downloading the real ones."""
+    cdn.configure(synthetic.VERSION, offline=True, cache_dir=synthetic_cache)
+
+
+@pytest.fixture
+def no_throttle(monkeypatch):
+    """Lets pywikibot edit a FakeWiki as fast as it can."""
+    config = pywikibot.config
+    monkeypatch.setattr(config, "put_throttle", 0)
+    monkeypatch.setattr(config, "minthrottle", 0)
+    # FakeWiki.site() makes its wiki the default
+    monkeypatch.setattr(config, "family", config.family)
+    monkeypatch.setattr(config, "mylang", config.mylang)
+
+
 @pytest.fixture
 def dummy_ability():
     def _dummy(id=None, custom=None):
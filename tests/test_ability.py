@@ -70,3 +70,12 @@ def test_which_pet_command(dummy_ability, which, data):
 def test_no_pet_command(dummy_ability):
     with pytest.raises(ValueError):
         dummy_ability().which_pet_command
+
+
+def test_cached_classification(dummy_ability):
+    a = dummy_ability(custom={"InternalName": "xPet3"})
+    assert not hasattr(a, "__dict__")
+    assert a.is_pet and not a.is_enemy
+    a.data["AttributesThatDeltaPowerCost"] = []
+    # computed once per object
+    assert a.is_pet and not a.is_player
@@ -0,0 +1,169 @@
+import gzip
+import io
+import json
+import os
+
+import pytest
+from gorgonwikibot import cdn
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    (tmp_path / "v1").mkdir()
+    cdn.configure(version=1)
+    yield tmp_path / "v1"
+    cdn.configure()
+
+
+def test_snapshot_written(cache):
+    cdn.store("items", {"item_1": {"Name": "A"}})
+    assert cdn.get_file("items") == {"item_1": {"Name": "A"}}
+    assert (cache / "items.marshal").exists()
+    cdn.clear_caches()
+    assert cdn.get_file("items") == {"item_1": {"Name": "A"}}
+
+
+def test_stale_snapshot(cache):
+    cdn.store("items", {"item_1": {"Name": "A"}})
+    cdn.get_file("items")
+    cdn.clear_caches()
+    cdn.store("items", {"item_1": {"Name": "B"}})
+    assert cdn.get_file("items") == {"item_1": {"Name": "B"}}
+
+
+def test_unreadable_snapshot(cache):
+    cdn.store("items", {"item_1": {"Name": "A"}})
+    (cache / "items.marshal").write_bytes(b"garbage")
+    assert cdn.get_file("items") == {"item_1": {"Name": "A"}}
+
+
+def test_offline_uses_newest_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    for version in ["9", "10", "unrelated"]:
+        (tmp_path / f"v{version}").mkdir()
+    cdn.configure(offline=True)
+    try:
+        assert cdn.cached_versions() == ["9", "10"]
+        assert cdn.get_version() == "10"
+        with pytest.raises(FileNotFoundError):
+            cdn.get_file("items")
+    finally:
+        cdn.configure()
+
+
+class Response:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise cdn.requests.HTTPError(f"{self.status_code} error")
+
+
+def test_version_ttl(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    (tmp_path / "fileversion.txt").write_text("123\n")
+    cdn.configure()
+    assert cdn.get_version() == "123"  # fresh enough, so no request is made
+    os.utime(tmp_path / "fileversion.txt", (0, 0))
+
+    monkeypatch.setattr(cdn.requests, "get", lambda url, timeout: Response("124"))
+    cdn.configure()
+    assert cdn.get_version() == "124"
+    assert (tmp_path / "fileversion.txt").read_text() == "124"
+    cdn.configure()
+
+
+@pytest.mark.parametrize(
+    "response", [Response("<html>Log in</html>"), Response("125", status_code=503)]
+)
+def test_bad_version_response(tmp_path, monkeypatch, response):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    (tmp_path / "v123").mkdir()
+    monkeypatch.setattr(cdn.requests, "get", lambda url, timeout: response)
+    cdn.configure()
+    try:
+        assert cdn.get_version() == "123"  # the newest cached version
+    finally:
+        cdn.configure()
+    assert not (tmp_path / "fileversion.txt").exists()
+
+
+def test_prefetch(cache, monkeypatch):
+    cdn.store("items", {})
+    fetched = []
+
+    def download(file, session=None):
+        fetched.append(file)
+        return gzip.compress(json.dumps({f"{file}_1": {}}).encode())
+
+    monkeypatch.setattr(cdn, "_download", download)
+    assert sorted(cdn.prefetch(["items", "ai", "npcs"], workers=2)) == ["ai", "npcs"]
+    assert sorted(fetched) == ["ai", "npcs"]
+    assert cdn.get_file("npcs") == {"npcs_1": {}}
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda cache: (cache / "items.json.gz").write_bytes(b"truncated"),
+        lambda cache: (cache / "items.sha256").write_text("0"),
+        lambda cache: (cache / "items.sha256").unlink(),
+        lambda cache: (cache / "items.json.gz").unlink(),
+    ],
+)
+def test_redownload_corrupt(cache, monkeypatch, corrupt):
+    cdn.store("items", {"item_1": {"Name": "A"}})
+    corrupt(cache)
+    monkeypatch.setattr(
+        cdn,
+        "_download",
+        lambda file, version=None: gzip.compress(b'{"item_1": {"Name": "B"}}'),
+    )
+    assert cdn.get_file("items", snapshot=False) == {"item_1": {"Name": "B"}}
+    cdn.clear_caches()
+    assert cdn.get_file("items", snapshot=False) == {"item_1": {"Name": "B"}}
+
+
+def test_no_leftover_files(cache):
+    cdn.store("items", {})
+    cdn.get_file("items")
+    assert sorted(os.listdir(cache)) == [
+        "items.json.gz",
+        "items.marshal",
+        "items.sha256",
+    ]
+
+
+def test_checksums_of_older_caches(cache):
+    cdn.store("items", {"item_1": {"Name": "A"}})
+    checksum = cdn.checksum("items")
+    (cache / "items.sha256").unlink()
+    (cache / "manifest.json").write_text(json.dumps({"items": checksum}))
+    assert cdn.get_file("items", snapshot=False) == {"item_1": {"Name": "A"}}
+    assert cdn.checksum("items") == checksum
+
+
+def test_iter_file(cache):
+    contents = {f"item_{i}": {"Name": str(i), "Value": i * 1.5} for i in range(100)}
+    contents["item_0"]["Keywords"] = ["a", {"b": [1, 2]}]
+    cdn.store("items", contents)
+    assert dict(cdn.iter_file("items")) == contents
+    assert list(cdn.iter_file("items", ["Value", "Keywords"]))[:2] == [
+        ("item_0", {"Value": 0.0, "Keywords": ["a", {"b": [1, 2]}]}),
+        ("item_1", {"Value": 1.5}),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+def test_iter_object_chunks(chunk_size):
+    text = '{"a": 12345, "b" : {"c": [1.5e3, true, null]},\n"d": "\\u00e9"}'
+    assert dict(cdn._iter_object(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a": 1,}', '{"a" 1}', "[1]", ""])
+def test_iter_object_invalid(text):
+    with pytest.raises(ValueError):
+        list(cdn._iter_object(io.StringIO(text), 2))
@@ -0,0 +1,63 @@
+import pytest
+from gorgonwikibot import cdn, classify
+from gorgonwikibot.classify import Category
+from gorgonwikibot.content import Ability
+
+
+@pytest.fixture
+def abilities(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    cdn.store(
+        "abilities",
+        {
+            "ability_1": {
+                "InternalName": "Slash",
+                "Description": "_",
+                "AttributesThatDeltaPowerCost": [],
+            },
+            "ability_2": {
+                "InternalName": "PetBite",
+                "Description": "_",
+                "Keywords": ["PetBasicAttack"],
+            },
+            "ability_3": {"InternalName": "RatBite", "Description": "_"},
+            "ability_4": {"InternalName": "RatRage", "Description": ""},
+            "ability_5": {"InternalName": "MinigolemPunch"},
+        },
+        1,
+    )
+    cdn.configure(version=1, offline=True)
+    classify._table.cache_clear()
+    classify._matching.cache_clear()
+    yield tmp_path / "v1"
+    cdn.configure()
+
+
+def test_classify(dummy_ability):
+    assert classify.classify(
+        dummy_ability(custom={"InternalName": "PetA1", "Keywords": ["PetA"]})
+    ) == (Category.PET | Category.DESCRIBED, Ability.PetCommands.SIC.value)
+    assert classify.classify(dummy_ability(custom={"Description": ""})) == (
+        Category.ENEMY,
+        0,
+    )
+
+
+def test_matching(abilities):
+    assert classify.pet_abilities() == {"PetBite"}
+    assert classify.enemy_abilities() == {"RatBite", "RatRage"}
+    assert classify.enemy_abilities(described=True) == {"RatBite"}
+    assert classify.matching(none_of=Category.PLAYER | Category.ENEMY) == {
+        "PetBite",
+        "MinigolemPunch",
+    }
+    assert classify.pet_command("PetBite") == Ability.PetCommands.BASIC
+    with pytest.raises(ValueError):
+        classify.pet_command("RatBite")
+
+
+def test_disk_cache(abilities):
+    table = classify.get_table()
+    assert (abilities / "classification.json").exists()
+    classify._table.cache_clear()
+    assert classify.get_table() == table
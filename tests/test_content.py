@@ -0,0 +1,56 @@
+import pytest
+from gorgonwikibot import cdn
+from gorgonwikibot.content import (Content, Skill, get_all_content,
+                                   get_content_by_id, get_content_by_iname,
+                                   get_content_by_match, get_index_collisions,
+                                   get_name_from_iname)
+
+
+@pytest.fixture
+def dummy_cls(monkeypatch):
+    data = {
+        "a_1": {"InternalName": "A", "Name": "Same"},
+        "a_2": {"InternalName": "B", "Name": "Same"},
+        "a_3": {"InternalName": "C", "Name": ["unhashable"]},
+        "a_4": {"Name": "No InternalName"},
+    }
+    monkeypatch.setattr(cdn, "get_file", lambda file: data)
+
+    class Dummy(Content):
+        datafile = "dummy"
+
+    return Dummy
+
+
+def test_match(dummy_cls):
+    content = get_content_by_match(dummy_cls, "InternalName", "B")
+    assert (content.id, content.name) == ("a_2", "Same")
+    assert get_content_by_iname(dummy_cls, "C").id == "a_3"
+    assert get_name_from_iname(dummy_cls, "A") == "Same"
+
+
+def test_no_match(dummy_cls):
+    assert get_content_by_match(dummy_cls, "InternalName", "D") is None
+    assert get_content_by_match(dummy_cls, "Missing", "A") is None
+
+
+def test_collisions(dummy_cls):
+    # the first record wins, as with a linear scan
+    assert get_content_by_match(dummy_cls, "Name", "Same").id == "a_1"
+    assert get_index_collisions(dummy_cls, "Name") == {"Same": ["a_1", "a_2"]}
+    assert get_index_collisions(dummy_cls, "InternalName") == {}
+
+
+def test_lookups_follow_the_data_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    for version, name in ((1, "Old"), (2, "New")):
+        cdn.store("skills", {"Sword": {"Name": name}}, version)
+    try:
+        names = []
+        for version in (1, 2):
+            cdn.configure(version=version, offline=True)
+            names.append(get_content_by_id(Skill, "Sword").name)
+            names.append(get_all_content(Skill)[0].name)
+    finally:
+        cdn.configure()
+    assert names == ["Old", "Old", "New", "New"]
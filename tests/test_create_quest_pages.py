@@ -0,0 +1,116 @@
+import pytest
+from gorgonwikibot import cdn, deps, publish, synthetic
+from gorgonwikibot.fakewiki import FakeWiki
+from gorgonwikibot.store import Journal
+from scripts import create_quest_pages
+from scripts.create_quest_pages import error_report
+
+pytestmark = pytest.mark.usefixtures("no_throttle")
+
+
+@pytest.fixture
+def quest_data(tmp_path):
+    """Synthetic data in which two of the quests the script renders have errors
+    and one fails to render. Returns the names of those quests."""
+    files = synthetic.generate(scale=0.1)
+    quests = [
+        q
+        for q in files["quests"].values()
+        if q.get("FavorNpc")
+        and q["InternalName"] not in ("KillSkeletons", "VisitGravestones")
+        and "WorkOrder" not in q.get("Keywords", [])
+    ]
+    quests[0]["SomeNewKey"] = 1
+    quests[1]["SomeNewKey"] = 1
+    quests[1]["Requirements"] = [{"T": "SomeNewRequirement"}]
+    quests[2]["Requirements"] = []
+    cdn.configure(synthetic.VERSION, offline=True, cache_dir=tmp_path)
+    for file, contents in files.items():
+        cdn.store(file, contents)
+    return [q["Name"] for q in quests]
+
+
+def run(tmp_path, *args):
+    argv = ["create_quest_pages.py", "--offline", "--cache-dir", str(tmp_path)]
+    create_quest_pages.main(argv + list(args))
+
+
+def test_error_report():
+    report = error_report(
+        {
+            "B": ["Unhandled key: X", "Unknown requirement: 'Y'"],
+            "A": ["Unhandled key: Z"],
+            "C": ["Something broke"],
+        }
+    )
+    assert report.splitlines() == [
+        "3 quests with errors were not saved and need review.",
+        "",
+        "Unhandled key (2):",
+        "* A: Z",
+        "* B: X",
+        "",
+        "Something broke (1):",
+        "* C",
+        "",
+        "Unknown requirement (1):",
+        "* B: 'Y'",
+    ]
+
+
+def test_errors_go_to_review(quest_data, tmp_path, capsys):
+    with FakeWiki() as wiki:
+        site = wiki.site()
+        run(tmp_path)
+        assert wiki.text(quest_data[3]) is not None
+        for name in quest_data[:3]:
+            assert wiki.text(name) is None
+    with Journal("quest_pages", site) as journal:
+        outcomes = journal.outcomes()
+    assert {n for n, (o, _) in outcomes.items() if o == "review"} == set(quest_data[:3])
+    assert sorted(outcomes[quest_data[1]][1].splitlines()) == [
+        "Unhandled key: SomeNewKey",
+        "Unknown requirement: 'SomeNewRequirement'",
+    ]
+    assert "IndexError" in outcomes[quest_data[2]][1]
+    # pywikibot prints to stdout or stderr, depending on how it was set up
+    assert "3 quests with errors" in "".join(capsys.readouterr())
+
+
+def test_resume(quest_data, tmp_path, monkeypatch):
+    preload = publish.preload
+    batches = []
+
+    def interrupted(site, titles):
+        if batches:
+            raise KeyboardInterrupt
+        batches.append(list(titles))
+        return preload(site, batches[-1])
+
+    with FakeWiki() as wiki:
+        wiki.site()
+        monkeypatch.setattr(publish, "preload", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            run(tmp_path)
+        saved = wiki.stats["saved"]
+        assert saved == len(batches[0])
+        # the quests done so far keep their dependencies
+        assert set(batches[0]) <= set(deps.DependencyGraph.load("quest_pages").pages)
+
+        monkeypatch.setattr(publish, "preload", preload)
+        run(tmp_path, "--resume")
+        # the first batch isn't fetched or saved again
+        assert wiki.stats["saved"] == len(quest_data) - 3
+        assert wiki.stats["nochange"] == 0
+        for title in batches[0]:
+            assert wiki.pages[title][-1]["revid"] <= saved
+
+
+def test_render_quest_again(quest_data):
+    [id] = [
+        id for id, q in cdn.get_file("quests").items() if q.get("Name") == quest_data[0]
+    ]
+    # errors and notices don't pile up in a cached quest
+    for _ in range(3):
+        _, _, errors = create_quest_pages.render_quest(id)
+        assert errors == ["Unhandled key: SomeNewKey"]
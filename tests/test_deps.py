@@ -0,0 +1,56 @@
+import pytest
+from gorgonwikibot import cdn, deps
+from gorgonwikibot.content import (Item, Skill, get_content_by_id,
+                                   get_content_by_iname)
+
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    cdn.store("items", {"item_1": {"InternalName": "A"}}, 1)
+    cdn.store("skills", {"Fishing": {}, "Cooking": {}}, 1)
+    cdn.store("items", {"item_1": {"InternalName": "A", "Value": 1}}, 2)
+    cdn.store("skills", {"Fishing": {}, "Cooking": {}}, 2)
+    cdn.configure(version=2, offline=True)
+    yield
+    cdn.configure()
+
+
+def test_page_records_lookups(versions):
+    graph = deps.DependencyGraph("test")
+    with deps.tracking(graph):
+        with deps.page("Page"):
+            get_content_by_iname(Item, "A")
+            get_content_by_id(Skill, "Fishing")
+        with deps.page("Other Page"):
+            get_content_by_id(Skill, "Fishing")  # cached, but still recorded
+    get_content_by_id(Skill, "Cooking")  # outside of any page
+    assert graph.pages == {
+        "Page": {("items", "item_1"), ("skills", "Fishing")},
+        "Other Page": {("skills", "Fishing")},
+    }
+
+
+def test_save_load(versions):
+    graph = deps.DependencyGraph("test", {"Page": {("items", "item_1")}})
+    graph.save(1)
+    assert deps.DependencyGraph.load("test", 1).pages == graph.pages
+    assert deps.DependencyGraph.load("test", 2) is None
+
+
+def test_updates(versions):
+    pages = {"Item": {("items", "item_1")}, "Skill": {("skills", "Fishing")}}
+    deps.DependencyGraph("test", pages).save(1)
+    updates = deps.Updates("test", 1)
+    assert "Item" in updates and "Skill" not in updates
+    assert "New Page" in updates
+    graph = deps.DependencyGraph("test", {"Skill": {("items", "item_1")}})
+    generated = {"Item": "", "Skill": "", "New Page": ""}
+    assert updates.filter(generated, graph) == generated
+    assert updates.filter(generated, deps.DependencyGraph("test", pages)) == {
+        "Item": "",
+        "New Page": "",
+    }
+    # without an earlier graph, everything is updated
+    assert "Skill" in deps.Updates("missing", 1)
+    assert "Skill" in deps.Updates("test")
@@ -0,0 +1,55 @@
+import pytest
+from gorgonwikibot import cdn
+from gorgonwikibot.diff import changed_keys, diff_versions
+
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    cdn.configure(offline=True)
+    cdn.store("ai", {"A": {"Abilities": {}}}, 1)
+    cdn.store("ai", {"A": {"Abilities": {}}}, 2)
+    cdn.store(
+        "items",
+        {
+            "item_1": {"Name": "A", "Value": 1},
+            "item_2": {"Name": "B"},
+            "item_3": {"Name": "C", "Keywords": ["x"]},
+        },
+        1,
+    )
+    cdn.store(
+        "items",
+        {
+            "item_1": {"Name": "A", "Value": 1},
+            "item_3": {"Name": "C", "Keywords": ["x", "y"], "Value": 2},
+            "item_4": {"Name": "D"},
+        },
+        2,
+    )
+    yield
+    cdn.configure()
+
+
+def test_changed_keys():
+    assert changed_keys({"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 3, "d": 4}) == [
+        "b",
+        "c",
+        "d",
+    ]
+
+
+def test_diff_versions(versions):
+    changes = diff_versions(1, 2, ["ai", "items"])
+    assert not changes["ai"]
+    items = changes["items"]
+    assert items.added == ["item_4"]
+    assert items.removed == ["item_2"]
+    assert items.modified == {"item_3": ["Keywords", "Value"]}
+    assert changes.changed_records() == {
+        ("items", "item_2"),
+        ("items", "item_3"),
+        ("items", "item_4"),
+    }
+    assert "items: 1 added, 1 removed, 1 modified" in changes.summary()
+    assert not diff_versions(2, 2, ["ai", "items"])
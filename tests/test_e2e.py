@@ -1,14 +1,23 @@
 import pytest
 import pywikibot
+from gorgonwikibot import cdn
+from gorgonwikibot.publish import preload
 from scripts import create_ability_pages, create_ai_profiles
 
 
+@pytest.fixture
+def live_data(offline_data):
+    """The real data files from the CDN, in place of the synthetic ones."""
+    cdn.configure()
+
+
 @pytest.fixture(scope="session")
 def site():
     return pywikibot.Site()
 
 
 @pytest.mark.slow
+@pytest.mark.usefixtures("live_data")
 @pytest.mark.parametrize(
     "fn,title_template",
     [
@@ -18,9 +27,9 @@ def site():
 )
 def test_compare_wiki(site, fn, title_template):
     errors = []
-    for name, text in fn().items():
-        title = title_template.format(name)
-        page = pywikibot.Page(site, title)
-        if not page.text == text:
+    pages = {title_template.format(name): text for name, text in fn().items()}
+    wiki = preload(site, pages)
+    for title, text in pages.items():
+        if not wiki[title].text == text:
             errors.append(title)
     assert not errors, f"These pages have text different from the wiki: {errors}"
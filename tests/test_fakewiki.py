@@ -0,0 +1,175 @@
+import json
+
+import pytest
+from gorgonwikibot import cdn, publish
+from gorgonwikibot.fakewiki import FakeWiki
+from gorgonwikibot.publish import Publisher, SaveQueue, preload
+from scripts import create_ai_profiles
+
+pytestmark = pytest.mark.usefixtures("no_throttle")
+
+
+def save_all(site, texts, jobs=2):
+    pages = preload(site, texts)
+    with SaveQueue(jobs) as queue:
+        for title, text in texts.items():
+            page = pages[title]
+            if page.text == text:
+                queue.skip(title)
+            else:
+                page.text = text
+                queue.put(page, "test")
+    return queue
+
+
+def test_preload_and_save():
+    with FakeWiki(pages={"Old": "old text", "Same": "same"}) as wiki:
+        site = wiki.site()
+        assert site.user() == wiki.user
+        pages = preload(site, ["Old", "Same", "AIP:New"])
+        assert pages["Old"].text == "old text"
+        assert not pages["AIP:New"].exists()
+
+        texts = {"Old": "new text", "Same": "same", "AIP:New": "created"}
+        queue = save_all(site, texts)
+        assert sorted(queue.saved) == ["AIP:New", "Old"]
+        assert queue.skipped == ["Same"]
+        assert wiki.text("Old") == "new text"
+        assert wiki.text("AIP:New") == "created"
+        assert wiki.stats["saved"] == 2
+
+
+def test_maxlag_is_retried():
+    with FakeWiki(maxlag_every=2, lag=0.01) as wiki:
+        site = wiki.site()
+        queue = save_all(site, {f"Page {i}": str(i) for i in range(5)})
+        assert len(queue.saved) == 5 and not queue.failed
+        assert wiki.stats["maxlag"] > 0
+
+
+def test_rate_limit_is_retried():
+    with FakeWiki(rate_limit=(2, 0.2)) as wiki:
+        site = wiki.site()
+        queue = save_all(site, {f"Page {i}": str(i) for i in range(5)}, jobs=4)
+        assert len(queue.saved) == 5 and not queue.failed
+        assert wiki.stats["ratelimited"] > 0
+        assert [wiki.text(f"Page {i}") for i in range(5)] == list("01234")
+
+
+def test_script_publishes_ai_profiles(synthetic_cache):
+    argv = ["create_ai_profiles.py", "--offline", "--cache-dir", str(synthetic_cache)]
+    with FakeWiki() as wiki:
+        wiki.site()
+        create_ai_profiles.main(argv + ["--jobs", "2"])
+        profiles = create_ai_profiles.generate_ai_profiles()
+        assert profiles
+        for name, text in profiles.items():
+            assert wiki.text(f"AIP:{name}") == text
+        saved = wiki.stats["saved"]
+
+        # a second run finds every page up to date
+        create_ai_profiles.main(argv)
+        assert wiki.stats["saved"] == saved
+
+
+def test_script_metrics(synthetic_cache, tmp_path):
+    filename = tmp_path / "metrics.json"
+    argv = ["create_ai_profiles.py", "--offline", "--cache-dir", str(synthetic_cache)]
+    with FakeWiki() as wiki:
+        wiki.site()
+        create_ai_profiles.main(argv + ["--metrics", str(filename)])
+    report = json.loads(filename.read_text())
+    assert report["counters"]["saved"] == wiki.stats["saved"]
+    assert report["counters"]["generated"] == wiki.stats["saved"]
+    assert report["latencies"]["save"]["count"] == wiki.stats["saved"]
+    assert {"login", "generate", "fetch", "save"} <= set(report["stages"])
+
+
+def test_publisher(tmp_path):
+    # keep the published pages of this test to itself
+    cdn.configure(cdn.get_version(), offline=True, cache_dir=tmp_path)
+    pages = [(f"Page {i}", str(i), "test") for i in range(7)]
+    with FakeWiki(pages={"Page 0": "0"}) as wiki:
+        site = wiki.site()
+        with Publisher(site, jobs=2, batch_size=3) as publisher:
+            publisher.publish(iter(pages))
+        assert sorted(publisher.queue.saved) == [f"Page {i}" for i in range(1, 7)]
+        assert publisher.queue.skipped == ["Page 0"]
+
+        # published pages are skipped without fetching them again
+        with Publisher(site, dry=True) as publisher:
+            publisher.publish(pages[:3] + [("Page 7", "new", "test")])
+        assert len(publisher.queue.skipped) == 3
+        assert not publisher.queue.saved and wiki.text("Page 7") is None
+
+
+def test_publisher_stops_on_fetch_error(monkeypatch, tmp_path):
+    def broken(site, titles):
+        raise RuntimeError("fetch failed")
+
+    cdn.configure(cdn.get_version(), offline=True, cache_dir=tmp_path)
+    monkeypatch.setattr(publish, "preload", broken)
+    generated = []
+
+    def pages():
+        for i in range(100):
+            generated.append(i)
+            yield f"Page {i}", str(i), "test"
+
+    with FakeWiki() as wiki:
+        site = wiki.site()
+        with pytest.raises(RuntimeError, match="fetch failed"):
+            with Publisher(site, batch_size=2) as publisher:
+                publisher.publish(pages())
+    # the generator stops soon after the fetching thread failed
+    assert len(generated) < 20
+
+
+def test_publisher_after_fetch_error(monkeypatch, tmp_path):
+    failures = [RuntimeError("fetch failed")]
+
+    def flaky(site, titles):
+        if failures:
+            raise failures.pop()
+        return preload(site, titles)
+
+    cdn.configure(cdn.get_version(), offline=True, cache_dir=tmp_path)
+    monkeypatch.setattr(publish, "preload", flaky)
+    pages = [(f"Page {i}", str(i), "test") for i in range(10)]
+    with FakeWiki() as wiki:
+        site = wiki.site()
+        # scripts run together share a Publisher, and go on after one fails
+        with Publisher(site, batch_size=2) as publisher:
+            with pytest.raises(RuntimeError, match="fetch failed"):
+                publisher.publish(iter(pages))
+            publisher.publish(iter(pages))
+        assert sorted(publisher.queue.saved) == sorted(t for t, _, _ in pages)
+
+
+def test_publisher_empty_page(tmp_path):
+    cdn.configure(cdn.get_version(), offline=True, cache_dir=tmp_path)
+    pages = [("Empty", "", "test"), ("Full", "text", "test")]
+    with FakeWiki() as wiki:
+        site = wiki.site()
+        # an empty page that doesn't exist is unchanged, not an error
+        for verify in (False, True):
+            with Publisher(site, verify=verify) as publisher:
+                publisher.publish(pages)
+        assert sorted(publisher.queue.skipped) == ["Empty", "Full"]
+        assert wiki.text("Empty") is None
+
+
+def test_publisher_titles_as_generated(tmp_path):
+    cdn.configure(cdn.get_version(), offline=True, cache_dir=tmp_path)
+    pages = [("page_one", "1", "test")]  # the wiki calls it "Page one"
+    with FakeWiki() as wiki:
+        site = wiki.site()
+        with Publisher(site) as publisher:
+            publisher.publish(pages)
+        assert publisher.queue.saved == ["page_one"]
+        requests = wiki.stats["requests"]
+
+        with Publisher(site) as publisher:
+            publisher.publish(pages)
+        assert publisher.queue.skipped == ["page_one"]
+        assert wiki.stats["requests"] == requests
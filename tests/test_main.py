@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from gorgonwikibot import __main__ as runner
+from gorgonwikibot import content
+from gorgonwikibot.content import Ability, Ai
+from gorgonwikibot.fakewiki import FakeWiki
+from scripts import create_ai_profiles, create_pet_profiles
+
+pytestmark = pytest.mark.usefixtures("no_throttle")
+
+
+def test_run_scripts(tmp_path, synthetic_cache):
+    filename = tmp_path / "metrics.json"
+    argv = ["gorgonwikibot", "run", "ai", "pets", "quests", "ai"]
+    argv += ["--offline", "--cache-dir", str(synthetic_cache)]
+    content.clear_caches()  # so that the run loads the ai file
+    with FakeWiki() as wiki:
+        wiki.site()
+        runner.main(argv + ["--metrics", str(filename)])
+        assert wiki.stats["login"] <= 1
+        profiles = create_ai_profiles.generate_ai_profiles()
+        profiles.update(create_pet_profiles.generate_pet_profiles())
+        for name, text in profiles.items():
+            assert wiki.text(f"AIP:{name}") == text
+        # the rest are quest pages; ai profiles were only published once
+        assert wiki.stats["saved"] > len(profiles)
+        assert wiki.stats["nochange"] == 0
+
+    report = json.loads(filename.read_text())
+    assert report["counters"]["saved"] == wiki.stats["saved"]
+    # every script used the files the first one loaded
+    assert report["cache"][Ai.datafile]["miss"] == 1
+    assert report["cache"][Ability.datafile]["miss"] == 1
+
+
+def test_unknown_script():
+    with FakeWiki() as wiki:
+        wiki.site()
+        with pytest.raises(SystemExit):
+            runner.main(["gorgonwikibot", "run", "abilities", "recipes"])
+        assert not wiki.stats["saved"]
+
+
+def test_failed_script_doesnt_stop_the_others(synthetic_cache, monkeypatch):
+    def broken(site, options, publisher):
+        raise RuntimeError("broken script")
+
+    monkeypatch.setattr(create_ai_profiles, "publish_pages", broken)
+    argv = ["gorgonwikibot", "run", "ai", "pets"]
+    argv += ["--offline", "--cache-dir", str(synthetic_cache)]
+    with FakeWiki() as wiki:
+        wiki.site()
+        with pytest.raises(SystemExit) as exit:
+            runner.main(argv)
+        assert exit.value.code == 1
+        for name, text in create_pet_profiles.generate_pet_profiles().items():
+            assert wiki.text(f"AIP:{name}") == text
@@ -0,0 +1,64 @@
+import json
+
+from gorgonwikibot import cdn, metrics, parallel
+from gorgonwikibot.metrics import Metrics, summarize
+
+
+def test_nothing_recorded_without_collecting():
+    with metrics.stage("generate"):
+        metrics.count("saved")
+        metrics.page_done("saved")
+    m = Metrics()
+    assert m.report()["counters"] == {}
+
+
+def test_collecting():
+    lines = []
+    with metrics.collecting(Metrics(progress_every=0, output=lines.append)) as m:
+        metrics.expect(4)
+        for _ in range(2):
+            with metrics.stage("generate"), metrics.timed("generate"):
+                metrics.count("generated")
+        metrics.page_done("saved")
+        metrics.page_done("unchanged")
+        metrics.page_done("dry")
+    metrics.count("generated")  # after the block
+    report = m.report()
+    assert report["counters"] == {"generated": 2, "saved": 1, "unchanged": 1, "dry": 1}
+    assert report["stages"]["generate"] >= 0
+    assert report["latencies"]["generate"]["count"] == 2
+    assert lines[-1].startswith("Progress: 3/4 pages, ")
+    assert "ETA" in lines[-1]
+
+
+def test_summarize():
+    s = summarize([0.3, 0.0005, 0.004, 20, 0.004])
+    assert s["count"] == 5
+    assert s["p50"] == 0.004
+    assert s["p99"] == s["max"] == 20
+    assert s["histogram"] == {"0.001": 1, "0.005": 2, "0.5": 1, "inf": 1}
+
+
+def test_data_file_cache(tmp_path):
+    with metrics.collecting(Metrics()) as m:
+        cdn.clear_caches()
+        cdn.get_file("skills")
+        cdn.get_file("skills")
+        cdn.clear_caches()
+        cdn.get_file("skills")
+    assert m.cache["skills"]["miss"] == 2
+    assert m.cache["skills"]["hit"] == 1
+    assert m.cache["skills"]["snapshot"] + m.cache["skills"].get("json", 0) == 2
+    assert "load" in m.stages
+
+    filename = tmp_path / "metrics.json"
+    m.write(filename)
+    assert json.loads(filename.read_text())["cache"]["skills"]["hit"] == 1
+
+
+def test_pool_records_generate_latency():
+    with metrics.collecting(Metrics()) as m:
+        with parallel.Pool() as pool:
+            results = pool.map(str, [1, 2, 3])
+    assert [r for r, _ in results] == ["1", "2", "3"]
+    assert len(m.latencies["generate"]) == 3
@@ -0,0 +1,44 @@
+import pytest
+from gorgonwikibot import cdn, deps, parallel
+from gorgonwikibot.content import Skill, get_content_by_id
+
+
+def skill_name(id):
+    return get_content_by_id(Skill, id).name
+
+
+@pytest.fixture
+def skills(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    data = {f"Skill{i}": {"Name": f"Skill {i}"} for i in range(20)}
+    cdn.store("skills", data, 1)
+    cdn.configure(version=1, offline=True)
+    yield list(data)
+    cdn.configure()
+
+
+def test_serial(skills):
+    with parallel.Pool() as pool:
+        results = pool.map(skill_name, skills[:2])
+    assert results == [
+        ("Skill 0", {("skills", "Skill0")}),
+        ("Skill 1", {("skills", "Skill1")}),
+    ]
+
+
+def test_workers_match_serial(skills):
+    with parallel.Pool(1) as pool:
+        serial = pool.map(skill_name, skills)
+    with parallel.Pool(3, ("skills",)) as pool:
+        assert pool.map(skill_name, skills) == serial
+
+
+def test_record_reads(skills):
+    graph = deps.DependencyGraph("test")
+    with parallel.Pool(2) as pool:
+        results = pool.map(skill_name, skills[:3])
+    with deps.tracking(graph):
+        for id, (_, reads) in zip(skills, results):
+            with deps.page(id):
+                deps.record_reads(reads)
+    assert graph.pages["Skill2"] == {("skills", "Skill2")}
@@ -0,0 +1,68 @@
+import threading
+
+import pywikibot
+from gorgonwikibot.publish import SaveQueue, batched
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+
+class DummyPage:
+    def __init__(self, title, fail=False):
+        self._title = title
+        self.fail = fail
+        self.saved_with = None
+
+    def title(self):
+        return self._title
+
+    def save(self, summary):
+        if self.fail:
+            raise pywikibot.exceptions.Error("nope")
+        self.saved_with = summary
+
+
+def test_save_queue():
+    pages = [DummyPage(str(i)) for i in range(10)] + [DummyPage("bad", fail=True)]
+    with SaveQueue(jobs=3, maxsize=2) as queue:
+        for page in pages:
+            queue.put(page, "summary")
+        queue.skip("unchanged")
+    assert sorted(queue.saved) == sorted(str(i) for i in range(10))
+    assert queue.failed == ["bad"]
+    assert queue.skipped == ["unchanged"]
+    assert all(p.saved_with == "summary" for p in pages[:10])
+    assert queue.summary().startswith("10 saved, 1 skipped, 1 failed")
+
+
+def test_save_queue_bounded():
+    release = threading.Event()
+    in_flight = []
+
+    class SlowPage(DummyPage):
+        def save(self, summary):
+            in_flight.append(self)
+            release.wait()
+
+    queue = SaveQueue(jobs=1, maxsize=2)
+    queue.put(SlowPage("1"), "")
+    queue.put(SlowPage("2"), "")
+    # a third put would block until a slot frees up
+    assert not queue._slots.acquire(blocking=False)
+    release.set()
+    queue.close()
+    assert len(queue.saved) == 2
+
+
+def test_save_queue_unexpected_error():
+    class BrokenPage(DummyPage):
+        def save(self, summary):
+            raise RuntimeError("not a pywikibot error")
+
+    with SaveQueue() as queue:
+        queue.put(BrokenPage("broken"), "")
+        queue.put(DummyPage("fine"), "")
+    assert queue.failed == ["broken"]
+    assert queue.saved == ["fine"]
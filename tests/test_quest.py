@@ -0,0 +1,67 @@
+import pytest
+from gorgonwikibot import cdn, deps
+from gorgonwikibot.content import Item, Skill, get_content_by_id, resolve
+from gorgonwikibot.quest import Quest, key_handlers, render_quests
+
+
+@pytest.fixture
+def quests():
+    """Fresh quests that have an npc, so their pages render."""
+    data = cdn.get_file(Quest.datafile)
+    return [Quest(id, q) for id, q in data.items() if q.get("FavorNpc")]
+
+
+def test_render_quests(quests):
+    expected = []
+    for quest in quests:
+        with deps.recording() as reads:
+            expected.append((quest.wiki_source(), sorted(reads)))
+        quest.errors.clear()
+        quest.notices.clear()
+    rendered = render_quests(quests)
+    assert [(source, sorted(reads)) for source, _, reads in rendered] == expected
+    assert not any(e for _, e, _ in rendered)
+
+
+def test_render_quests_errors(quests):
+    quests[0].data["SomeNewKey"] = 1
+    quests[1].data["Rewards"] = [{"T": "SomeNewReward"}]
+    quests[2].data["Rewards_Items"] = [{"Item": "NoSuchItem", "StackSize": 1}]
+    quests[3].data["Rewards_XP"] = {"NoSuchSkill": 100}
+    rendered = render_quests(quests[:5])
+    assert quests[0].errors == ["Unhandled key: SomeNewKey"]
+    assert quests[1].errors == ["Unexpected reward type: SomeNewReward"]
+    assert isinstance(rendered[2][1], AttributeError)
+    assert isinstance(rendered[3][1], KeyError)
+    assert rendered[4][0] and rendered[4][1] is None
+
+
+def test_unknown_keys_with_the_same_keys(quests):
+    # quests with the same keys share how their keys are handled
+    for quest in quests[:2]:
+        quest.data["SomeNewKey"] = 1
+    render_quests(quests[:2])
+    assert quests[0].errors == quests[1].errors == ["Unhandled key: SomeNewKey"]
+
+
+def test_every_reference_is_resolved(quests):
+    refs = {ref for quest in quests for ref in quest.references()}
+    assert refs and refs == set(resolve(refs))
+    assert {cls.__name__ for cls, _, _ in refs} >= {"Area", "Item", "Skill"}
+    assert "Objectives" in key_handlers and "InternalName" not in key_handlers
+
+
+def test_resolve():
+    skill = next(iter(cdn.get_file(Skill.datafile)))
+    item = next(iter(cdn.get_file(Item.datafile).values()))["InternalName"]
+    refs = [
+        (Skill, None, skill),
+        (Item, "InternalName", item),
+        (Item, "InternalName", item),
+        (Skill, None, "NoSuchSkill"),
+        (Item, "InternalName", "NoSuchItem"),
+    ]
+    resolved = resolve(refs)
+    assert set(resolved) == set(refs[:2])
+    assert resolved[Skill, None, skill].id == get_content_by_id(Skill, skill).id
+    assert resolved[Item, "InternalName", item].iname == item
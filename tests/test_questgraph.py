@@ -0,0 +1,76 @@
+import pytest
+from gorgonwikibot import cdn, deps, questgraph
+from gorgonwikibot.quest import Quest
+
+
+def quest(iname, requirements=None, **custom):
+    data = {"InternalName": iname, "Name": iname.title(), "FavorNpc": "A/B"}
+    if requirements is not None:
+        data["Requirements"] = requirements
+    data.update(custom)
+    return data
+
+
+def done(iname):
+    return {"T": "QuestCompleted", "Quest": iname}
+
+
+@pytest.fixture
+def quests(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    cdn.store(
+        "quests",
+        {
+            "quest_1": quest("a", {"T": "MinFavorLevel", "Level": "Friends"}),
+            "quest_2": quest("b", [done("a")], PrerequisiteFavorLevel="Comfortable"),
+            "quest_3": quest(
+                "c",
+                [[{"T": "Or", "List": [done("b"), done("a")]}]],
+                FavorNpc="",
+            ),
+            "quest_4": quest(
+                "d",
+                [
+                    {"T": "GuildQuestCompleted", "Quest": "c"},
+                    {"T": "MinSkillLevel", "Skill": "Sword", "Level": 10},
+                    done("nosuchquest"),
+                ],
+            ),
+            "quest_5": quest("e"),
+            # a cycle, hanging off a
+            "quest_6": quest("f", [done("a"), done("g")]),
+            "quest_7": quest("g", [done("f")]),
+        },
+        1,
+    )
+    cdn.configure(version=1, offline=True)
+    questgraph._graph.cache_clear()
+    yield
+    cdn.configure()
+
+
+def test_graph(quests):
+    graph = questgraph.get_graph()
+    assert graph.prerequisites["c"] == ("b", "a")
+    assert graph.prerequisites["d"] == ("c",)
+    assert graph.unlocks["a"] == ("b", "c", "f")
+    assert graph.favor == {"a": "Friends", "b": "Comfortable"}
+    assert graph.skills["d"] == (("Sword", 10),)
+    assert graph.ancestors("d") == {"a", "b", "c"}
+    assert graph.descendants("b") == {"c", "d"}
+    assert graph.ancestors("f") == {"a", "g"}
+    assert [graph.depth[q] for q in "abcdefg"] == [0, 1, 2, 3, 0, 1, 2]
+    assert graph.chain("b") == ("a", "b", "c", "d")
+    assert graph.chain("f") == ("a", "f", "g")  # b and c only share a with f
+    assert graph.chain("e") == ("e",)
+    assert questgraph.get_graph() is graph
+
+
+def test_requirements_text(quests):
+    data = dict(cdn.get_file("quests")["quest_4"], FavorNpc="")  # no npcs.json
+    with deps.recording() as reads:
+        text = Quest("quest_4", data).requirements_text()
+    assert text == (
+        "You must have previously completed [[C]] in order to undertake this quest."
+    )
+    assert reads == {("quests", "quest_3")}
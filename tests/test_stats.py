@@ -0,0 +1,101 @@
+import math
+
+import pytest
+from gorgonwikibot import cdn, stats
+
+
+@pytest.fixture
+def tables(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdn, "root", str(tmp_path))
+    cdn.store(
+        "abilities",
+        {
+            "ability_1": {
+                "InternalName": "SwordSlash",
+                "Skill": "Sword",
+                "Level": 1,
+                "ResetTime": 5,
+                "PvE": {"PowerCost": 3, "Range": 5, "Damage": 10},
+            },
+            "ability_2": {
+                "InternalName": "SwordSlash2",
+                "Skill": "Sword",
+                "Level": 10,
+                "ResetTime": 5,
+                "PvE": {"PowerCost": 6, "Range": 5, "Damage": 40},
+            },
+            "ability_3": {
+                "InternalName": "Fireball",
+                "Skill": "FireMagic",
+                "Level": 5,
+                "ResetTime": 10,
+                "PvE": {
+                    "PowerCost": 8,
+                    "Range": 30,
+                    "ArmorSpecificDamage": 25,
+                    "RageMultiplier": 2,
+                    "DoTs": [
+                        {"DamagePerTick": 4, "Preface": "Deals"},
+                        {"DamagePerTick": 3, "NumTicks": 5, "Duration": 10},
+                    ],
+                },
+            },
+            "ability_4": {"InternalName": "Emote", "Skill": "Unknown"},
+        },
+        1,
+    )
+    cdn.store(
+        "ai",
+        {
+            "Rat": {"Abilities": {"RatBite": {}, "RatRage": {"minLevel": 5}}},
+            "Cat_Pet": {"Abilities": {"PetBite": {"minLevel": 2, "maxLevel": 9}}},
+        },
+        1,
+    )
+    cdn.configure(version=1, offline=True)
+    stats._ability_table.cache_clear()
+    stats._ai_table.cache_clear()
+    yield stats.ability_table(), stats.ai_table()
+    cdn.configure()
+
+
+def test_ability_table(tables):
+    t, _ = tables
+    assert len(t) == 4
+    assert t.row("Fireball")["damage"] == 25
+    assert t.row("Fireball")["dot_damage"] == 3
+    assert t.row("Fireball")["dot_ticks"] == 5
+    assert t.row("Fireball")["rage_multiplier"] == 2
+    assert math.isnan(t.row("SwordSlash")["rage_multiplier"])
+    assert math.isnan(t.row("Emote")["damage"])
+
+
+def test_queries(tables):
+    t, _ = tables
+    sword = t.where("skill", "==", "Sword")
+    assert t.select(sword & t.where("damage", ">", 20), "iname") == [("SwordSlash2",)]
+    assert t.select(~sword, "iname") == [("Fireball",), ("Emote",)]
+    # NaN fails every comparison
+    assert (t.where("damage", "<", 100) | t.where("damage", ">=", 100)).count() == 3
+    assert t.where("iname", "in", ["Emote", "Fireball"]).rows() == [2, 3]
+    assert t.where("level", lambda level: level % 2 == 0).rows() == [1]
+
+
+def test_aggregates(tables):
+    t, _ = tables
+    assert t.aggregate("damage", max) == 40
+    assert t.aggregate("damage", stats.mean, t.where("skill", "==", "Sword")) == 25
+    assert t.aggregate("damage", sum, by="skill") == {"Sword": 50, "FireMagic": 25}
+    assert math.isnan(t.aggregate("damage", max, t.where("skill", "==", "Unknown")))
+
+
+def test_ai_table(tables):
+    _, ai = tables
+    assert ai.select(ai.all(), "ai", "ability", "min_level") == [
+        ("Rat", "RatBite", 1),
+        ("Rat", "RatRage", 5),
+        ("Cat_Pet", "PetBite", 2),
+    ]
+    assert ai.select(ai.where("max_level", ">", 0), "ability") == [("PetBite",)]
+    with pytest.raises(ValueError):
+        ai.all() & tables[0].all()
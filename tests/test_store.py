@@ -0,0 +1,28 @@
+from gorgonwikibot.store import PublishedStore, text_hash
+
+
+def test_store(tmp_path):
+    with PublishedStore(str(tmp_path / "published.sqlite3")) as store:
+        store.put("wiki", "A", "text", 1)
+        store.put("wiki", "B", "old text", 2)
+        store.put("other wiki", "C", "text", 3)
+        store.put("wiki", "B", "new text", 4)
+        assert store.get("wiki", ["A", "B", "C"]) == {
+            "A": (text_hash("text"), 1),
+            "B": (text_hash("new text"), 4),
+        }
+        assert store.unchanged("wiki", {"A": "text", "B": "old text", "D": "x"}) == {
+            "A"
+        }
+    # persisted between runs
+    with PublishedStore(str(tmp_path / "published.sqlite3")) as store:
+        assert store.unchanged("other wiki", {"C": "text"}) == {"C"}
+
+
+def test_many_titles(tmp_path):
+    with PublishedStore(str(tmp_path / "published.sqlite3")) as store:
+        for i in range(1200):
+            store.put("wiki", str(i), str(i), i)
+        assert (
+            len(store.unchanged("wiki", {str(i): str(i) for i in range(1200)})) == 1200
+        )
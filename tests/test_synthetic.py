@@ -0,0 +1,29 @@
+from gorgonwikibot import cdn, synthetic
+from gorgonwikibot.content import Npc, get_content_by_id
+from gorgonwikibot.quest import Quest
+
+
+def test_word():
+    words = [synthetic.word(n) for n in range(2000)]
+    assert len(set(words)) == len(words)
+    assert not any(c.isdigit() for w in words for c in w)
+
+
+def test_generate():
+    small = synthetic.generate(scale=0.1, seed=1)
+    assert small == synthetic.generate(scale=0.1, seed=1)
+    assert set(small) == set(cdn.DATAFILES)
+    large = synthetic.generate(scale=0.2, seed=1)
+    assert len(large["items"]) == 2 * len(small["items"])
+    requirements = [q.get("Requirements") for q in small["quests"].values()]
+    assert any(isinstance(r, dict) for r in requirements)
+    assert any(isinstance(r, list) and isinstance(r[0], list) for r in requirements)
+
+
+def test_installed(synthetic_cache):
+    assert cdn.root == str(synthetic_cache)
+    assert cdn.get_version() == str(synthetic.VERSION)
+    quests = {q["Name"]: Quest(id, q) for id, q in cdn.get_file(Quest.datafile).items()}
+    event = [q for q in quests.values() if "LiveNpc_" in q.data.get("FavorNpc", "")]
+    assert event and event[0].npc.name == "Kalaba"
+    assert get_content_by_id(Npc, "NPC_Joe").ref == "AreaSerbule/Joe"
@@ -0,0 +1,60 @@
+import pytest
+from gorgonwikibot.template import Template
+
+
+def test_slots():
+    t = Template("{{Quote|$text}} costs $$$price")
+    assert t.render(text="Hi", price=3) == "{{Quote|Hi}} costs $3"
+    assert t.render({"text": "Hi", "price": 3}, price=4.5) == "{{Quote|Hi}} costs $4.5"
+    assert t.fields == ["text", "price"]
+    with pytest.raises(KeyError):
+        t.render(text="Hi")
+
+
+def test_quotes_and_backslashes():
+    t = Template("'''It's''' \"$x\" \\ $[y:'$y\"$]")
+    assert t.render(x=1, y=[2, 3]) == "'''It's''' \"1\" \\ '2\"'3\""
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("8 Fire", "{{X\n| damage = 8 Fire\n}}"),
+        (0, "{{X\n| damage = 0\n}}"),
+        ("", "{{X\n}}"),
+        (None, "{{X\n}}"),
+        ([], "{{X\n}}"),
+        (["a", "b"], "{{X\n| damage = a\n| damage = b\n}}"),
+        (("a",), "{{X\n| damage = a\n}}"),
+    ],
+)
+def test_sections(value, expected):
+    t = Template("{{X$[damage:\n| damage = $damage$]\n}}")
+    assert t.render(damage=value) == expected
+
+
+def test_render_all():
+    t = Template("* $name$[note: ($note)$]\n")
+    rows = [{"name": "A", "note": "new"}, {"name": "B", "note": None}]
+    assert t.render_all(rows) == ["* A (new)\n", "* B\n"]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "$[a:$[b:$b$]$]",  # nested
+        "$[a:$a",  # not closed
+        "$a$]",  # not opened
+        "$[a:$b$]",  # another field in a section
+    ],
+)
+def test_invalid(source):
+    with pytest.raises(ValueError):
+        Template(source)
+
+
+@pytest.mark.parametrize("name", ["blank", "join", "empty", "sequences", "s0"])
+def test_fields_named_like_helpers(name):
+    t = Template(f"${name}|$[x:<$x>$]")
+    assert t.render({name: "F", "x": None}) == "F|"
+    assert t.render({name: "F", "x": ["a", "b"]}) == "F|<a><b>"